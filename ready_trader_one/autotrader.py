@@ -34,8 +34,15 @@ class AutoTrader(BaseAutoTrader):
 
         # Initialising variables
         # Don't track future position since its just negative ETF position
-        # TODO: REFACTOR ASK ID AND BID ID OUT
+        # The ask and bid ids are the current quotes, whose state is kept by the order manager
         self.ask_id = self.ask_price = self.ask_spread = self.bid_id = self.bid_price = self.bid_spread = self.position = self.true_price = 0
+        self.orders = self.enable_order_manager()
+
+        # Strategy parameters, which can be varied by sweep.py (the skew is in cents per lot and must be a
+        # multiple of the tick size)
+        self.order_volume = 1
+        self.position_limit = 100
+        self.position_skew = 100
 
     def on_error_message(self, client_order_id: int, error_message: bytes) -> None:
         """Called when the exchange detects an error.
@@ -46,7 +53,6 @@ class AutoTrader(BaseAutoTrader):
         # just log some stuff
         self.logger.warning("error with order %d: %s",
                             client_order_id, error_message.decode())
-        self.on_order_status_message(client_order_id, 0, 0, 0)
 
     def on_order_book_update_message(self, instrument: int, sequence_number: int, ask_prices: List[int],
                                      ask_volumes: List[int], bid_prices: List[int], bid_volumes: List[int]) -> None:
@@ -75,32 +81,30 @@ class AutoTrader(BaseAutoTrader):
             ask_spread = self.ask_spread
             bid_spread = self.bid_spread
 
-            # set ask and bid volume (hardcoded rn)
-            ask_volume = bid_volume = 1
+            # set ask and bid volume
+            ask_volume = bid_volume = self.order_volume
 
             # calculate prices
             bid_price = round(self.true_price -
-                              bid_spread) // 100 * 100 - self.position * 100
+                              bid_spread) // 100 * 100 - self.position * self.position_skew
             ask_price = round(self.true_price +
-                              ask_spread) // 100 * 100 - self.position * 100
+                              ask_spread) // 100 * 100 - self.position * self.position_skew
 
             # check that price is different to current price
-            if self.bid_id != 0 and bid_price not in (self.bid_price, 0):
+            if self.orders.is_live(self.bid_id) and bid_price not in (self.bid_price, 0):
                 self.send_cancel_order(self.bid_id)
-                self.bid_id = 0
-            if self.ask_id != 0 and ask_price not in (self.ask_price, 0):
+            if self.orders.is_live(self.ask_id) and ask_price not in (self.ask_price, 0):
                 self.send_cancel_order(self.ask_id)
-                self.ask_id = 0
 
             # aggregate orders and send
-            if self.bid_id == 0 and bid_price != 0 and self.position < 100:
+            if not self.orders.is_live(self.bid_id) and bid_price != 0 and self.position < self.position_limit:
                 # * rename into new_bid_price
                 self.bid_id = next(self.order_ids)
                 self.bid_price = bid_price
                 self.send_insert_order(self.bid_id, Side.BUY,
                                        bid_price, bid_volume, Lifespan.GOOD_FOR_DAY)
 
-            if self.ask_id == 0 and ask_price != 0 and self.position > -100:
+            if not self.orders.is_live(self.ask_id) and ask_price != 0 and self.position > -self.position_limit:
                 self.ask_id = next(self.order_ids)
                 self.ask_price = ask_price
                 self.send_insert_order(self.ask_id, Side.SELL,
@@ -129,15 +133,9 @@ class AutoTrader(BaseAutoTrader):
 
         If an order is cancelled its remaining volume will be zero.
         """
-        # update the current orders
+        # the order manager has already updated the current orders
         # TODO: MAKE THIS REFILL ORDERS!!!
-
-        # check if the order is a cancel order
-        if remaining_volume == 0:
-            if client_order_id == self.bid_id:
-                self.bid_id = 0
-            elif client_order_id == self.ask_id:
-                self.ask_id = 0
+        pass
 
     def on_position_change_message(self, future_position: int, etf_position: int) -> None:
         """Called when your position changes.
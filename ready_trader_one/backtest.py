@@ -0,0 +1,37 @@
+import argparse
+import logging
+import time
+
+import ready_trader_one.exchange
+
+from ready_trader_one.application import LOG_FORMAT
+
+
+def main():
+    """Backtest one or more auto-traders against recorded market data and print a summary of their results."""
+    parser = argparse.ArgumentParser(description="Backtest auto-traders against recorded market data.")
+    parser.add_argument("trader_names", nargs="*", default=["autotrader"], metavar="trader",
+                        help="python module name of an auto-trader (default: autotrader)")
+    parser.add_argument("--market-data", help="market data file (default: the MarketDataFile in exchange.json)")
+    parser.add_argument("--match-events", help="file in which to record the match events (default: none)")
+    args = parser.parse_args()
+
+    logging.basicConfig(filename="exchange.log", format=LOG_FORMAT, level=logging.INFO)
+
+    start = time.perf_counter()
+    accounts = ready_trader_one.exchange.backtest(args.trader_names, args.market_data, args.match_events)
+    elapsed = time.perf_counter() - start
+
+    print("%-20s %12s %12s %12s %8s %8s %8s %10s" % ("Team", "Profit", "MaxDrawdown", "MaxProfit", "EtfPos",
+                                                   "Bought", "Sold", "Fees"))
+    for name, account in sorted(accounts.items(), key=lambda item: -item[1].profit_or_loss):
+        print("%-20s %12.2f %12.2f %12.2f %8d %8d %8d %10.2f" % (name, account.profit_or_loss / 100.0,
+                                                               account.max_drawdown / 100.0,
+                                                               account.max_profit / 100.0, account.etf_position,
+                                                               account.buy_volume, account.sell_volume,
+                                                               account.total_fees / 100.0))
+    print("completed in %.1f seconds" % elapsed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Compare the cost of building order book update messages.
+
+The "splat" path packs the lists of a TopLevels instance into the message
+with ORDER_BOOK_MESSAGE.pack_into(..., *ask_prices, *ask_volumes, ...). The
+"direct" path has the order book copy its already packed top levels into the
+message with OrderBook.write_top_levels. On a busy book both paths include
+the cost of rebuilding the top levels after a change to the best bid.
+
+Run from the directory containing run.py:
+
+    python -m benchmarks.book_message
+"""
+import argparse
+import timeit
+
+from ready_trader_one.messages import ORDER_BOOK_HEADER_SIZE, ORDER_BOOK_MESSAGE, ORDER_BOOK_MESSAGE_SIZE
+from ready_trader_one.order_book import Order, OrderBook, TopLevels
+from ready_trader_one.types import Instrument, Lifespan, Side
+
+
+def make_book() -> OrderBook:
+    """Return an order book with ten levels on each side."""
+    book = OrderBook(Instrument.ETF, None, 0.0, 0.0)
+    for i in range(1, 11):
+        book.insert(0.0, Order(2 * i, Instrument.ETF, Lifespan.GOOD_FOR_DAY, Side.BUY, 10000 - 100 * i, i))
+        book.insert(0.0, Order(2 * i + 1, Instrument.ETF, Lifespan.GOOD_FOR_DAY, Side.SELL, 10000 + 100 * i, i))
+    return book
+
+
+def splat(book: OrderBook, message: bytearray) -> None:
+    """Build the message from the lists of a TopLevels instance."""
+    top: TopLevels = book.top_levels()
+    ORDER_BOOK_MESSAGE.pack_into(message, ORDER_BOOK_HEADER_SIZE, *top.ask_prices, *top.ask_volumes,
+                                 *top.bid_prices, *top.bid_volumes)
+
+
+def direct(book: OrderBook, message: bytearray) -> None:
+    """Have the order book write its top levels into the message."""
+    book.write_top_levels(message, ORDER_BOOK_HEADER_SIZE)
+
+
+def touch(book: OrderBook, order: Order) -> None:
+    """Cancel or reinsert the best bid so that the top levels have to be rebuilt."""
+    if order.remaining_volume:
+        book.cancel(0.0, order)
+    else:
+        order.remaining_volume = order.volume
+        book.insert(0.0, order)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark order book update message serialisation.")
+    parser.add_argument("--count", type=int, default=200000, help="messages built per measurement")
+    args = parser.parse_args()
+
+    message = bytearray(ORDER_BOOK_MESSAGE_SIZE)
+    book = make_book()
+    order = Order(0, Instrument.ETF, Lifespan.GOOD_FOR_DAY, Side.BUY, 9950, 1000)
+    book.insert(0.0, order)
+
+    for name, function in (("splat", splat), ("direct", direct)):
+        quiet = timeit.timeit(lambda: function(book, message), number=args.count)
+        busy = timeit.timeit(lambda: (touch(book, order), function(book, message)), number=args.count)
+        touch_only = timeit.timeit(lambda: touch(book, order), number=args.count)
+        print("%-6s quiet book: %6.0f ns/msg  busy book: %6.0f ns/msg" % (
+            name, quiet / args.count * 1e9, (busy - touch_only) / args.count * 1e9))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Compare the cost of framing a stream of order messages.
+
+The "concat" framer is the old approach: received bytes are concatenated
+onto any partial message and the unprocessed tail is sliced off after each
+read. The "append" and "get_buffer" framers use a ReceiveBuffer, filled by
+data_received and by the BufferedProtocol interface respectively.
+
+The stream is replayed in chunks of random size so that messages are split
+across reads, as they are by TCP. A captured stream of auto-trader to
+exchange messages can be replayed instead of the generated one.
+
+Run from the directory containing run.py:
+
+    python -m benchmarks.framing
+"""
+import argparse
+import random
+import time
+
+from typing import List
+
+from ready_trader_one.framing import ReceiveBuffer
+from ready_trader_one.messages import *
+
+
+def make_stream(count: int, seed: int) -> bytes:
+    """Return a stream of randomly chosen insert, amend and cancel messages."""
+    rng = random.Random(seed)
+    message = bytearray(INSERT_MESSAGE_SIZE)
+    parts: List[bytes] = list()
+    for i in range(count):
+        choice = rng.random()
+        if choice < 0.5:
+            HEADER.pack_into(message, 0, INSERT_MESSAGE_SIZE, MessageType.INSERT_ORDER)
+            INSERT_MESSAGE.pack_into(message, HEADER_SIZE, i, rng.randint(0, 1), rng.randint(9900, 10100) * 100,
+                                     rng.randint(1, 50), 1)
+            parts.append(bytes(message[:INSERT_MESSAGE_SIZE]))
+        elif choice < 0.75:
+            HEADER.pack_into(message, 0, AMEND_MESSAGE_SIZE, MessageType.AMEND_ORDER)
+            AMEND_MESSAGE.pack_into(message, HEADER_SIZE, i, rng.randint(1, 50))
+            parts.append(bytes(message[:AMEND_MESSAGE_SIZE]))
+        else:
+            HEADER.pack_into(message, 0, CANCEL_MESSAGE_SIZE, MessageType.CANCEL_ORDER)
+            CANCEL_MESSAGE.pack_into(message, HEADER_SIZE, i)
+            parts.append(bytes(message[:CANCEL_MESSAGE_SIZE]))
+    return b"".join(parts)
+
+
+def make_chunks(stream: bytes, max_chunk_size: int, seed: int) -> List[bytes]:
+    """Split a stream into chunks of random size."""
+    rng = random.Random(seed)
+    chunks: List[bytes] = list()
+    start = 0
+    while start < len(stream):
+        end = start + rng.randint(1, max_chunk_size)
+        chunks.append(stream[start:end])
+        start = end
+    return chunks
+
+
+def parse(data, upto: int, end: int) -> (int, int):
+    """Unpack the complete messages in data[upto:end] and return the new position and a checksum."""
+    checksum = 0
+    while upto < end - HEADER_SIZE:
+        length, typ = HEADER.unpack_from(data, upto)
+        if upto + length > end:
+            break
+        if typ == MessageType.INSERT_ORDER:
+            checksum += INSERT_MESSAGE.unpack_from(data, upto + HEADER_SIZE)[0]
+        elif typ == MessageType.AMEND_ORDER:
+            checksum += AMEND_MESSAGE.unpack_from(data, upto + HEADER_SIZE)[0]
+        else:
+            checksum += CANCEL_MESSAGE.unpack_from(data, upto + HEADER_SIZE)[0]
+        upto += length
+    return upto, checksum
+
+
+def concat(chunks: List[bytes]) -> int:
+    """Frame the chunks by concatenating and slicing bytes objects."""
+    data = b""
+    total = 0
+    for chunk in chunks:
+        if data:
+            data += chunk
+        else:
+            data = chunk
+        upto, checksum = parse(data, 0, len(data))
+        total += checksum
+        data = data[upto:]
+    return total
+
+
+def append(chunks: List[bytes]) -> int:
+    """Frame the chunks by appending them to a receive buffer."""
+    buffer = ReceiveBuffer()
+    total = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        upto, checksum = parse(buffer.data, buffer.start, buffer.end)
+        total += checksum
+        buffer.consume(upto)
+    return total
+
+
+def get_buffer(chunks: List[bytes]) -> int:
+    """Frame the chunks by writing them into the free space of a receive buffer, as recv_into would."""
+    buffer = ReceiveBuffer()
+    total = 0
+    for chunk in chunks:
+        size = len(chunk)
+        buffer.get_buffer(size)[:size] = chunk
+        buffer.buffer_updated(size)
+        upto, checksum = parse(buffer.data, buffer.start, buffer.end)
+        total += checksum
+        buffer.consume(upto)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark message framing.")
+    parser.add_argument("--capture", help="file containing a captured stream of messages to replay")
+    parser.add_argument("--count", type=int, default=500000, help="messages generated if no capture is given")
+    args = parser.parse_args()
+
+    if args.capture:
+        with open(args.capture, "rb") as capture:
+            stream = capture.read()
+    else:
+        stream = make_stream(args.count, 42)
+
+    for max_chunk_size in (16, 1460, 65536):
+        chunks = make_chunks(stream, max_chunk_size, 42)
+        print("%d bytes in %d chunks of up to %d bytes" % (len(stream), len(chunks), max_chunk_size))
+        results = set()
+        for name, framer in (("concat", concat), ("append", append), ("get_buffer", get_buffer)):
+            start = time.perf_counter()
+            results.add(framer(chunks))
+            elapsed = time.perf_counter() - start
+            print("  %-10s %6.1f MB/s" % (name, len(stream) / elapsed / 1e6))
+        if len(results) != 1:
+            print("  framers disagree!")
+
+
+if __name__ == "__main__":
+    main()
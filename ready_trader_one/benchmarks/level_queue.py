@@ -0,0 +1,127 @@
+"""Compare the memory use and latency of linked price levels with the old deque-based levels.
+
+The old levels kept cancelled orders in their queue (with zero remaining
+volume) until they reached the front of the queue during matching. This
+benchmark places many orders at one passive price level, cancels most of
+them and then trades through the level.
+
+Run from the directory containing run.py:
+
+    python -m benchmarks.level_queue
+"""
+import argparse
+import collections
+import random
+import time
+import tracemalloc
+
+from typing import Deque, List, Tuple
+
+from ready_trader_one.order_book import Level, Order
+from ready_trader_one.types import Instrument, Lifespan, Side
+
+
+class DequeLevel(object):
+    """A price level that marks cancelled orders with zero volume instead of removing them."""
+    __slots__ = ("order_queue", "total_volume")
+
+    def __init__(self):
+        """Initialise a new instance of the DequeLevel class."""
+        self.order_queue: Deque[Order] = collections.deque()
+        self.total_volume: int = 0
+
+    def append(self, order: Order) -> None:
+        """Add an order to the back of this level."""
+        self.order_queue.append(order)
+        self.total_volume += order.remaining_volume
+
+    def cancel(self, order: Order) -> None:
+        """Cancel an order in this level."""
+        self.total_volume -= order.remaining_volume
+        order.remaining_volume = 0
+
+    def trade(self, volume: int) -> None:
+        """Trade the specified volume against the orders in this level."""
+        order_queue = self.order_queue
+        while volume > 0 and self.total_volume > 0:
+            while order_queue[0].remaining_volume == 0:
+                order_queue.popleft()
+            passive = order_queue[0]
+            traded = volume if volume < passive.remaining_volume else passive.remaining_volume
+            passive.remaining_volume -= traded
+            self.total_volume -= traded
+            volume -= traded
+
+
+class LinkedLevel(Level):
+    """A price level that removes cancelled orders immediately."""
+    __slots__ = ()
+
+    def cancel(self, order: Order) -> None:
+        """Cancel an order in this level."""
+        self.total_volume -= order.remaining_volume
+        order.remaining_volume = 0
+        self.remove(order)
+
+    def trade(self, volume: int) -> None:
+        """Trade the specified volume against the orders in this level."""
+        while volume > 0 and self.total_volume > 0:
+            passive = self.first_order
+            traded = volume if volume < passive.remaining_volume else passive.remaining_volume
+            passive.remaining_volume -= traded
+            self.total_volume -= traded
+            volume -= traded
+            if passive.remaining_volume == 0:
+                self.remove(passive)
+
+
+def populate(level_type: type, count: int, cancel_ratio: float, seed: int) -> Tuple[Level, float]:
+    """Place orders at a new level, cancel some of them and return the level and the time taken."""
+    rng = random.Random(seed)
+    orders: List[Order] = [Order(i, Instrument.ETF, Lifespan.GOOD_FOR_DAY, Side.BUY, 10000, rng.randint(1, 10))
+                           for i in range(count)]
+    cancels = rng.sample(orders, int(count * cancel_ratio))
+
+    level = level_type()
+    start = time.perf_counter()
+    for order in orders:
+        level.append(order)
+    for order in cancels:
+        level.cancel(order)
+    return level, time.perf_counter() - start
+
+
+def retained_memory(level_type: type, count: int, cancel_ratio: float, seed: int) -> int:
+    """Return the number of bytes still held by a level after its orders are placed and cancelled."""
+    tracemalloc.start()
+    level, _ = populate(level_type, count, cancel_ratio, seed)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return retained
+
+
+def latency(level_type: type, count: int, cancel_ratio: float, seed: int) -> Tuple[float, float]:
+    """Return the time taken to place and cancel orders at a level and then to trade through it."""
+    level, update_time = populate(level_type, count, cancel_ratio, seed)
+    start = time.perf_counter()
+    while level.total_volume > 0:
+        level.trade(5)
+    return update_time, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark deque-based and linked price levels.")
+    parser.add_argument("--count", type=int, default=500000, help="orders placed at the level (default: 500000)")
+    parser.add_argument("--cancel-ratio", type=float, default=0.95, help="fraction of orders cancelled")
+    args = parser.parse_args()
+
+    print("%d orders placed at one level, %.0f%% cancelled" % (args.count, args.cancel_ratio * 100.0))
+    for name, level_type in (("deque", DequeLevel), ("linked", LinkedLevel)):
+        retained = retained_memory(level_type, args.count, args.cancel_ratio, 42)
+        update_time, trade_time = latency(level_type, args.count, args.cancel_ratio, 42)
+        print("%-6s retained: %7.1f MiB  insert+cancel: %6.1f ms  trade through: %6.1f ms"
+              % (name, retained / 2.0 ** 20, update_time * 1e3, trade_time * 1e3))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Compare the CPU time taken to read CSV and compiled market data files.
+
+Run from the directory containing run.py:
+
+    python compile_market_data.py data/day1.csv data/day1.bin
+    python -m benchmarks.market_data data/day1.csv data/day1.bin
+"""
+import argparse
+import asyncio
+import queue
+import time
+
+from ready_trader_one.market_events import MarketEvents
+from ready_trader_one.order_book import OrderBook
+from ready_trader_one.types import Instrument
+
+
+def read(filename: str, compiled: bool) -> (int, float):
+    """Run a market events reader over a file and return the number of events and the CPU time taken."""
+    loop = asyncio.new_event_loop()
+    market_events = MarketEvents(filename, loop, None, OrderBook(Instrument.FUTURE, None, 0.0, 0.0),
+                                 OrderBook(Instrument.ETF, None, 0.0, 0.0), None)
+    market_events.queue = queue.Queue()
+
+    start = time.process_time()
+    if compiled:
+        market_events.compiled_reader(open(filename, "rb"))
+    else:
+        market_events.reader(open(filename))
+    elapsed = time.process_time() - start
+
+    loop.close()
+    return sum(len(batch) for batch in market_events.queue.queue) - 1, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark market data readers.")
+    parser.add_argument("csv_file", help="market data CSV file")
+    parser.add_argument("compiled_file", help="the same market data compiled with compile_market_data.py")
+    args = parser.parse_args()
+
+    for name, filename, compiled in (("csv", args.csv_file, False), ("compiled", args.compiled_file, True)):
+        count, elapsed = read(filename, compiled)
+        print("%-8s %d events in %.3f s CPU (%.2f us/event)" % (name, count, elapsed, elapsed / count * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Compare the insert and cancel throughput of the order book implementations.
+
+Run from the directory containing run.py:
+
+    python -m benchmarks.order_book data/day1.csv
+"""
+import argparse
+import csv
+import random
+import time
+
+from typing import Callable, Dict, List, Tuple
+
+from ready_trader_one.ladder_book import LadderOrderBook
+from ready_trader_one.order_book import IOrderListener, ITradeListener, Order, OrderBook
+from ready_trader_one.types import Instrument, Lifespan, Side
+
+ENGINES = {
+    "List": lambda instrument, tick_size: OrderBook(instrument, ITradeListener(), -0.0001, 0.0002),
+    "Ladder": lambda instrument, tick_size: LadderOrderBook(instrument, ITradeListener(), -0.0001, 0.0002, tick_size),
+}
+
+
+class OrderTracker(IOrderListener):
+    """Keep track of the orders resting in an order book."""
+
+    def __init__(self):
+        """Initialise a new instance of the OrderTracker class."""
+        self.orders: Dict[int, Order] = dict()
+
+    def on_order_amended(self, now: float, order: Order, volume_removed: int) -> None:
+        """Called when the order is amended."""
+        if order.remaining_volume == 0:
+            del self.orders[order.client_order_id]
+
+    def on_order_cancelled(self, now: float, order: Order, volume_removed: int) -> None:
+        """Called when the order is cancelled."""
+        self.orders.pop(order.client_order_id, None)
+
+    def on_order_placed(self, now: float, order: Order) -> None:
+        """Called when a good-for-day order is placed in the order book."""
+        self.orders[order.client_order_id] = order
+
+    def on_order_filled(self, now: float, order: Order, price: int, volume: int, fee: int) -> None:
+        """Called when the order is partially or completely filled."""
+        if order.remaining_volume == 0:
+            self.orders.pop(order.client_order_id, None)
+
+
+def load_market_data(filename: str) -> List[Tuple]:
+    """Return the events in a market data file as a list of tuples."""
+    operations = {"Amend": 0, "Cancel": 1, "Insert": 2}
+    lifespans = {"FAK": Lifespan.FILL_AND_KILL, "GFD": Lifespan.GOOD_FOR_DAY}
+    sides = {"A": Side.SELL, "B": Side.BUY}
+    with open(filename) as market_data:
+        csv_reader = csv.reader(market_data)
+        next(csv_reader)
+        return [(float(row[0]), int(row[1]), operations[row[2]], int(row[3]), sides.get(row[4]),
+                 int(float(row[5])) if row[5] else 0, int(float(row[6]) * 100) if row[6] else 0, lifespans.get(row[7]))
+                for row in csv_reader]
+
+
+def replay(events: List[Tuple], make_book: Callable, tick_size: float) -> Dict[int, Tuple[int, float]]:
+    """Replay market events and return the count and total time for each operation."""
+    trackers = (OrderTracker(), OrderTracker())
+    books = (make_book(Instrument.FUTURE, tick_size), make_book(Instrument.ETF, tick_size))
+    counts = [0, 0, 0]
+    times = [0.0, 0.0, 0.0]
+    clock = time.perf_counter
+
+    for now, instrument, operation, order_id, side, volume, price, lifespan in events:
+        book = books[instrument]
+        orders = trackers[instrument].orders
+        if operation == 2:
+            order = Order(order_id, Instrument(instrument), lifespan, side, price, volume, trackers[instrument])
+            start = clock()
+            book.insert(now, order)
+        elif order_id in orders:
+            order = orders[order_id]
+            if operation == 1:
+                start = clock()
+                book.cancel(now, order)
+            elif volume < 0:
+                start = clock()
+                book.amend(now, order, order.volume + volume)
+            else:
+                continue
+        else:
+            continue
+        times[operation] += clock() - start
+        counts[operation] += 1
+
+    return {op: (counts[op], times[op]) for op in range(3)}
+
+
+def deep_book(make_book: Callable, tick_size: float, depth: int, count: int) -> Tuple[float, float]:
+    """Return the time taken to insert and cancel orders at random depths in a deep order book.
+
+    The book is seeded with a level at every other tick so that most of the
+    timed orders create a new level when inserted and remove it when
+    cancelled.
+    """
+    tick = int(tick_size * 100)
+    tracker = OrderTracker()
+    book = make_book(Instrument.ETF, tick_size)
+    rng = random.Random(42)
+    mid = 100000 * tick
+
+    order_id = 0
+    for i in range(1, depth + 1):
+        for side, price in ((Side.BUY, mid - 2 * i * tick), (Side.SELL, mid + 2 * i * tick)):
+            order_id += 1
+            book.insert(0.0, Order(order_id, Instrument.ETF, Lifespan.GOOD_FOR_DAY, side, price, 10, tracker))
+
+    orders = [Order(order_id + n, Instrument.ETF, Lifespan.GOOD_FOR_DAY, side,
+                    mid - (2 * rng.randint(1, depth) - 1) * tick if side == Side.BUY
+                    else mid + (2 * rng.randint(1, depth) - 1) * tick,
+                    1, tracker)
+              for n, side in enumerate(rng.choice((Side.BUY, Side.SELL)) for _ in range(count))]
+
+    start = time.perf_counter()
+    for order in orders:
+        book.insert(0.0, order)
+    insert_time = time.perf_counter() - start
+
+    rng.shuffle(orders)
+    start = time.perf_counter()
+    for order in orders:
+        book.cancel(0.0, order)
+    cancel_time = time.perf_counter() - start
+
+    return insert_time, cancel_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the order book implementations.")
+    parser.add_argument("market_data", help="market data file to replay (e.g. data/day1.csv)")
+    parser.add_argument("--tick-size", type=float, default=1.0, help="tick size (default: 1.0)")
+    parser.add_argument("--depth", type=int, default=2000, help="levels per side in the deep book (default: 2000)")
+    parser.add_argument("--count", type=int, default=200000, help="orders inserted into the deep book")
+    args = parser.parse_args()
+
+    events = load_market_data(args.market_data)
+    print("replaying %d market events from %s" % (len(events), args.market_data))
+    for name, make_book in ENGINES.items():
+        results = replay(events, make_book, args.tick_size)
+        print("%-7s" % name, "  ".join("%s: %8.0f ops/s" % (op, count / elapsed if elapsed else 0.0)
+                                       for op, (count, elapsed) in zip(("amend", "cancel", "insert"),
+                                                                        results.values())))
+
+    print("deep book with %d levels per side and %d orders" % (args.depth, args.count))
+    for name, make_book in ENGINES.items():
+        insert_time, cancel_time = deep_book(make_book, args.tick_size, args.depth, args.count)
+        print("%-7s insert: %8.0f ops/s  cancel: %8.0f ops/s" % (name, args.count / insert_time,
+                                                                  args.count / cancel_time))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Compare the publish-to-callback latency of the UDP and shared memory information feeds.
+
+A subscriber process runs an event loop with a datagram protocol that
+records the time at which each order book message reaches its
+datagram_received callback. The publisher sends order book messages at a
+steady rate, recording the time just before each is sent, either over a UDP
+socket on the loopback interface or through a SharedMemoryPublisher. The
+shared memory feed is measured with the subscriber polling on every
+iteration of its event loop and polling on a timer.
+
+Both processes read time.perf_counter_ns, which on Linux is the system-wide
+monotonic clock, so times taken in different processes can be compared.
+
+Run from the directory containing run.py:
+
+    python -m benchmarks.shared_feed
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import time
+
+from typing import List, Optional, Tuple
+
+from ready_trader_one.latency import LatencyHistogram, clock_ns
+from ready_trader_one.messages import *
+from ready_trader_one.shared_feed import SharedMemoryPublisher, SharedMemorySubscriber, is_shared_feed_available
+
+UDP_ADDRESS = ("127.0.0.1", 12399)
+
+
+class Recorder(asyncio.DatagramProtocol):
+    """Record the time at which each order book message is received."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, count: int):
+        self.count: int = count
+        self.loop: asyncio.AbstractEventLoop = loop
+        self.times: List[Tuple[int, int]] = list()
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        now = clock_ns()
+        _, sequence_number = ORDER_BOOK_HEADER.unpack_from(data, HEADER_SIZE)
+        self.times.append((sequence_number, now))
+        if sequence_number == self.count - 1:
+            self.loop.stop()
+
+
+def subscribe(feed: str, name: str, interval: float, count: int, connection) -> None:
+    """Receive messages from a feed and send the receive times back through the connection."""
+    loop = asyncio.new_event_loop()
+    recorder = Recorder(loop, count)
+    if feed == "udp":
+        loop.run_until_complete(loop.create_datagram_endpoint(lambda: recorder, local_addr=UDP_ADDRESS))
+    else:
+        SharedMemorySubscriber(name, recorder).start(loop, interval)
+    loop.call_later(60.0, loop.stop)
+    connection.send("ready")
+    loop.run_forever()
+    connection.send(recorder.times)
+
+
+def publish(feed: str, name: str, interval: float, count: int, gap: float) -> LatencyHistogram:
+    """Publish count order book messages, gap seconds apart, and return a histogram of their latencies."""
+    publisher: Optional[SharedMemoryPublisher] = SharedMemoryPublisher(name) if feed != "udp" else None
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM) if feed == "udp" else None
+
+    parent, child = multiprocessing.Pipe()
+    subscriber = multiprocessing.Process(target=subscribe, args=(feed, name, interval, count, child))
+    subscriber.start()
+    parent.recv()
+
+    message = bytearray(ORDER_BOOK_MESSAGE_SIZE)
+    HEADER.pack_into(message, 0, ORDER_BOOK_MESSAGE_SIZE, MessageType.ORDER_BOOK_UPDATE)
+    sent: List[int] = [0] * count
+    for i in range(count):
+        # Sleep rather than spin so that a busy-polling subscriber is not starved of CPU on small machines
+        time.sleep(gap)
+        ORDER_BOOK_HEADER.pack_into(message, HEADER_SIZE, 0, i)
+        sent[i] = clock_ns()
+        if sock is not None:
+            sock.sendto(message, UDP_ADDRESS)
+        else:
+            publisher.publish(message)
+
+    times = parent.recv()
+    subscriber.join()
+    if publisher is not None:
+        publisher.close()
+    if sock is not None:
+        sock.close()
+
+    histogram = LatencyHistogram(feed if feed == "udp" else "%s (poll interval %gs)" % (feed, interval))
+    for sequence_number, received in times:
+        histogram.record(received - sent[sequence_number])
+    return histogram
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the latency of the information feeds.")
+    parser.add_argument("--count", type=int, default=20000, help="number of messages to publish")
+    parser.add_argument("--gap", type=float, default=0.0002, help="seconds between messages")
+    args = parser.parse_args()
+
+    feeds = [("udp", 0.0)]
+    if is_shared_feed_available():
+        feeds += [("shm", 0.0), ("shm", 0.001)]
+
+    name = "rt1_benchmark_%d" % os.getpid()
+    for feed, interval in feeds:
+        histogram = publish(feed, name, interval, args.count, args.gap)
+        print(histogram.summary())
+        if histogram.count < args.count:
+            print("  %d messages were not received" % (args.count - histogram.count))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+import argparse
+
+from ready_trader_one.market_events import compile_market_data
+
+
+def main():
+    """Compile a market data CSV file into the binary format read by the simulator."""
+    parser = argparse.ArgumentParser(description="Compile a market data CSV file for faster loading.")
+    parser.add_argument("csv_file", help="market data CSV file (e.g. data/day1.csv)")
+    parser.add_argument("compiled_file", help="compiled market data file to create (e.g. data/day1.bin)")
+    args = parser.parse_args()
+
+    count = compile_market_data(args.csv_file, args.compiled_file)
+    print("compiled %d market events into '%s'" % (count, args.compiled_file))
+
+
+if __name__ == "__main__":
+    main()
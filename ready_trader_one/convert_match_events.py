@@ -0,0 +1,18 @@
+import argparse
+
+from ready_trader_one.match_events import convert_match_events
+
+
+def main():
+    """Convert a binary match events file into the CSV format."""
+    parser = argparse.ArgumentParser(description="Convert a binary match events file to CSV.")
+    parser.add_argument("binary_file", help="binary match events file (e.g. match_events.bin)")
+    parser.add_argument("csv_file", help="CSV file to create (e.g. match_events.csv)")
+    args = parser.parse_args()
+
+    count = convert_match_events(args.binary_file, args.csv_file)
+    print("converted %d match events into '%s'" % (count, args.csv_file))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,65 +1,183 @@
+from typing import List, Optional
+
 from .types import Instrument, Side
 
 # This is used by Optiver to track multiple accounts :)
 
+# The fields of each account, each of which is one column of the ledger
+ACCOUNT_FIELDS = ("account_balance", "buy_volume", "etf_position", "future_position", "max_drawdown", "max_profit",
+                  "profit_or_loss", "sell_volume", "total_fees")
+
+# The number of accounts for which room is made when a ledger is created
+LEDGER_INITIAL_CAPACITY = 8
 
-class CompetitorAccount(object):
-    """A competitors account."""
+
+class AccountLedger(object):
+    """The accounts of all the competitors in a match, stored as one list per field.
+
+    Each competitor's account is a row in the ledger so that every account
+    can be marked to market in one call per timer tick, with the clamped ETF
+    price computed only once. The lists are allocated ahead of the accounts
+    and doubled in length when they are full.
+    """
 
     def __init__(self, tick_size: float, etf_clamp: float):
-        """Initialise a new instance of the CompetitorAccount class."""
-        # everything starts at 0 pretty much
-        self.account_balance: int = 0
-        self.buy_volume: int = 0
+        """Initialise a new instance of the AccountLedger class."""
+        self.account_balance: List[int] = [0] * LEDGER_INITIAL_CAPACITY
+        self.buy_volume: List[int] = [0] * LEDGER_INITIAL_CAPACITY
+        self.count: int = 0
         self.etf_clamp: float = etf_clamp
-        self.etf_position: int = 0
-        self.future_position: int = 0
-        self.max_drawdown: int = 0
-        self.max_profit: int = 0
-        self.profit_or_loss: int = 0
-        self.sell_volume: int = 0
+        self.etf_position: List[int] = [0] * LEDGER_INITIAL_CAPACITY
+        self.future_position: List[int] = [0] * LEDGER_INITIAL_CAPACITY
+        self.max_drawdown: List[int] = [0] * LEDGER_INITIAL_CAPACITY
+        self.max_profit: List[int] = [0] * LEDGER_INITIAL_CAPACITY
+        self.profit_or_loss: List[int] = [0] * LEDGER_INITIAL_CAPACITY
+        self.sell_volume: List[int] = [0] * LEDGER_INITIAL_CAPACITY
         self.tick_size: int = int(tick_size * 100.0)
-        self.total_fees: int = 0
+        self.total_fees: List[int] = [0] * LEDGER_INITIAL_CAPACITY
+
+    def __len__(self) -> int:
+        """Return the number of accounts in this ledger."""
+        return self.count
+
+    def add_account(self) -> int:
+        """Add an account to the ledger and return its index."""
+        index = self.count
+        if index == len(self.account_balance):
+            for field in ACCOUNT_FIELDS:
+                getattr(self, field).extend([0] * index)
+        self.count = index + 1
+        return index
+
+    def clamp_etf_price(self, future_price: int, etf_price: int) -> int:
+        """Return the ETF price clamped to within etf_clamp of the future price."""
+        delta: int = round(self.etf_clamp * future_price)
+        # Make delta a multiple of tick size
+        delta -= delta % self.tick_size
+        min_price: int = future_price - delta
+        max_price: int = future_price + delta
+        # Set the price to be the etf price is its within bounds, otherwise the closest default price
+        return min_price if etf_price < min_price else max_price if etf_price > max_price else etf_price
+
+    def mark_to_market(self, future_price: int, etf_price: int, index: Optional[int] = None) -> None:
+        """Mark the account with the specified index, or every account, to market using the specified prices."""
+        clamped: int = self.clamp_etf_price(future_price, etf_price)
+        indices = range(self.count) if index is None else (index,)
+        balances = self.account_balance
+        future_positions = self.future_position
+        etf_positions = self.etf_position
+        profits = self.profit_or_loss
+        max_profits = self.max_profit
+        max_drawdowns = self.max_drawdown
+        for i in indices:
+            # Set the profit or loss of the account using this formula
+            profit_or_loss = balances[i] + future_positions[i] * future_price + etf_positions[i] * clamped
+            profits[i] = profit_or_loss
+            if profit_or_loss > max_profits[i]:
+                max_profits[i] = profit_or_loss
+            if max_profits[i] - profit_or_loss > max_drawdowns[i]:
+                max_drawdowns[i] = max_profits[i] - profit_or_loss
+
+
+class CompetitorAccount(object):
+    """A competitors account.
+
+    The account is a read-only view of one row of an AccountLedger, which
+    is updated by transact and mark_to_market. If no ledger is given, the
+    account has a ledger of its own.
+    """
+    __slots__ = ("index", "ledger")
+
+    def __init__(self, tick_size: float, etf_clamp: float, ledger: Optional[AccountLedger] = None):
+        """Initialise a new instance of the CompetitorAccount class."""
+        # everything starts at 0 pretty much
+        self.ledger: AccountLedger = ledger if ledger is not None else AccountLedger(tick_size, etf_clamp)
+        self.index: int = self.ledger.add_account()
+
+    @property
+    def account_balance(self) -> int:
+        """The account balance in cents."""
+        return self.ledger.account_balance[self.index]
+
+    @property
+    def buy_volume(self) -> int:
+        """The total volume of ETF bought."""
+        return self.ledger.buy_volume[self.index]
+
+    @property
+    def etf_position(self) -> int:
+        """The ETF position."""
+        return self.ledger.etf_position[self.index]
+
+    @property
+    def future_position(self) -> int:
+        """The future position."""
+        return self.ledger.future_position[self.index]
+
+    @property
+    def max_drawdown(self) -> int:
+        """The largest fall in profit from its peak, in cents."""
+        return self.ledger.max_drawdown[self.index]
+
+    @property
+    def max_profit(self) -> int:
+        """The largest profit so far, in cents."""
+        return self.ledger.max_profit[self.index]
+
+    @property
+    def profit_or_loss(self) -> int:
+        """The profit or loss when last marked to market, in cents."""
+        return self.ledger.profit_or_loss[self.index]
+
+    @property
+    def sell_volume(self) -> int:
+        """The total volume of ETF sold."""
+        return self.ledger.sell_volume[self.index]
+
+    @property
+    def total_fees(self) -> int:
+        """The total fees paid in cents."""
+        return self.ledger.total_fees[self.index]
+
+    @property
+    def etf_clamp(self) -> float:
+        """The largest fraction by which the ETF price used to mark to market may differ from the future price."""
+        return self.ledger.etf_clamp
+
+    @property
+    def tick_size(self) -> int:
+        """The tick size in cents."""
+        return self.ledger.tick_size
 
     def transact(self, instrument: Instrument, side: Side, price: int, volume: int, fee: int) -> None:
         """Update this account with the specified transaction."""
+        ledger = self.ledger
+        i = self.index
+
         # We provide a request to transact with above info
         # Add or subtract the amount spent (P * V) then minus the fees
         if side == Side.SELL:
-            self.account_balance += price * volume
+            ledger.account_balance[i] += price * volume
         else:
-            self.account_balance -= price * volume
+            ledger.account_balance[i] -= price * volume
 
-        self.account_balance -= fee
-        self.total_fees += fee
+        ledger.account_balance[i] -= fee
+        ledger.total_fees[i] += fee
 
         # ! THIS LINE IS IMPORTANT!!!
         if instrument == Instrument.FUTURE:
             if side == Side.SELL:
-                self.future_position -= volume
+                ledger.future_position[i] -= volume
             else:
-                self.future_position += volume
+                ledger.future_position[i] += volume
         else:
             if side == Side.SELL:
-                self.sell_volume += volume
-                self.etf_position -= volume
+                ledger.sell_volume[i] += volume
+                ledger.etf_position[i] -= volume
             else:
-                self.buy_volume += volume
-                self.etf_position += volume
+                ledger.buy_volume[i] += volume
+                ledger.etf_position[i] += volume
 
     def mark_to_market(self, future_price: int, etf_price: int) -> None:
         """Mark this account to market using the specified prices."""
-        delta: int = round(self.etf_clamp * future_price)
-        # Make delta a multiple of tick size
-        delta -= delta % self.tick_size
-        min_price: int = future_price - delta
-        max_price: int = future_price + delta
-        # Set the price to be the etf price is its within bounds, otherwise the closest default price
-        clamped: int = min_price if etf_price < min_price else max_price if etf_price > max_price else etf_price
-        # Set the profit or loss of the account using this formula
-        self.profit_or_loss = self.account_balance + \
-            self.future_position * future_price + self.etf_position * clamped
-        if self.profit_or_loss > self.max_profit:
-            self.max_profit = self.profit_or_loss
-        if self.max_profit - self.profit_or_loss > self.max_drawdown:
-            self.max_drawdown = self.max_profit - self.profit_or_loss
+        self.ledger.mark_to_market(future_price, etf_price, self.index)
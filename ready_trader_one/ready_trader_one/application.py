@@ -5,7 +5,24 @@ import pathlib
 import signal
 import sys
 
-from typing import Callable, Optional
+from typing import Any, Callable, Dict, Optional
+
+# The format of the records in the log file
+LOG_FORMAT = "%(asctime)s [%(levelname)-7s] [%(name)s] %(message)s"
+
+
+def load_config(name: str, config_validator: Optional[Callable] = None) -> Optional[Dict[str, Any]]:
+    """Load and validate the JSON configuration file for the named application."""
+    config = None
+    config_path = pathlib.Path(name + ".json")
+    if config_path.exists():
+        with config_path.open("r") as config_file:
+            config = json.load(config_file)
+        if config_validator is not None and not config_validator(config):
+            raise Exception("configuration failed validation: %s" % config_path.resolve())
+    elif config_validator is not None:
+        raise Exception("configuration file does not exist: %s" % str(config_path))
+    return config
 
 
 class Application(object):
@@ -16,6 +33,7 @@ class Application(object):
         self.event_loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
         self.logger = logging.getLogger("APP")
         self.name: str = name
+        self.signalled: bool = False
 
         # Turn on debugging if you're having trouble with the event loop
         # self.event_loop.set_debug(True)
@@ -27,18 +45,9 @@ class Application(object):
             # Signal handlers are only implemented on Unix
             pass
 
-        logging.basicConfig(filename=name + ".log", format="%(asctime)s [%(levelname)-7s] [%(name)s] %(message)s",
-                            level=logging.INFO)
+        logging.basicConfig(filename=name + ".log", format=LOG_FORMAT, level=logging.INFO)
 
-        self.config = None
-        config_path = pathlib.Path(name + ".json")
-        if config_path.exists():
-            with config_path.open("r") as config:
-                self.config = json.load(config)
-            if config_validator is not None and not config_validator(self.config):
-                raise Exception("configuration failed validation: %s" % config_path.resolve())
-        elif config_validator is not None:
-            raise Exception("configuration file does not exist: %s" % str(config_path))
+        self.config = load_config(name, config_validator)
 
         self.logger.info("%s started with arguments={%s}", self.name, ", ".join(sys.argv))
         if self.config is not None:
@@ -48,14 +57,21 @@ class Application(object):
         """Called when a signal is received."""
         sig_name = "SIGINT" if signum == signal.SIGINT else "SIGTERM"
         self.logger.info("%s signal received - shutting down...", sig_name)
+        self.signalled = True
         self.event_loop.stop()
 
-    def run(self) -> None:
-        """Start the application's event loop."""
+    def run(self, until: Optional[Callable[[], bool]] = None) -> None:
+        """Start the application's event loop.
+
+        If 'until' is given, the event loop is restarted each time it stops
+        until either 'until' returns True or a signal is received.
+        """
         loop = self.event_loop
 
         try:
             loop.run_forever()
+            while until is not None and not until() and not self.signalled:
+                loop.run_forever()
         except Exception as e:
             self.logger.error("application raised an exception:", exc_info=e)
             raise
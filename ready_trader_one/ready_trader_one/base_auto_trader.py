@@ -2,16 +2,21 @@ import asyncio
 import logging
 import struct
 
-from typing import List, Optional, Text, Tuple, Union
+from typing import Dict, List, Optional, Text, Tuple, Union
 
+from .book_feed import ReconstructedBook
+from .framing import BufferedProtocol, ReceiveBuffer
 from .messages import *
+from .order_gateway import (MESSAGE_FREQUENCY_INTERVAL, MESSAGE_FREQUENCY_LIMIT, MESSAGE_FREQUENCY_MARGIN,
+                            OrderGateway)
+from .order_manager import ACTIVE_ORDER_COUNT_LIMIT, ACTIVE_VOLUME_LIMIT, POSITION_LIMIT, OrderManager
 from .order_book import TOP_LEVEL_COUNT
 from .types import Lifespan, Side
 
 BOOK_PART = struct.Struct("!%dI" % (TOP_LEVEL_COUNT,))
 
 
-class BaseAutoTrader(asyncio.Protocol, asyncio.DatagramProtocol):
+class BaseAutoTrader(BufferedProtocol, asyncio.DatagramProtocol):
     """Base class for an auto-trader."""
 
     def __init__(self, loop: asyncio.AbstractEventLoop):
@@ -20,11 +25,18 @@ class BaseAutoTrader(asyncio.Protocol, asyncio.DatagramProtocol):
         self.execution: Optional[asyncio.Transport] = None
         self.information: Optional[asyncio.DatagramTransport] = None
         self.logger = logging.getLogger("TRADER")
+        self.message_frequency_interval: float = MESSAGE_FREQUENCY_INTERVAL
+        self.message_frequency_limit: int = MESSAGE_FREQUENCY_LIMIT
+        self.message_frequency_margin: float = MESSAGE_FREQUENCY_MARGIN
+        self.order_books: Dict[int, ReconstructedBook] = dict()
+        self.order_gateway: Optional[OrderGateway] = None
+        self.order_manager: Optional[OrderManager] = None
+        self.trade_ticks: Dict[int, Tuple[int, int, Optional[List[Tuple[int, int]]]]] = dict()
         self.team_name: Optional[bytes] = None
         self.secret: Optional[bytes] = None
 
-        # Subclasses shouldn't try to read _data directly.
-        self._data: bytes = b""
+        # Subclasses shouldn't try to read _receive_buffer directly.
+        self._receive_buffer: ReceiveBuffer = ReceiveBuffer()
 
         self.amend_message: bytearray = bytearray(AMEND_MESSAGE_SIZE)
         self.cancel_message: bytearray = bytearray(CANCEL_MESSAGE_SIZE)
@@ -48,31 +60,50 @@ class BaseAutoTrader(asyncio.Protocol, asyncio.DatagramProtocol):
         self.execution = None
         self.event_loop.stop()
 
+    def buffer_updated(self, nbytes: int) -> None:
+        """Called when data from the matching engine has been written into the receive buffer."""
+        self._receive_buffer.buffer_updated(nbytes)
+        self._process_messages()
+
     def data_received(self, data: bytes) -> None:
         """Called when data is received from the matching engine."""
-        if self._data:
-            self._data += data
-        else:
-            self._data = data
-
-        upto = 0
-        while upto < len(self._data) - HEADER_SIZE:
-            length, typ = HEADER.unpack_from(self._data, upto)
-            if upto + length > len(self._data):
+        self._receive_buffer.append(data)
+        self._process_messages()
+
+    def get_buffer(self, size_hint: int) -> memoryview:
+        """Return a buffer into which data from the matching engine can be received."""
+        return self._receive_buffer.get_buffer(size_hint)
+
+    def _process_messages(self) -> None:
+        """Process the complete execution messages in the receive buffer."""
+        data = self._receive_buffer.data
+        upto = self._receive_buffer.start
+        end = self._receive_buffer.end
+        while upto < end - HEADER_SIZE:
+            length, typ = HEADER.unpack_from(data, upto)
+            if upto + length > end:
                 break
             if typ == MessageType.ERROR and length == ERROR_MESSAGE_SIZE:
-                client_order_id, error_message = ERROR_MESSAGE.unpack_from(self._data, upto + HEADER_SIZE)
-                self.on_error_message(client_order_id, error_message.rstrip(b"\x00"))
+                client_order_id, error_message = ERROR_MESSAGE.unpack_from(data, upto + HEADER_SIZE)
+                if self.order_gateway is not None:
+                    client_order_id = self.order_gateway.on_error(client_order_id)
+                self._on_error(client_order_id, error_message.rstrip(b"\x00"))
             elif typ == MessageType.ORDER_STATUS and length == ORDER_STATUS_MESSAGE_SIZE:
-                self.on_order_status_message(*ORDER_STATUS_MESSAGE.unpack_from(self._data, upto + HEADER_SIZE))
+                status = ORDER_STATUS_MESSAGE.unpack_from(data, upto + HEADER_SIZE)
+                if self.order_gateway is not None:
+                    status = self.order_gateway.on_order_status(*status)
+                self._on_order_status(*status)
             elif typ == MessageType.POSITION_CHANGE and length == POSITION_CHANGE_MESSAGE_SIZE:
-                self.on_position_change_message(*POSITION_CHANGE_MESSAGE.unpack_from(self._data, upto + HEADER_SIZE))
+                future_position, etf_position = POSITION_CHANGE_MESSAGE.unpack_from(data, upto + HEADER_SIZE)
+                if self.order_manager is not None:
+                    self.order_manager.on_position_change(future_position, etf_position)
+                self.on_position_change_message(future_position, etf_position)
             else:
                 self.logger.error("received invalid execution message: length=%d type=%d", length, typ)
                 self.event_loop.stop()
                 return
             upto += length
-        self._data = self._data[upto:]
+        self._receive_buffer.consume(upto)
 
     def datagram_received(self, data: Union[bytes, Text], addr: Tuple[str, int]) -> None:
         """Called when data is received from the matching engine."""
@@ -90,14 +121,109 @@ class BaseAutoTrader(asyncio.Protocol, asyncio.DatagramProtocol):
         if typ == MessageType.ORDER_BOOK_UPDATE and length == ORDER_BOOK_MESSAGE_SIZE:
             inst, seq = ORDER_BOOK_HEADER.unpack_from(data, HEADER_SIZE)
             self.on_order_book_update_message(inst, seq, *BOOK_PART.iter_unpack(data[ORDER_BOOK_HEADER_SIZE:]))
+        elif typ == MessageType.ORDER_BOOK_DELTA and (length - ORDER_BOOK_DELTA_HEADER_SIZE) \
+                % ORDER_BOOK_DELTA_ENTRY_SIZE == 0:
+            self._on_order_book_delta(data)
         elif typ == MessageType.TRADE_TICKS and (length - TRADE_TICKS_HEADER_SIZE) % TRADE_TICK_SIZE == 0:
             inst, = TRADE_TICKS_HEADER.unpack_from(data, HEADER_SIZE)
-            ticks = list(TRADE_TICK.iter_unpack(data[TRADE_TICKS_HEADER_SIZE:]))
-            self.on_trade_ticks_message(inst, ticks)
+            self.on_trade_ticks_message(inst, list(TRADE_TICK.iter_unpack(data[TRADE_TICKS_HEADER_SIZE:])))
+        elif typ == MessageType.TRADE_TICKS_PART and (length - TRADE_TICKS_PART_HEADER_SIZE) % TRADE_TICK_SIZE == 0:
+            self._on_trade_ticks_part(data)
         else:
             self.logger.error("received invalid information message: length=%d type=%d", length, typ)
             self.event_loop.stop()
 
+    def _on_error(self, client_order_id: int, error_message: bytes) -> None:
+        """Update the order manager, if there is one, and report an error."""
+        if self.order_manager is not None:
+            self.order_manager.on_error(client_order_id)
+        self.on_error_message(client_order_id, error_message)
+
+    def _on_order_status(self, client_order_id: int, fill_volume: int, remaining_volume: int, fees: int) -> None:
+        """Update the order manager, if there is one, and report an order status."""
+        if self.order_manager is not None:
+            self.order_manager.on_order_status(client_order_id, fill_volume, remaining_volume, fees)
+        self.on_order_status_message(client_order_id, fill_volume, remaining_volume, fees)
+
+    def _on_order_book_delta(self, data: Union[bytes, bytearray]) -> None:
+        """Apply an order book delta message to the reconstructed order book and report the book if it is in sync."""
+        inst, seq, feed_seq, flags, depth = ORDER_BOOK_DELTA_HEADER.unpack_from(data, HEADER_SIZE)
+        book = self.order_books.get(inst)
+        if book is None:
+            book = self.order_books[inst] = ReconstructedBook()
+
+        was_in_sync = book.in_sync
+        entries = ORDER_BOOK_DELTA_ENTRY.iter_unpack(memoryview(data)[ORDER_BOOK_DELTA_HEADER_SIZE:])
+        if book.apply(feed_seq, flags & ORDER_BOOK_DELTA_SNAPSHOT, depth, entries):
+            self.on_order_book_update_message(inst, seq, *book.levels())
+        elif was_in_sync:
+            self.logger.warning("missed an order book update, waiting for a snapshot: instrument=%d", inst)
+
+    def _on_trade_ticks_part(self, data: Union[bytes, bytearray]) -> None:
+        """Collect the parts of a trade ticks part message and report the trade ticks once every part has arrived."""
+        inst, seq, part, parts = TRADE_TICKS_PART_HEADER.unpack_from(data, HEADER_SIZE)
+        ticks = list(TRADE_TICK.iter_unpack(memoryview(data)[TRADE_TICKS_PART_HEADER_SIZE:]))
+        if parts == 1:
+            self.on_trade_ticks_message(inst, ticks)
+            return
+
+        # Pending trade ticks are kept as the sequence number, the last part received and the ticks so far (or
+        # None if a part has been missed, in which case the rest of the message is ignored)
+        if part == 0:
+            pending = self.trade_ticks[inst] = (seq, 0, ticks)
+        else:
+            pending = self.trade_ticks.get(inst)
+            if pending is None or pending[0] != seq or pending[1] != part - 1:
+                self.trade_ticks[inst] = (seq, part, None)
+                if pending is None or pending[0] != seq or pending[2] is not None:
+                    self.logger.warning("missed part of a trade ticks message: instrument=%d sequence=%d", inst, seq)
+                return
+            pending = self.trade_ticks[inst] = (seq, part, pending[2])
+            if pending[2] is None:
+                return
+            pending[2].extend(ticks)
+
+        if part == parts - 1:
+            del self.trade_ticks[inst]
+            self.on_trade_ticks_message(inst, pending[2])
+
+    def enable_order_gateway(self, limit: Optional[int] = None, interval: Optional[float] = None,
+                             margin: Optional[float] = None) -> OrderGateway:
+        """Send all order requests through an order gateway that keeps them within the message frequency limit.
+
+        This should be called from the auto-trader's constructor, before any
+        orders are sent. Requests that would breach the limit are queued (and
+        combined where possible) and sent as soon as it is safe to do so. See
+        the OrderGateway class for details.
+
+        The limit, interval and margin default to those given to
+        set_message_frequency_limit, or else to the limit of a matching engine
+        running at a speed of one. The interval and margin are measured by
+        the event loop clock (see message_frequency_interval).
+        """
+        self.order_gateway = OrderGateway(self.event_loop, self,
+                                          self.message_frequency_limit if limit is None else limit,
+                                          self.message_frequency_interval if interval is None else interval,
+                                          self.message_frequency_margin if margin is None else margin)
+        return self.order_gateway
+
+    def enable_order_manager(self, order_count_limit: int = ACTIVE_ORDER_COUNT_LIMIT,
+                             active_volume_limit: int = ACTIVE_VOLUME_LIMIT,
+                             position_limit: int = POSITION_LIMIT) -> OrderManager:
+        """Keep track of this auto-trader's orders in an order manager.
+
+        This should be called from the auto-trader's constructor, before any
+        orders are sent, with the limits in the exchange configuration. The
+        order manager is kept up to date as orders are sent and messages are
+        received, and can be asked whether a new order would be within the
+        limits (see the OrderManager class). While it is enabled, amends and
+        cancels that would have no effect are not sent, and inserts that
+        would breach the active order count or volume limits are reported
+        as errors without being sent.
+        """
+        self.order_manager = OrderManager(order_count_limit, active_volume_limit, position_limit)
+        return self.order_manager
+
     def on_position_change_message(self, future_position: int, etf_position: int) -> None:
         """Called when your position changes.
 
@@ -117,6 +243,11 @@ class BaseAutoTrader(asyncio.Protocol, asyncio.DatagramProtocol):
         The sequence number can be used to detect missed messages. The best
         available ask (i.e. sell) and bid (i.e. buy) prices are reported along
         with the volume available at each of those price levels.
+
+        If the matching engine sends an incremental order book feed, the
+        order book is rebuilt from it and reported here with as many levels
+        as the feed carries; nothing is reported between a missed update and
+        the next full snapshot.
         """
         pass
 
@@ -135,7 +266,9 @@ class BaseAutoTrader(asyncio.Protocol, asyncio.DatagramProtocol):
         """Called periodically to report trading activity on the market.
 
         Each trade tick is a pair containing a price and the volume traded at
-        that price level since the last trade ticks message.
+        that price level since the last trade ticks message. If there are too
+        many trade ticks for one datagram, the matching engine sends them in
+        several parts which are put back together before this is called.
         """
         pass
 
@@ -147,9 +280,12 @@ class BaseAutoTrader(asyncio.Protocol, asyncio.DatagramProtocol):
         cancelled this request has no effect and no order status message will
         be received.
         """
-        if self.execution:
-            AMEND_MESSAGE.pack_into(self.amend_message, HEADER_SIZE, client_order_id, volume)
-            self.execution.write(self.amend_message)
+        if self.order_manager is not None and not self.order_manager.on_amend(client_order_id, volume):
+            return
+        if self.order_gateway is not None:
+            self.order_gateway.amend(client_order_id, volume)
+        else:
+            self._write_amend_order(client_order_id, volume)
 
     def send_cancel_order(self, client_order_id: int) -> None:
         """Cancel the specified order.
@@ -157,15 +293,39 @@ class BaseAutoTrader(asyncio.Protocol, asyncio.DatagramProtocol):
         If the order has already completely filled or been cancelled this
         request has no effect and no order status message will be received.
         """
-        if self.execution:
-            CANCEL_MESSAGE.pack_into(self.cancel_message, HEADER_SIZE, client_order_id)
-            self.execution.write(self.cancel_message)
+        if self.order_manager is not None and not self.order_manager.on_cancel(client_order_id):
+            return
+        if self.order_gateway is not None:
+            self.order_gateway.cancel(client_order_id)
+        else:
+            self._write_cancel_order(client_order_id)
 
     def send_insert_order(self, client_order_id: int, side: Side, price: int, volume: int, lifespan: Lifespan) -> None:
         """Insert a new order into the market."""
-        if self.execution:
-            INSERT_MESSAGE.pack_into(self.insert_message, HEADER_SIZE, client_order_id, side, price, volume, lifespan)
-            self.execution.write(self.insert_message)
+        if self.order_manager is not None:
+            error = self.order_manager.insert_error(volume)
+            if error is not None:
+                self.event_loop.call_soon(self._on_error, client_order_id, error)
+                return
+            self.order_manager.on_insert(client_order_id, side, price, volume, lifespan)
+        if self.order_gateway is not None:
+            self.order_gateway.insert(client_order_id, side, price, volume, lifespan)
+        else:
+            self._write_insert_order(client_order_id, side, price, volume, lifespan)
+
+    def set_message_frequency_limit(self, limit: int, interval: float,
+                                    margin: float = MESSAGE_FREQUENCY_MARGIN) -> None:
+        """Set the matching engine's message frequency limit, with the interval measured by the event loop clock.
+
+        The exchange calls this before connecting an auto-trader in the same
+        process, so that the order gateway (if there is one) uses the limit
+        the matching engine will enforce at its configured speed.
+        """
+        self.message_frequency_interval = interval
+        self.message_frequency_limit = limit
+        self.message_frequency_margin = margin
+        if self.order_gateway is not None:
+            self.order_gateway.set_limit(limit, interval, margin)
 
     def set_team_name(self, team_name: str, secret: str) -> None:
         """Set the team name for this auto-trader"""
@@ -178,3 +338,24 @@ class BaseAutoTrader(asyncio.Protocol, asyncio.DatagramProtocol):
         self.information = information
         self.execution.write(HEADER.pack(LOGIN_MESSAGE_SIZE, MessageType.LOGIN)
                              + LOGIN_MESSAGE.pack(self.team_name, self.secret))
+        if self.order_gateway is not None:
+            self.order_gateway.record_message()
+
+    def _write_amend_order(self, client_order_id: int, volume: int) -> None:
+        """Write an amend order message to the matching engine."""
+        if self.execution:
+            AMEND_MESSAGE.pack_into(self.amend_message, HEADER_SIZE, client_order_id, volume)
+            self.execution.write(self.amend_message)
+
+    def _write_cancel_order(self, client_order_id: int) -> None:
+        """Write a cancel order message to the matching engine."""
+        if self.execution:
+            CANCEL_MESSAGE.pack_into(self.cancel_message, HEADER_SIZE, client_order_id)
+            self.execution.write(self.cancel_message)
+
+    def _write_insert_order(self, client_order_id: int, side: Side, price: int, volume: int,
+                            lifespan: Lifespan) -> None:
+        """Write an insert order message to the matching engine."""
+        if self.execution:
+            INSERT_MESSAGE.pack_into(self.insert_message, HEADER_SIZE, client_order_id, side, price, volume, lifespan)
+            self.execution.write(self.insert_message)
@@ -0,0 +1,159 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .messages import ORDER_BOOK_DELTA_ENTRY, ORDER_BOOK_DELTA_ENTRY_SIZE
+from .types import Side
+
+# The number of order book updates between full snapshots in an incremental order book feed
+SNAPSHOT_INTERVAL = 20
+
+
+def _write_changes(message: bytearray, offset: int, side: Side, old_prices: List[int], old_volumes: List[int],
+                   new_prices: List[int], new_volumes: List[int]) -> int:
+    """Write an entry for each level that differs between two sides of a book and return the offset after them.
+
+    The prices on each side are in order from best to worst, padded with
+    zeros, so the two sides can be compared in a single pass.
+    """
+    pack_into = ORDER_BOOK_DELTA_ENTRY.pack_into
+    ascending = side == Side.SELL
+    count = len(new_prices)
+    i = j = 0
+    while True:
+        old = old_prices[i] if i < count else 0
+        new = new_prices[j] if j < count else 0
+        if old == new:
+            if old == 0:
+                return offset
+            if old_volumes[i] != new_volumes[j]:
+                pack_into(message, offset, side, new, new_volumes[j])
+                offset += ORDER_BOOK_DELTA_ENTRY_SIZE
+            i += 1
+            j += 1
+        elif new == 0 or (old != 0 and (old < new if ascending else old > new)):
+            # The old level has gone (or moved beyond the feed depth)
+            pack_into(message, offset, side, old, 0)
+            offset += ORDER_BOOK_DELTA_ENTRY_SIZE
+            i += 1
+        else:
+            pack_into(message, offset, side, new, new_volumes[j])
+            offset += ORDER_BOOK_DELTA_ENTRY_SIZE
+            j += 1
+
+
+def _write_levels(message: bytearray, offset: int, side: Side, prices: List[int], volumes: List[int]) -> int:
+    """Write an entry for each level on one side of a book and return the offset after them."""
+    pack_into = ORDER_BOOK_DELTA_ENTRY.pack_into
+    for price, volume in zip(prices, volumes):
+        if price == 0:
+            break
+        pack_into(message, offset, side, price, volume)
+        offset += ORDER_BOOK_DELTA_ENTRY_SIZE
+    return offset
+
+
+class BookDeltaEncoder(object):
+    """Write the changes to an order book since it was last sent.
+
+    The encoder remembers the levels it last sent for one instrument. Each
+    update carries only the levels whose volume has changed, with a volume
+    of zero for levels that have gone (or have moved beyond the feed depth).
+    Every snapshot_interval updates, or whenever a snapshot would be smaller
+    than the changes, the whole book is sent instead so that receivers that
+    have missed an update can recover.
+
+    The levels are kept in two sets of lists, for the last update and the
+    next, which swap places after each update, and the entries are written
+    straight into the message buffer, so nothing is allocated per update.
+    """
+
+    def __init__(self, depth: int, snapshot_interval: int = SNAPSHOT_INTERVAL):
+        """Initialise a new instance of the BookDeltaEncoder class."""
+        self.depth: int = depth
+        self.feed_sequence_number: int = 0
+        self.levels: Tuple[List[int], List[int], List[int], List[int]] = ([0] * depth, [0] * depth, [0] * depth,
+                                                                          [0] * depth)
+        self.next_levels: Tuple[List[int], List[int], List[int], List[int]] = ([0] * depth, [0] * depth,
+                                                                               [0] * depth, [0] * depth)
+        self.snapshot_interval: int = snapshot_interval
+        self.updates_until_snapshot: int = 0
+
+    def encode(self, book, message: bytearray, offset: int) -> Tuple[int, bool, int]:
+        """Write the entries for the next update of the book into the message at the specified offset.
+
+        The book must provide fill_depth (see OrderBook.fill_depth). Returns
+        the feed sequence number, whether the update is a snapshot and the
+        offset just after the entries. The message must have room for four
+        entries per level of depth, as every level may have changed.
+        """
+        old_ask_prices, old_ask_volumes, old_bid_prices, old_bid_volumes = self.levels
+        levels = ask_prices, ask_volumes, bid_prices, bid_volumes = self.next_levels
+        book.fill_depth(*levels)
+
+        end = offset
+        snapshot = self.updates_until_snapshot == 0
+        if not snapshot:
+            end = _write_changes(message, end, Side.SELL, old_ask_prices, old_ask_volumes, ask_prices, ask_volumes)
+            end = _write_changes(message, end, Side.BUY, old_bid_prices, old_bid_volumes, bid_prices, bid_volumes)
+            level_count = self.depth * 2 - ask_prices.count(0) - bid_prices.count(0)
+            snapshot = end - offset > level_count * ORDER_BOOK_DELTA_ENTRY_SIZE
+
+        if snapshot:
+            end = _write_levels(message, offset, Side.SELL, ask_prices, ask_volumes)
+            end = _write_levels(message, end, Side.BUY, bid_prices, bid_volumes)
+            self.updates_until_snapshot = self.snapshot_interval
+
+        self.levels, self.next_levels = levels, self.levels
+        self.feed_sequence_number += 1
+        self.updates_until_snapshot -= 1
+        return self.feed_sequence_number, snapshot, end
+
+
+class ReconstructedBook(object):
+    """An order book rebuilt from an incremental order book feed.
+
+    Updates must be applied in feed sequence number order. If an update is
+    missed the book is marked as out of sync and further updates are ignored
+    until the next snapshot arrives.
+    """
+
+    def __init__(self):
+        """Initialise a new instance of the ReconstructedBook class."""
+        self.asks: Dict[int, int] = dict()
+        self.bids: Dict[int, int] = dict()
+        self.depth: int = 0
+        self.feed_sequence_number: Optional[int] = None
+        self.in_sync: bool = False
+
+    def apply(self, feed_sequence_number: int, snapshot: bool, depth: int,
+              entries: Iterable[Tuple[int, int, int]]) -> bool:
+        """Apply an update to the book and return True if the book is now in sync."""
+        if snapshot:
+            self.asks.clear()
+            self.bids.clear()
+            self.in_sync = True
+        elif self.feed_sequence_number is None or feed_sequence_number != self.feed_sequence_number + 1:
+            self.in_sync = False
+
+        self.depth = depth
+        self.feed_sequence_number = feed_sequence_number
+        if not self.in_sync:
+            return False
+
+        for side, price, volume in entries:
+            levels = self.asks if side == Side.SELL else self.bids
+            if volume:
+                levels[price] = volume
+            else:
+                levels.pop(price, None)
+        return True
+
+    def levels(self) -> Tuple[List[int], List[int], List[int], List[int]]:
+        """Return the ask prices, ask volumes, bid prices and bid volumes, padded with zeros to the feed depth."""
+        depth = self.depth
+        padding = [0] * depth
+        ask_prices = sorted(self.asks)[:depth]
+        bid_prices = sorted(self.bids, reverse=True)[:depth]
+        ask_volumes = [self.asks[p] for p in ask_prices]
+        bid_volumes = [self.bids[p] for p in bid_prices]
+        return (ask_prices + padding[len(ask_prices):], ask_volumes + padding[len(ask_volumes):],
+                bid_prices + padding[len(bid_prices):], bid_volumes + padding[len(bid_volumes):])
@@ -199,8 +199,7 @@ class Competitor(ICompetitor, IOrderListener):
         self.etf_book.insert(now, order)
 
     def on_timer_tick(self, now: float, future_price: int, etf_price: int) -> None:
-        """Called on each timer tick to update the auto-trader."""
-        self.account.mark_to_market(future_price or 0, etf_price or 0)
+        """Called on each timer tick, after the account has been marked to market, to update the auto-trader."""
         self.match_events.tick(now, self.name, self.account, future_price, etf_price)
 
     def send_error(self, now: float, client_order_id: int, message: bytes) -> None:
@@ -2,22 +2,29 @@ import asyncio
 import collections
 import logging
 import socket
+import sys
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
-from .account import CompetitorAccount
+from .account import AccountLedger, CompetitorAccount
+from .book_feed import SNAPSHOT_INTERVAL
 from .competitor import Competitor
 from .execution import ExecutionChannel
 from .information import InformationChannel
+from .ladder_book import LadderOrderBook
+from .latency import LatencyRecorder
 from .limiter import FrequencyLimiter
+from .loopback import LoopbackDatagramTransport, LoopbackTransport
 from .market_events import MarketEvents
-from .match_events import MatchEvents
-from .order_book import ITradeListener, OrderBook, TopLevels
+from .match_events import MatchEvents, RecordingPolicy
+from .order_book import ITradeListener, OrderBook, TOP_LEVEL_COUNT
+from .shared_feed import SharedMemoryPublisher
 from .types import ICompetitor, IController, IExecutionChannel, ITaskListener, Instrument
 from .util import create_datagram_endpoint
+from .virtual_clock import VirtualClockEventLoop
 
 
-# The delay between starting the server and opening the market
+# The longest time to wait, after starting the server, for every auto-trader to log in before opening the market
 MARKET_OPEN_DELAY_SECONDS = 20.0
 
 
@@ -28,26 +35,68 @@ class Controller(IController, ITradeListener, ITaskListener):
         """Initialise a new instance of the Controller class."""
         self.competitors: Dict[str, Competitor] = dict()
         self.competitor_count: int = 0
+        self.complete: bool = False
         self.config: Dict[str, Any] = config
         self.done: bool = False
-        self.etf_book: OrderBook = OrderBook(Instrument.ETF, self, config["Fees"]["Maker"], config["Fees"]["Taker"])
+        self.etf_book: OrderBook = self.create_order_book(Instrument.ETF, config["Fees"]["Maker"],
+                                                          config["Fees"]["Taker"])
         self.etf_trade_ticks: Dict[int, int] = collections.defaultdict(lambda: 0)
         self.event_loop: asyncio.AbstractEventLoop = loop
-        self.future_book: OrderBook = OrderBook(Instrument.FUTURE, self, 0.0, 0.0)
+        self.future_book: OrderBook = self.create_order_book(Instrument.FUTURE, 0.0, 0.0)
         self.future_trade_ticks: Dict[int, int] = collections.defaultdict(lambda: 0)
+        self.latency: Optional[LatencyRecorder] = None
+        self.ledger: AccountLedger = AccountLedger(config["Instrument"]["TickSize"], config["Instrument"]["EtfClamp"])
         self.logger: logging.Logger = logging.getLogger("CONTROLLER")
+        self.market_events_timer: Optional[asyncio.TimerHandle] = None
+        self.market_events_timer_time: float = 0.0
         self.start_time: float = 0.0
+        self.traders_ready: Optional[asyncio.Event] = None
 
         info = config["Information"]
-        self.info_channel: InformationChannel = InformationChannel((info["Host"], info["Port"]))
+        self.info_channel: InformationChannel = InformationChannel((info["Host"], info["Port"]),
+                                                                   info.get("OrderBookDepth", TOP_LEVEL_COUNT),
+                                                                   info.get("SnapshotInterval", SNAPSHOT_INTERVAL))
+        if "SharedMemoryName" in info:
+            self.info_channel.publisher = SharedMemoryPublisher(info["SharedMemoryName"],
+                                                                replace_existing=info.get("SharedMemoryReplace", False))
+        if info.get("OrderBookFeed", "Snapshot") == "Delta":
+            self.send_order_book = self.info_channel.send_order_book_delta
+        else:
+            self.send_order_book = self.info_channel.send_top_levels
 
         engine = config["Engine"]
         self.market_events: MarketEvents = MarketEvents(engine["MarketDataFile"], loop, self, self.future_book,
                                                         self.etf_book, self)
-        self.match_events: MatchEvents = MatchEvents(engine["MatchEventsFile"], loop, self)
+
+        # With a virtual clock, waiting for the market data reader keeps the match deterministic
+        self.market_events.wait_for_reader = isinstance(loop, VirtualClockEventLoop)
+        self.match_events: MatchEvents = MatchEvents(engine["MatchEventsFile"], loop, self,
+                                                     RecordingPolicy.from_config(engine))
         self.speed: float = engine["Speed"]
         self.tick_interval: float = engine["TickInterval"] / engine["Speed"]
 
+        if "LatencyFile" in engine:
+            self.latency = LatencyRecorder(engine["LatencyFile"])
+            self.latency.instrument(self.future_book, "insert", "future_book.insert")
+            self.latency.instrument(self.etf_book, "insert", "etf_book.insert")
+            self.latency.instrument(self.market_events, "process_market_events", "process_market_events")
+            self.latency.instrument(self, "on_timer_tick", "on_timer_tick")
+
+    def connect_in_process(self, protocol: asyncio.Protocol) -> Tuple[LoopbackTransport, LoopbackDatagramTransport]:
+        """Connect an auto-trader running in this event loop and return its execution and information transports.
+
+        The match must have been started with in_process set.
+        """
+        _, execution = LoopbackTransport.connect(self.event_loop, self.on_new_connection(), protocol)
+        self.info_channel.transport.add_receiver(protocol)
+        return execution, LoopbackDatagramTransport(self.event_loop, protocol)
+
+    def create_order_book(self, instrument: Instrument, maker_fee: float, taker_fee: float) -> OrderBook:
+        """Return a new order book using the order book type specified in the configuration."""
+        if self.config["Engine"].get("OrderBook", "List") == "Ladder":
+            return LadderOrderBook(instrument, self, maker_fee, taker_fee, self.config["Instrument"]["TickSize"])
+        return OrderBook(instrument, self, maker_fee, taker_fee)
+
     def get_competitor(self, name: str, secret: str, exec_channel: IExecutionChannel) -> Optional[ICompetitor]:
         """Return the competitor object for this match."""
         if name in self.competitors or name not in self.config["Traders"] or self.config["Traders"][name] != secret:
@@ -56,13 +105,15 @@ class Controller(IController, ITradeListener, ITaskListener):
         instrument = self.config["Instrument"]
         limits = self.config["Limits"]
 
-        account = CompetitorAccount(instrument["TickSize"], instrument["EtfClamp"])
+        account = CompetitorAccount(instrument["TickSize"], instrument["EtfClamp"], self.ledger)
         competitor = Competitor(name, self, exec_channel, self.future_book, self.etf_book, account, self.match_events,
                                 limits["PositionLimit"], limits["ActiveOrderCountLimit"], limits["ActiveVolumeLimit"],
                                 instrument["TickSize"])
         self.competitors[name] = competitor
 
         self.logger.info("'%s' is ready!", name)
+        if self.traders_ready is not None and len(self.competitors) == len(self.config["Traders"]):
+            self.traders_ready.set()
 
         if self.start_time != 0.0:
             self.logger.warning("competitor logged in after market open: name='%s'", name)
@@ -78,6 +129,16 @@ class Controller(IController, ITradeListener, ITaskListener):
         """Called when a client disconnects."""
         self.competitor_count -= 1
 
+    def on_market_events_timer(self) -> None:
+        """Called when it is time to process the next market event."""
+        self.market_events_timer = None
+        try:
+            self.market_events.process_market_events((self.event_loop.time() - self.start_time) * self.speed)
+            self.schedule_market_events()
+        except Exception as e:
+            self.logger.error("exception in on_market_events_timer:", exc_info=e)
+            self.shutdown("exception in on_market_events_timer")
+
     def on_new_connection(self) -> ExecutionChannel:
         """Called when a new connection is received on the server."""
         self.competitor_count += 1
@@ -85,11 +146,13 @@ class Controller(IController, ITradeListener, ITaskListener):
         limits = self.config["Limits"]
         frequency_limiter = FrequencyLimiter(limits["MessageFrequencyInterval"] / engine["Speed"],
                                              limits["MessageFrequencyLimit"])
-        return ExecutionChannel(self.event_loop, self, self.market_events, frequency_limiter, engine["Speed"])
+        return ExecutionChannel(self.event_loop, self, self.market_events, frequency_limiter, engine["Speed"],
+                                self.latency)
 
     def on_task_complete(self, task) -> None:
         """Called when the match events writer task is complete"""
         if task is self.match_events:
+            self.complete = True
             self.event_loop.stop()
 
     def on_timer_tick(self, tick_time: float, sequence_number: int) -> None:
@@ -103,8 +166,14 @@ class Controller(IController, ITradeListener, ITaskListener):
 
             elapsed: float = (now - self.start_time) * self.speed
             self.market_events.process_market_events(elapsed)
-            for comp in self.competitors.values():
-                comp.on_timer_tick(elapsed, self.future_book.last_traded_price(), self.etf_book.last_traded_price())
+            self.schedule_market_events()
+            future_price: int = self.future_book.last_traded_price()
+            etf_price: int = self.etf_book.last_traded_price()
+            self.ledger.mark_to_market(future_price or 0, etf_price or 0)
+            if self.match_events.records_ticks:
+                for comp in self.competitors.values():
+                    comp.on_timer_tick(elapsed, future_price, etf_price)
+            self.match_events.flush()
 
             if self.done:
                 self.shutdown("match complete")
@@ -116,11 +185,9 @@ class Controller(IController, ITradeListener, ITaskListener):
 
             for inst, book, ticks in ((Instrument.FUTURE, self.future_book, self.future_trade_ticks),
                                       (Instrument.ETF, self.etf_book, self.etf_trade_ticks)):
-                top: TopLevels = book.top_levels()
-                self.info_channel.send_order_book_update(inst, sequence_number, top.ask_prices, top.ask_volumes,
-                                                         top.bid_prices, top.bid_volumes)
+                self.send_order_book(inst, sequence_number, book)
                 if ticks:
-                    self.info_channel.send_trade_ticks(inst, ticks.items())
+                    self.info_channel.send_trade_ticks(inst, sequence_number, ticks.items())
                     ticks.clear()
 
             tick_time += self.tick_interval + self.tick_interval * skipped_ticks
@@ -136,37 +203,93 @@ class Controller(IController, ITradeListener, ITaskListener):
         else:
             self.etf_trade_ticks[price] += volume
 
+    def schedule_market_events(self) -> None:
+        """Arrange for on_market_events_timer to be called when the next market event is due.
+
+        Market events are processed when the elapsed time is later than
+        their time, so the timer is set for just after the event. If the
+        time of the next event is not yet known, events are processed on the
+        next timer tick or auto-trader message instead.
+        """
+        next_event_time: float = self.market_events.next_event_time
+        if next_event_time in (float("inf"), float("-inf")):
+            when = 0.0
+        else:
+            when = self.start_time + next_event_time / self.speed
+            while (when - self.start_time) * self.speed <= next_event_time:
+                when += when * sys.float_info.epsilon
+
+        if self.market_events_timer is not None:
+            if when == self.market_events_timer_time:
+                return
+            self.market_events_timer.cancel()
+            self.market_events_timer = None
+        if when:
+            self.market_events_timer = self.event_loop.call_at(when, self.on_market_events_timer)
+            self.market_events_timer_time = when
+
     def shutdown(self, reason: str) -> None:
         """Shut down the match."""
         elapsed = (self.event_loop.time() - self.start_time) * self.speed
         self.logger.info("shutting down the match: time=%.6f reason='%s'", elapsed, reason)
+        if self.market_events_timer is not None:
+            self.market_events_timer.cancel()
+            self.market_events_timer = None
         for competitor in self.competitors.values():
             competitor.disconnect()
         self.match_events.finish()
-
-    async def start(self) -> None:
-        """Start running the match."""
+        if self.latency is not None:
+            self.latency.dump()
+        if self.info_channel.publisher is not None:
+            self.info_channel.publisher.close()
+            self.info_channel.publisher = None
+
+    async def start(self, in_process: bool = False, ready=None) -> None:
+        """Start running the match.
+
+        If in_process is set, no sockets are opened and auto-traders must be
+        connected using connect_in_process. If ready is given, its set method
+        is called once auto-traders can connect (it may be, for example, a
+        multiprocessing Event). The market opens as soon as every auto-trader
+        in the configuration has logged in, or after MARKET_OPEN_DELAY_SECONDS
+        if some of them have not.
+        """
         self.logger.info("starting the match")
-
-        host = self.config["Execution"]["ListenAddress"]
-        port = self.config["Execution"]["Port"]
-        server = await self.event_loop.create_server(self.on_new_connection, host, port, family=socket.AF_INET)
-
-        info = self.config["Information"]
-        if info["AllowBroadcast"]:
-            await self.event_loop.create_datagram_endpoint(lambda: self.info_channel, family=socket.AF_INET,
-                                                           proto=socket.IPPROTO_UDP, allow_broadcast=True)
+        self.traders_ready = asyncio.Event()
+        if not self.config["Traders"]:
+            # There are no auto-traders to wait for
+            self.traders_ready.set()
+
+        if in_process:
+            server = None
+            LoopbackDatagramTransport(self.event_loop, self.info_channel)
         else:
-            await create_datagram_endpoint(self.event_loop, lambda: self.info_channel,
-                                           remote_addr=(info["Host"], info["Port"]), family=socket.AF_INET,
-                                           interface=info["Interface"])
+            host = self.config["Execution"]["ListenAddress"]
+            port = self.config["Execution"]["Port"]
+            server = await self.event_loop.create_server(self.on_new_connection, host, port, family=socket.AF_INET)
+
+            info = self.config["Information"]
+            if info["AllowBroadcast"]:
+                await self.event_loop.create_datagram_endpoint(lambda: self.info_channel, family=socket.AF_INET,
+                                                               proto=socket.IPPROTO_UDP, allow_broadcast=True)
+            else:
+                await create_datagram_endpoint(self.event_loop, lambda: self.info_channel,
+                                               remote_addr=(info["Host"], info["Port"]), family=socket.AF_INET,
+                                               interface=info["Interface"])
 
         self.market_events.start()
         self.match_events.start()
+        if ready is not None:
+            ready.set()
 
         # Give the auto-traders time to start up and connect
-        await asyncio.sleep(MARKET_OPEN_DELAY_SECONDS)
-        server.close()
+        try:
+            await asyncio.wait_for(self.traders_ready.wait(), MARKET_OPEN_DELAY_SECONDS)
+        except asyncio.TimeoutError:
+            missing = [name for name in self.config["Traders"] if name not in self.competitors]
+            self.logger.warning("opening the market without: %s", ", ".join("'%s'" % name for name in missing))
+        if server is not None:
+            server.close()
 
         self.logger.info("market open")
         self.start_time = self.event_loop.time()
@@ -1,9 +1,27 @@
 import asyncio
+import os
+import signal
 import socket
 import sys
 
-from .application import Application
+from typing import Any, Dict, Iterable, Mapping, Optional
+
+from . import trader
+from .account import CompetitorAccount
+from .application import Application, load_config
+from .base_auto_trader import BaseAutoTrader
+from .book_feed import SNAPSHOT_INTERVAL
 from .controller import Controller
+from .information import MAX_BOOK_DEPTH
+from .match_events import OPERATIONS
+from .messages import TEAM_NAME_SIZE
+from .order_book import TOP_LEVEL_COUNT
+from .order_gateway import MESSAGE_FREQUENCY_MARGIN, message_frequency_interval
+from .shared_feed import is_shared_feed_available
+from .virtual_clock import VirtualClockEventLoop
+
+# The delay between starting the exchange and starting the auto-traders in a simulation
+TRADER_START_DELAY_SECONDS = 0.5
 
 # From Python 3.8, the proactor event loop is used by default on Windows
 if sys.platform == "win32" and hasattr(asyncio, "WindowsSelectorEventLoopPolicy"):
@@ -36,9 +54,42 @@ def __exchange_config_validator(config):
 
     __validate_object(config, "Engine", ("MarketDataFile", "MatchEventsFile", "Speed", "TickInterval"),
                       (str, str, float, float))
+    if config["Engine"].get("OrderBook", "List") not in ("List", "Ladder"):
+        raise Exception("OrderBook in Engine configuration should be either \"List\" or \"Ladder\"")
+    if type(config["Engine"].get("LatencyFile", "")) is not str:
+        raise Exception("LatencyFile in Engine configuration should be a string")
+    operations = config["Engine"].get("RecordedOperations", OPERATIONS)
+    if type(operations) not in (list, tuple) or any(o not in OPERATIONS for o in operations):
+        raise Exception("RecordedOperations in Engine configuration should be a list of operation names")
+    tick_sampling = config["Engine"].get("TickSampling", 1)
+    if type(tick_sampling) is not int or tick_sampling < 1:
+        raise Exception("TickSampling in Engine configuration should be a positive integer")
+    if type(config["Engine"].get("TicksOnChangeOnly", False)) is not bool:
+        raise Exception("TicksOnChangeOnly in Engine configuration should be either true or false")
     __validate_object(config, "Execution", ("ListenAddress", "Port"), (str, int))
     __validate_object(config, "Fees", ("Maker", "Taker"), (float, float))
     __validate_object(config, "Information", ("AllowBroadcast", "Host", "Interface", "Port"), (bool, str, str, int))
+    feed = config["Information"].get("OrderBookFeed", "Snapshot")
+    if feed not in ("Snapshot", "Delta"):
+        raise Exception("OrderBookFeed in Information configuration should be either \"Snapshot\" or \"Delta\"")
+    if feed == "Snapshot" and any(k in config["Information"] for k in ("OrderBookDepth", "SnapshotInterval")):
+        raise Exception("OrderBookDepth and SnapshotInterval in Information configuration require an OrderBookFeed "
+                        "of \"Delta\"")
+    depth = config["Information"].get("OrderBookDepth", TOP_LEVEL_COUNT)
+    if type(depth) is not int or not 1 <= depth <= MAX_BOOK_DEPTH:
+        raise Exception("OrderBookDepth in Information configuration should be an integer from 1 to %d"
+                        % MAX_BOOK_DEPTH)
+    snapshot_interval = config["Information"].get("SnapshotInterval", SNAPSHOT_INTERVAL)
+    if type(snapshot_interval) is not int or snapshot_interval < 1:
+        raise Exception("SnapshotInterval in Information configuration should be a positive integer")
+    if "SharedMemoryName" in config["Information"]:
+        if type(config["Information"]["SharedMemoryName"]) is not str:
+            raise Exception("SharedMemoryName in Information configuration should be a string")
+        if not is_shared_feed_available():
+            raise Exception("SharedMemoryName in Information configuration requires Python 3.8 or later on an "
+                            "x86 processor")
+    if type(config["Information"].get("SharedMemoryReplace", False)) is not bool:
+        raise Exception("SharedMemoryReplace in Information configuration should be either true or false")
     __validate_object(config, "Instrument", ("EtfClamp", "TickSize",), (float, float))
     __validate_object(config, "Limits", ("ActiveOrderCountLimit", "ActiveVolumeLimit", "MessageFrequencyInterval",
                                          "MessageFrequencyLimit", "PositionLimit"), (int, int, float, int, int))
@@ -57,8 +108,136 @@ def __exchange_config_validator(config):
     return True
 
 
-def main():
+def __add_latency_signal_handler(ctrl: Controller, loop: asyncio.AbstractEventLoop) -> None:
+    """Dump the latency histograms, if they are being recorded, when SIGUSR1 is received."""
+    if ctrl.latency is not None and hasattr(signal, "SIGUSR1"):
+        loop.add_signal_handler(signal.SIGUSR1, ctrl.latency.dump)
+
+
+def main(ready=None):
+    """Run the exchange, calling ready.set(), if ready is given, once auto-traders can connect."""
     app = Application("exchange", __exchange_config_validator)
     ctrl = Controller(app.config, app.event_loop)
-    app.event_loop.create_task(ctrl.start())
+    __add_latency_signal_handler(ctrl, app.event_loop)
+    app.event_loop.create_task(ctrl.start(ready=ready))
     app.run()
+
+
+def __connect_autotrader(ctrl: Controller, auto_trader: BaseAutoTrader, config: Dict[str, Any]) -> None:
+    """Connect an auto-trader to the exchange in this process, telling it the exchange's message frequency limit."""
+    limits = config["Limits"]
+    speed = config["Engine"]["Speed"]
+    auto_trader.set_message_frequency_limit(limits["MessageFrequencyLimit"],
+                                            message_frequency_interval(limits["MessageFrequencyInterval"], speed),
+                                            message_frequency_interval(MESSAGE_FREQUENCY_MARGIN, speed))
+    auto_trader.set_transports(*ctrl.connect_in_process(auto_trader))
+
+
+def simulate(trader_names: Iterable[str]) -> None:
+    """Run a match against the named auto-traders in this process using a virtual clock.
+
+    The exchange and the auto-traders share one event loop and talk to each
+    other over loopback transports rather than sockets. Market events,
+    timer ticks and auto-trader messages are ordered on a simulated timeline
+    and processed as quickly as possible, so that repeated runs with the same
+    inputs produce identical match events files.
+    """
+    asyncio.set_event_loop(VirtualClockEventLoop())
+    app = Application("exchange", __exchange_config_validator)
+    ctrl = Controller(app.config, app.event_loop)
+    __add_latency_signal_handler(ctrl, app.event_loop)
+    app.event_loop.create_task(ctrl.start(in_process=True))
+    for name in trader_names:
+        auto_trader = trader.create(name, app.event_loop)
+        app.event_loop.call_later(TRADER_START_DELAY_SECONDS, __connect_autotrader, ctrl, auto_trader, app.config)
+
+    # Auto-traders stop the event loop when they are disconnected, so keep
+    # running until all the match events have been written.
+    app.run(until=lambda: ctrl.complete)
+
+
+def backtest(trader_names: Iterable[str], market_data_file: Optional[str] = None,
+             match_events_file: Optional[str] = None,
+             parameters: Optional[Dict[str, Dict[str, Any]]] = None,
+             modules: Optional[Mapping[str, str]] = None,
+             failures: Optional[Dict[str, str]] = None) -> Dict[str, CompetitorAccount]:
+    """Run the named auto-traders against recorded market data in this process and return their accounts.
+
+    Like simulate, this runs the match on a virtual clock, but each
+    auto-trader uses its module name as its team name, so neither the
+    auto-traders' configuration files nor the "Traders" section of the
+    exchange configuration are needed. The other settings are read from the
+    exchange configuration file, except that the market data file can be
+    overridden and no match events are recorded unless a match events file
+    is given. The accounts returned give each auto-trader's final profit or
+    loss, maximum drawdown, positions, fees and volume traded.
+
+    As backtest is called many times by sweeps and tournaments, it runs the
+    match on an event loop of its own, leaving the current event loop,
+    logging and signal handlers alone; those are left to the caller.
+
+    If modules are given, modules[name] is the python module of the
+    auto-trader with that team name, so that several auto-traders can run
+    the same code. If parameters are given, parameters[name] is a dictionary of attributes
+    to set on the named auto-trader after it has been created; each
+    attribute must already have been set by the auto-trader's constructor.
+
+    If failures is given, an auto-trader that cannot be imported or created
+    is left out of the match and failures[name] is set to the reason,
+    instead of the exception being raised. Team names longer than a login
+    message allows are always refused.
+    """
+    trader_names = list(trader_names)
+    for name in trader_names:
+        if len(name.encode()) > TEAM_NAME_SIZE:
+            raise Exception("team name '%s' is longer than %d bytes" % (name, TEAM_NAME_SIZE))
+
+    config = load_config("exchange", __exchange_config_validator)
+    engine = config["Engine"]
+    if market_data_file is not None:
+        engine["MarketDataFile"] = market_data_file
+    if match_events_file is not None:
+        engine["MatchEventsFile"] = match_events_file
+    else:
+        engine["MatchEventsFile"] = os.devnull
+        engine["RecordedOperations"] = []
+
+    event_loop = VirtualClockEventLoop()
+    try:
+        # The auto-traders are created, and their parameters checked, before the match is set up
+        auto_traders = list()
+        for name in trader_names:
+            module = modules.get(name, name) if modules is not None else name
+            try:
+                auto_trader = trader.create(module, event_loop, {"TeamName": name, "Secret": name})
+            except Exception as e:
+                if failures is None:
+                    raise
+                failures[name] = "could not load auto-trader: %s" % e
+                continue
+            if parameters is not None and name in parameters:
+                for key, value in parameters[name].items():
+                    if not hasattr(auto_trader, key):
+                        raise Exception("auto-trader '%s' has no parameter '%s'" % (name, key))
+                    setattr(auto_trader, key, value)
+            auto_traders.append(auto_trader)
+        if not auto_traders:
+            return dict()
+        config["Traders"] = {name: name for name in trader_names if failures is None or name not in failures}
+
+        ctrl = Controller(config, event_loop)
+        event_loop.create_task(ctrl.start(in_process=True))
+        for auto_trader in auto_traders:
+            event_loop.call_later(TRADER_START_DELAY_SECONDS, __connect_autotrader, ctrl, auto_trader, config)
+
+        # Auto-traders stop the event loop when they are disconnected
+        event_loop.run_forever()
+        while not ctrl.complete:
+            event_loop.run_forever()
+    finally:
+        try:
+            event_loop.run_until_complete(event_loop.shutdown_asyncgens())
+        finally:
+            event_loop.close()
+
+    return {name: competitor.account for name, competitor in ctrl.competitors.items()}
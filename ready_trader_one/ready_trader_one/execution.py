@@ -1,34 +1,42 @@
 import asyncio
 import logging
 
-from typing import Optional
+from typing import Dict, Optional
 
 from .competitor import Competitor
+from .framing import BufferedProtocol, ReceiveBuffer
+from .latency import LatencyHistogram, LatencyRecorder, clock_ns
 from .limiter import FrequencyLimiter
 from .market_events import MarketEvents
 from .messages import *
 from .types import IExecutionChannel, IController
 
 
-class ExecutionChannel(asyncio.Protocol, IExecutionChannel):
+class ExecutionChannel(BufferedProtocol, IExecutionChannel):
     def __init__(self, loop: asyncio.AbstractEventLoop, controller: IController, market_events: MarketEvents,
-                 frequency_limiter: FrequencyLimiter, speed: float):
+                 frequency_limiter: FrequencyLimiter, speed: float, latency: Optional[LatencyRecorder] = None):
         """Initialise a new instance of the ExecutionChannel class."""
         self.competitor: Optional[Competitor] = None
         self.controller: IController = controller
         self.closing: bool = False
-        self.data: bytes = b""
         self.event_loop: asyncio.AbstractEventLoop = loop
         self.file_number: int = -1
         self.frequency_limiter: FrequencyLimiter = frequency_limiter
+        self.latency: Optional[Dict[int, LatencyHistogram]] = None
         self.logger: logging.Logger = logging.getLogger("EXECUTION")
         self.login_timeout: asyncio.Handle = loop.call_later(1.0, self.close)
         self.market_events: MarketEvents = market_events
         self.name: Optional[str] = None
+        self.receive_buffer: ReceiveBuffer = ReceiveBuffer()
         self.transport: Optional[asyncio.Transport] = None
         self.speed: float = speed
         self.start_time: float = 0.0
 
+        if latency is not None:
+            self.latency = {typ: latency.histogram("execution." + typ.name.lower())
+                            for typ in (MessageType.AMEND_ORDER, MessageType.CANCEL_ORDER, MessageType.INSERT_ORDER,
+                                        MessageType.LOGIN)}
+
         self.account_message: bytearray = bytearray(POSITION_CHANGE_MESSAGE_SIZE)
         self.error_message: bytearray = bytearray(ERROR_MESSAGE_SIZE)
         self.order_message: bytearray = bytearray(ORDER_STATUS_MESSAGE_SIZE)
@@ -67,27 +75,44 @@ class ExecutionChannel(asyncio.Protocol, IExecutionChannel):
             self.logger.warning("fd=%d lost connection to auto-trader at time=%.3f:", self.file_number, elapsed,
                                 exc_info=exc)
 
+    def buffer_updated(self, nbytes: int) -> None:
+        """Called when data from the auto-trader has been written into the receive buffer."""
+        self.receive_buffer.buffer_updated(nbytes)
+        self.process_messages()
+
     def data_received(self, data: bytes) -> None:
         """Called when data is received from the auto-trader."""
-        if self.data:
-            self.data += data
-        else:
-            self.data = data
-
-        elapsed: float = 0.0
-        upto: int = 0
-        data_length: int = len(self.data)
+        self.receive_buffer.append(data)
+        self.process_messages()
+
+    def get_buffer(self, size_hint: int) -> memoryview:
+        """Return a buffer into which data from the auto-trader can be received."""
+        return self.receive_buffer.get_buffer(size_hint)
+
+    def process_messages(self) -> None:
+        """Process the complete messages in the receive buffer.
+
+        All of the messages are treated as having arrived at the same time.
+        """
+        data: bytearray = self.receive_buffer.data
+        elapsed: float = (self.event_loop.time() - self.start_time) * self.speed if self.start_time else 0.0
+        market_events: MarketEvents = self.market_events
+        upto: int = self.receive_buffer.start
+        data_length: int = self.receive_buffer.end
         fileno: int = self.file_number
+        latency: Optional[Dict[int, LatencyHistogram]] = self.latency
         name: str = self.name
+        start: int = 0
 
         while not self.closing and upto < data_length - HEADER_SIZE:
-            length, typ = HEADER.unpack_from(self.data, upto)
+            length, typ = HEADER.unpack_from(data, upto)
             if upto + length > data_length:
                 break
 
-            if self.start_time:
-                elapsed: float = (self.event_loop.time() - self.start_time) * self.speed
-                self.market_events.process_market_events(elapsed)
+            # Market events are normally processed on time by the controller, but any that are due must be
+            # processed before this message
+            if elapsed > market_events.next_event_time:
+                market_events.process_market_events(elapsed)
 
             if self.frequency_limiter.check_event(elapsed):
                 self.logger.info("fd=%d message frequency limit breached: now=%.6f value=%d limit=%d",
@@ -103,34 +128,43 @@ class ExecutionChannel(asyncio.Protocol, IExecutionChannel):
                 self.close()
                 return
 
+            if latency is not None:
+                start = clock_ns()
+
             if typ == MessageType.AMEND_ORDER and length == AMEND_MESSAGE_SIZE:
-                coi, vol = AMEND_MESSAGE.unpack_from(self.data, upto + HEADER_SIZE)
+                coi, vol = AMEND_MESSAGE.unpack_from(data, upto + HEADER_SIZE)
                 self.logger.debug("fd=%d '%s' received amend: time=%.6f client_order_id=%d volume=%d", fileno,
                                   name, elapsed, coi, vol)
                 self.competitor.on_amend_message(elapsed, coi, vol)
             elif typ == MessageType.CANCEL_ORDER and length == CANCEL_MESSAGE_SIZE:
-                coi, = CANCEL_MESSAGE.unpack_from(self.data, upto + HEADER_SIZE)
+                coi, = CANCEL_MESSAGE.unpack_from(data, upto + HEADER_SIZE)
                 self.logger.debug("fd=%d '%s' received cancel: time=%.6f client_order_id=%d", fileno, name,
                                   elapsed, coi)
                 self.competitor.on_cancel_message(elapsed, coi)
             elif typ == MessageType.INSERT_ORDER and length == INSERT_MESSAGE_SIZE:
-                coi, side, prc, vol, life = INSERT_MESSAGE.unpack_from(self.data, upto + HEADER_SIZE)
+                coi, side, prc, vol, life = INSERT_MESSAGE.unpack_from(data, upto + HEADER_SIZE)
                 self.logger.debug("fd=%d '%s' received insert: time=%.6f client_order_id=%d side=%d price=%d"
                                   " volume=%d lifespan=%d", fileno, name, elapsed, coi, side, prc, vol, life)
                 self.competitor.on_insert_message(elapsed, coi, side, prc, vol, life)
             elif typ == MessageType.LOGIN and length == LOGIN_MESSAGE_SIZE:
-                raw_name, raw_secret = LOGIN_MESSAGE.unpack_from(self.data, upto + HEADER_SIZE)
+                raw_name, raw_secret = LOGIN_MESSAGE.unpack_from(data, upto + HEADER_SIZE)
                 self.on_login(raw_name.rstrip(b"\x00").decode(), raw_secret.rstrip(b"\x00").decode())
                 name = self.name
+                if self.start_time and not elapsed:
+                    # Logged in after the market opened
+                    elapsed = (self.event_loop.time() - self.start_time) * self.speed
             else:
                 self.logger.info("fd=%d '%s' received invalid message: time=%.6f length=%d type=%d", fileno, name,
                                  elapsed, length, typ)
                 self.close()
                 return
 
+            if latency is not None:
+                latency[typ].record(clock_ns() - start)
+
             upto += length
 
-        self.data = self.data[upto:]
+        self.receive_buffer.consume(upto)
 
     def on_login(self, name: str, secret: str) -> None:
         """Called when a login message is received."""
@@ -0,0 +1,69 @@
+import asyncio
+
+from typing import Union
+
+# The initial size of a receive buffer and the least free space offered to a transport
+RECEIVE_BUFFER_SIZE = 65536
+RECEIVE_BUFFER_MINIMUM_FREE = 4096
+
+# From Python 3.7, stream transports can read straight into a protocol's
+# buffer. Protocols built on this class also implement data_received so that
+# they work with older versions and with transports that don't support it.
+BufferedProtocol = getattr(asyncio, "BufferedProtocol", asyncio.Protocol)
+
+
+class ReceiveBuffer(object):
+    """A reusable buffer in which messages received on a stream are framed.
+
+    Received bytes are placed after any partial message left over from the
+    previous read and complete messages are unpacked in place (using
+    unpack_from), so nothing is allocated or sliced for each read. The bytes
+    between start and end have been received but not yet consumed.
+    """
+    __slots__ = ("data", "end", "start")
+
+    def __init__(self, size: int = RECEIVE_BUFFER_SIZE):
+        """Initialise a new instance of the ReceiveBuffer class."""
+        self.data: bytearray = bytearray(size)
+        self.end: int = 0
+        self.start: int = 0
+
+    def append(self, data: Union[bytes, bytearray, memoryview]) -> None:
+        """Copy received bytes into the buffer."""
+        size = len(data)
+        if len(self.data) - self.end < size:
+            self.make_room(size)
+        self.data[self.end:self.end + size] = data
+        self.end += size
+
+    def buffer_updated(self, nbytes: int) -> None:
+        """Called when nbytes have been written into the buffer returned by get_buffer."""
+        self.end += nbytes
+
+    def consume(self, upto: int) -> None:
+        """Discard the bytes before position upto, which have been processed."""
+        if upto == self.end:
+            self.start = self.end = 0
+        else:
+            self.start = upto
+
+    def get_buffer(self, size_hint: int = -1) -> memoryview:
+        """Return a writable view of the free space at the end of the buffer."""
+        size = size_hint if size_hint > RECEIVE_BUFFER_MINIMUM_FREE else RECEIVE_BUFFER_MINIMUM_FREE
+        if len(self.data) - self.end < size:
+            self.make_room(size)
+        return memoryview(self.data)[self.end:]
+
+    def make_room(self, size: int) -> None:
+        """Make at least size bytes available at the end of the buffer.
+
+        Any partial message is moved to the front of the buffer and the
+        buffer is only enlarged if that doesn't free enough space.
+        """
+        pending = self.end - self.start
+        if self.start:
+            self.data[:pending] = self.data[self.start:self.end]
+            self.start = 0
+            self.end = pending
+        if len(self.data) - pending < size:
+            self.data.extend(bytes(max(size, len(self.data))))
@@ -1,18 +1,43 @@
 import asyncio
 import logging
-from typing import ItemsView, Iterator, List, Optional, Tuple
+from typing import Dict, ItemsView, Iterator, Optional, Tuple, Union
 
+from .book_feed import BookDeltaEncoder, SNAPSHOT_INTERVAL
 from .messages import *
+from .order_book import OrderBook, TOP_LEVEL_COUNT
+from .shared_feed import SharedMemoryPublisher
 
 
 MAX_DATAGRAM_SIZE = 508
+
+# Trade ticks that fit in one datagram are sent in a trade ticks message; any more are sent in the parts of a
+# trade ticks part message
 MAX_TRADE_TICKS = (MAX_DATAGRAM_SIZE - TRADE_TICKS_HEADER_SIZE) // TRADE_TICK_SIZE
+MAX_TRADE_TICKS_PER_PART = (MAX_DATAGRAM_SIZE - TRADE_TICKS_PART_HEADER_SIZE) // TRADE_TICK_SIZE
+MAX_TRADE_TICKS_PARTS = 255
+
+# A snapshot of both sides of the order book must fit in one datagram
+MAX_BOOK_DELTA_ENTRIES = (MAX_DATAGRAM_SIZE - ORDER_BOOK_DELTA_HEADER_SIZE) // ORDER_BOOK_DELTA_ENTRY_SIZE
+MAX_BOOK_DEPTH = MAX_BOOK_DELTA_ENTRIES // 2
+
+# Before the encoder decides whether to send a snapshot instead, every level on each side may have been both
+# removed and replaced
+MAX_BOOK_DELTA_BUFFER_SIZE = ORDER_BOOK_DELTA_HEADER_SIZE + 4 * MAX_BOOK_DEPTH * ORDER_BOOK_DELTA_ENTRY_SIZE
 
 
 class InformationChannel(asyncio.DatagramProtocol):
-    def __init__(self, remote_address: Optional[Tuple[str, int]] = None):
-        """Initialize a new instance of the InformationChannel class."""
+    def __init__(self, remote_address: Optional[Tuple[str, int]] = None, book_depth: int = TOP_LEVEL_COUNT,
+                 snapshot_interval: int = SNAPSHOT_INTERVAL, publisher: Optional[SharedMemoryPublisher] = None):
+        """Initialize a new instance of the InformationChannel class.
+
+        If a publisher is given, every message is also written to its shared
+        memory feed.
+        """
+        self.book_depth: int = book_depth
+        self.book_encoders: Dict[int, BookDeltaEncoder] = dict()
+        self.publisher: Optional[SharedMemoryPublisher] = publisher
         self.remote_address: Optional[Tuple[str, int]] = remote_address
+        self.snapshot_interval: int = snapshot_interval
         self.transport: Optional[asyncio.DatagramTransport] = None
 
         self.logger: logging.Logger = logging.getLogger("INFORMATION")
@@ -20,37 +45,83 @@ class InformationChannel(asyncio.DatagramProtocol):
         self.book_message = bytearray(ORDER_BOOK_MESSAGE_SIZE)
         HEADER.pack_into(self.book_message, 0, ORDER_BOOK_MESSAGE_SIZE, MessageType.ORDER_BOOK_UPDATE)
 
+        self.delta_message = bytearray(MAX_BOOK_DELTA_BUFFER_SIZE)
+        self.delta_view = memoryview(self.delta_message)
         self.ticks_message = bytearray(MAX_DATAGRAM_SIZE)
+        self.ticks_view = memoryview(self.ticks_message)
 
     def connection_made(self, transport: asyncio.BaseTransport) -> None:
         """Called when the datagram endpoint is created."""
         self.transport = transport
 
-    def send_order_book_update(self, instrument: int, sequence_number: int, ask_prices: List[int],
-                               ask_volumes: List[int], bid_prices: List[int], bid_volumes: List[int]) -> None:
-        """Send an order book update message to the auto-trader."""
+    def send(self, message: Union[bytes, bytearray]) -> None:
+        """Send a message to the auto-traders."""
+        self.transport.sendto(message, self.remote_address)
+        if self.publisher is not None:
+            self.publisher.publish(message)
+
+    def send_order_book_delta(self, instrument: int, sequence_number: int, book: OrderBook) -> None:
+        """Send an order book delta message containing the levels of the specified order book that have changed."""
+        encoder = self.book_encoders.get(instrument)
+        if encoder is None:
+            encoder = self.book_encoders[instrument] = BookDeltaEncoder(self.book_depth, self.snapshot_interval)
+
+        message = self.delta_message
+        feed_sequence_number, snapshot, size = encoder.encode(book, message, ORDER_BOOK_DELTA_HEADER_SIZE)
+        HEADER.pack_into(message, 0, size, MessageType.ORDER_BOOK_DELTA)
+        ORDER_BOOK_DELTA_HEADER.pack_into(message, HEADER_SIZE, instrument, sequence_number, feed_sequence_number,
+                                          ORDER_BOOK_DELTA_SNAPSHOT if snapshot else 0, self.book_depth)
+        self.send(self.delta_view[:size])
+
+    def send_top_levels(self, instrument: int, sequence_number: int, book: OrderBook) -> None:
+        """Send an order book update message containing the top levels of the specified order book.
+
+        The order book writes its top levels directly into the message buffer
+        (see BaseOrderBook.write_top_levels), so no intermediate lists are needed.
+        """
         ORDER_BOOK_HEADER.pack_into(self.book_message, HEADER_SIZE, instrument, sequence_number)
-        ORDER_BOOK_MESSAGE.pack_into(self.book_message, ORDER_BOOK_HEADER_SIZE, *ask_prices, *ask_volumes, *bid_prices,
-                                     *bid_volumes)
-        self.transport.sendto(self.book_message, self.remote_address)
-
-    def send_trade_ticks(self, instrument: int, trade_ticks: ItemsView[int, int]) -> None:
-        """Send a trade ticks message to the auto-trader."""
+        book.write_top_levels(self.book_message, ORDER_BOOK_HEADER_SIZE)
+        self.send(self.book_message)
+
+    def send_trade_ticks(self, instrument: int, sequence_number: int, trade_ticks: ItemsView[int, int]) -> None:
+        """Send the trade ticks for an instrument to the auto-traders, in as many datagrams as are needed.
+
+        Trade ticks that fit in one datagram are sent in a trade ticks
+        message. Otherwise they are sent in the parts of a trade ticks part
+        message, each of which carries the sequence number so that the parts
+        can be put back together. Each message is packed into the same
+        datagram-sized buffer and sent, as a slice of one long-lived view of
+        the buffer, before the next is packed (the transports copy anything
+        they cannot send straight away).
+        """
         message = self.ticks_message
-
+        view = self.ticks_view
         count = len(trade_ticks)
-        if count > MAX_TRADE_TICKS:
-            count = MAX_TRADE_TICKS
-
-        offset: int = TRADE_TICKS_HEADER_SIZE
-        size: int = offset + count * TRADE_TICK_SIZE
-
-        HEADER.pack_into(message, 0, size, MessageType.TRADE_TICKS)
-        TRADE_TICKS_HEADER.pack_into(message, HEADER_SIZE, instrument)
+        if count <= MAX_TRADE_TICKS:
+            size: int = TRADE_TICKS_HEADER_SIZE + TRADE_TICK_SIZE * count
+            HEADER.pack_into(message, 0, size, MessageType.TRADE_TICKS)
+            TRADE_TICKS_HEADER.pack_into(message, HEADER_SIZE, instrument)
+            offset: int = TRADE_TICKS_HEADER_SIZE
+            for tick in trade_ticks:
+                TRADE_TICK.pack_into(message, offset, *tick)
+                offset += TRADE_TICK_SIZE
+            self.send(view[:size])
+            return
+
+        parts = (count + MAX_TRADE_TICKS_PER_PART - 1) // MAX_TRADE_TICKS_PER_PART
+        if parts > MAX_TRADE_TICKS_PARTS:
+            self.logger.warning("too many trade ticks to send: instrument=%d count=%d", instrument, count)
+            parts = MAX_TRADE_TICKS_PARTS
+            count = MAX_TRADE_TICKS_PARTS * MAX_TRADE_TICKS_PER_PART
 
         ticks: Iterator[Tuple[int, int]] = iter(trade_ticks)
-        while offset < size:
-            TRADE_TICK.pack_into(message, offset, *next(ticks))
-            offset += TRADE_TICK_SIZE
-
-        self.transport.sendto(message[:size], self.remote_address)
+        for part in range(parts):
+            size = TRADE_TICKS_PART_HEADER_SIZE + TRADE_TICK_SIZE * (
+                MAX_TRADE_TICKS_PER_PART if part < parts - 1 else count - part * MAX_TRADE_TICKS_PER_PART)
+            HEADER.pack_into(message, 0, size, MessageType.TRADE_TICKS_PART)
+            TRADE_TICKS_PART_HEADER.pack_into(message, HEADER_SIZE, instrument, sequence_number, part, parts)
+            offset = TRADE_TICKS_PART_HEADER_SIZE
+            while offset < size:
+                TRADE_TICK.pack_into(message, offset, *next(ticks))
+                offset += TRADE_TICK_SIZE
+            self.send(view[:size])
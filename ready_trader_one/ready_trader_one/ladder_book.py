@@ -0,0 +1,356 @@
+from bisect import bisect, insort_left
+
+from typing import Dict, List, Optional
+
+from .order_book import BaseOrderBook, ITradeListener, Level, Order, MAXIMUM_ASK, MINIMUM_BID
+from .types import Instrument, Lifespan, Side
+
+
+# The number of ticks covered by the price ladder
+LADDER_WINDOW_TICKS = 4096
+
+
+class LadderOrderBook(BaseOrderBook):
+    """An order book that keeps its price levels in a tick-indexed array.
+
+    Levels whose price is a multiple of the tick size and that lie within a
+    window of ticks around the market are stored in a contiguous array so
+    that adding or removing a level does not shift any other level. The
+    window is recentred when the market moves away from it. Levels that fall
+    outside the window (or that are not a multiple of the tick size) are kept
+    in sorted price lists in the same way as the OrderBook class.
+    """
+
+    def __init__(self, instrument: Instrument, listener: Optional[ITradeListener], maker_fee: float, taker_fee: float,
+                 tick_size: float, window_ticks: int = LADDER_WINDOW_TICKS):
+        """Initialise a new instance of the LadderOrderBook class."""
+        super(LadderOrderBook, self).__init__(instrument, listener, maker_fee, taker_fee)
+        self.__base: int = 1
+        self.__best_ask_index: int = window_ticks
+        self.__best_bid_index: int = -1
+        self.__far_ask_prices: List[int] = [-MAXIMUM_ASK]
+        self.__far_bid_prices: List[int] = [MINIMUM_BID]
+        self.__far_levels: Dict[int, Level] = {MINIMUM_BID: Level(), MAXIMUM_ASK: Level()}
+        self.__level_count: int = 0
+        self.__tick_size: int = round(tick_size * 100.0)
+        self.__window: List[Optional[Level]] = [None] * window_ticks
+        self.__window_size: int = window_ticks
+
+    def best_ask(self) -> int:
+        """Return the current best ask price."""
+        far_price = -self.__far_ask_prices[-1]
+        if self.__best_ask_index < self.__window_size:
+            price = (self.__base + self.__best_ask_index) * self.__tick_size
+            if price < far_price:
+                return price
+        return far_price
+
+    def best_bid(self) -> int:
+        """Return the current best bid price."""
+        far_price = self.__far_bid_prices[-1]
+        if self.__best_bid_index >= 0:
+            price = (self.__base + self.__best_bid_index) * self.__tick_size
+            if price > far_price:
+                return price
+        return far_price
+
+    def fill_depth(self, ask_prices: List[int], ask_volumes: List[int], bid_prices: List[int],
+                   bid_volumes: List[int]) -> None:
+        """Fill the lists with the best ask and bid prices and the volume at each, padded with zeros.
+
+        As many levels are filled in as there are items in each list.
+        """
+        window = self.__window
+        far_levels = self.__far_levels
+        base = self.__base
+        tick_size = self.__tick_size
+        size = self.__window_size
+        count = len(ask_prices)
+
+        i = 0
+        index = self.__best_ask_index
+        far_prices = self.__far_ask_prices
+        j = len(far_prices) - 1
+        while i < count:
+            far_price = -far_prices[j] if j > 0 else MAXIMUM_ASK
+            if index < size and (base + index) * tick_size < far_price:
+                ask_prices[i] = (base + index) * tick_size
+                ask_volumes[i] = window[index].total_volume
+                index += 1
+                while index < size and window[index] is None:
+                    index += 1
+            elif j > 0:
+                ask_prices[i] = far_price
+                ask_volumes[i] = far_levels[far_price].total_volume
+                j -= 1
+            else:
+                break
+            i += 1
+        while i < count:
+            ask_prices[i] = ask_volumes[i] = 0
+            i += 1
+
+        i = 0
+        index = self.__best_bid_index
+        far_prices = self.__far_bid_prices
+        j = len(far_prices) - 1
+        while i < count:
+            far_price = far_prices[j] if j > 0 else MINIMUM_BID
+            if index >= 0 and (base + index) * tick_size > far_price:
+                bid_prices[i] = (base + index) * tick_size
+                bid_volumes[i] = window[index].total_volume
+                index -= 1
+                while index >= 0 and window[index] is None:
+                    index -= 1
+            elif j > 0:
+                bid_prices[i] = far_price
+                bid_volumes[i] = far_levels[far_price].total_volume
+                j -= 1
+            else:
+                break
+            i += 1
+        while i < count:
+            bid_prices[i] = bid_volumes[i] = 0
+            i += 1
+
+    def insert(self, now: float, order: Order) -> None:
+        """Insert a new order into this order book."""
+        if order.side == Side.SELL:
+            index = self.__best_bid_index
+            best_bid = self.__far_bid_prices[-1]
+            if index >= 0 and (self.__base + index) * self.__tick_size > best_bid:
+                best_bid = (self.__base + index) * self.__tick_size
+            if order.price <= best_bid:
+                self.trade_ask(now, order)
+        else:
+            index = self.__best_ask_index
+            best_ask = -self.__far_ask_prices[-1]
+            if index < self.__window_size and (self.__base + index) * self.__tick_size < best_ask:
+                best_ask = (self.__base + index) * self.__tick_size
+            if order.price >= best_ask:
+                self.trade_bid(now, order)
+
+        if order.remaining_volume > 0:
+            if order.lifespan == Lifespan.FILL_AND_KILL:
+                remaining = order.remaining_volume
+                order.remaining_volume = 0
+                if order.listener:
+                    order.listener.on_order_cancelled(now, order, remaining)
+            else:
+                self.place(now, order)
+
+    def midpoint_price(self) -> int:
+        """Return the midpoint price."""
+        return round((self.best_bid() + self.best_ask()) / 2.0)
+
+    def place(self, now: float, order: Order) -> None:
+        """Place an order that does not match any existing order in this order book."""
+        price = order.price
+        tick_size = self.__tick_size
+        index = price // tick_size - self.__base
+
+        self.touch_level(order.side, price)
+
+        if not 0 <= index < self.__window_size or price % tick_size != 0 or price >= MAXIMUM_ASK:
+            index = -1
+            if (MINIMUM_BID < price < MAXIMUM_ASK and price % tick_size == 0
+                    and self.__recentre(price // tick_size)):
+                index = price // tick_size - self.__base
+
+        if index >= 0:
+            level = self.__window[index]
+            if level is None:
+                level = self.__window[index] = Level()
+                self.__level_count += 1
+                if order.side == Side.SELL:
+                    if index < self.__best_ask_index:
+                        self.__best_ask_index = index
+                elif index > self.__best_bid_index:
+                    self.__best_bid_index = index
+        elif price not in self.__far_levels:
+            level = self.__far_levels[price] = Level()
+            if order.side == Side.SELL:
+                insort_left(self.__far_ask_prices, -price)
+            else:
+                insort_left(self.__far_bid_prices, price)
+        else:
+            level = self.__far_levels[price]
+
+        level.append(order)
+
+        if order.listener:
+            order.listener.on_order_placed(now, order)
+
+    def remove_volume_from_level(self, order: Order, volume: int) -> None:
+        """Remove volume belonging to the specified order from its price level.
+
+        If the order has no volume left it is removed from the level, and if
+        the level has no volume left it is removed from the order book.
+        """
+        price = order.price
+        tick_size = self.__tick_size
+        index = price // tick_size - self.__base
+
+        self.touch_level(order.side, price)
+
+        if 0 <= index < self.__window_size and price % tick_size == 0 and price < MAXIMUM_ASK:
+            level = self.__window[index]
+            if level.total_volume == volume:
+                self.__remove_window_level(index)
+            else:
+                level.total_volume -= volume
+                if order.remaining_volume == volume:
+                    level.remove(order)
+            return
+
+        level = self.__far_levels[price]
+        if level.total_volume == volume:
+            del self.__far_levels[price]
+            if order.side == Side.SELL and price < MAXIMUM_ASK:
+                self.__far_ask_prices.pop(bisect(self.__far_ask_prices, -price) - 1)
+            elif order.side == Side.BUY and price > MINIMUM_BID:
+                self.__far_bid_prices.pop(bisect(self.__far_bid_prices, price) - 1)
+        else:
+            level.total_volume -= volume
+            if order.remaining_volume == volume:
+                level.remove(order)
+
+    def trade_ask(self, now: float, order: Order) -> None:
+        """Check to see if any existing bid orders match the specified ask order."""
+        while order.remaining_volume > 0:
+            index = self.__best_bid_index
+            best_bid = self.__far_bid_prices[-1]
+            if index >= 0 and (self.__base + index) * self.__tick_size > best_bid:
+                best_bid = (self.__base + index) * self.__tick_size
+                level = self.__window[index]
+            else:
+                index = -1
+                level = self.__far_levels[best_bid]
+
+            if best_bid < order.price or level.total_volume == 0:
+                break
+
+            self.trade_level(now, order, level, best_bid)
+            if level.total_volume == 0:
+                if index >= 0:
+                    self.__remove_window_level(index)
+                elif best_bid > MINIMUM_BID:
+                    del self.__far_levels[best_bid]
+                    self.__far_bid_prices.pop()
+
+    def trade_bid(self, now: float, order: Order) -> None:
+        """Check to see if any existing ask orders match the specified bid order."""
+        while order.remaining_volume > 0:
+            index = self.__best_ask_index
+            best_ask = -self.__far_ask_prices[-1]
+            if index < self.__window_size and (self.__base + index) * self.__tick_size < best_ask:
+                best_ask = (self.__base + index) * self.__tick_size
+                level = self.__window[index]
+            else:
+                index = -1
+                level = self.__far_levels[best_ask]
+
+            if best_ask > order.price or level.total_volume == 0:
+                break
+
+            self.trade_level(now, order, level, best_ask)
+            if level.total_volume == 0:
+                if index >= 0:
+                    self.__remove_window_level(index)
+                elif best_ask < MAXIMUM_ASK:
+                    del self.__far_levels[best_ask]
+                    self.__far_ask_prices.pop()
+
+    def __remove_window_level(self, index: int) -> None:
+        """Remove the level at the specified index from the ladder."""
+        window = self.__window
+        window[index] = None
+        self.__level_count -= 1
+
+        if index == self.__best_bid_index:
+            index -= 1
+            while index >= 0 and window[index] is None:
+                index -= 1
+            self.__best_bid_index = index
+        elif index == self.__best_ask_index:
+            index += 1
+            size = self.__window_size
+            while index < size and window[index] is None:
+                index += 1
+            self.__best_ask_index = index
+
+    def __recentre(self, tick: int) -> bool:
+        """Move the ladder so that it is centred on the market and return True if the specified tick is covered.
+
+        If the specified tick is too far from the market to be covered by the
+        ladder then the ladder is not moved and False is returned.
+        """
+        half = self.__window_size // 2
+        tick_size = self.__tick_size
+
+        if self.__level_count == 0 and len(self.__far_levels) == 2:
+            centre = tick
+        else:
+            best_bid = self.best_bid()
+            best_ask = self.best_ask()
+            if best_bid > MINIMUM_BID and best_ask < MAXIMUM_ASK:
+                centre = (best_bid + best_ask) // (2 * tick_size)
+            elif best_bid > MINIMUM_BID:
+                centre = best_bid // tick_size
+            elif best_ask < MAXIMUM_ASK:
+                centre = best_ask // tick_size
+            else:
+                centre = tick
+            if not -half <= tick - centre < half:
+                return False
+
+        # Asks always lie above bids, so the side of each level can be found from the best bid
+        best_bid = self.best_bid()
+        old_base = self.__base
+        old_window = self.__window
+        base = self.__base = max(centre - half, 1)
+        size = self.__window_size
+        window = self.__window = [None] * size
+        far_levels = self.__far_levels
+        count = 0
+
+        # Levels at prices no longer covered by the ladder are moved to the far book
+        for index, level in enumerate(old_window):
+            if level is not None:
+                new_index = old_base + index - base
+                if 0 <= new_index < size:
+                    window[new_index] = level
+                    count += 1
+                else:
+                    price = (old_base + index) * tick_size
+                    far_levels[price] = level
+                    if price > best_bid:
+                        insort_left(self.__far_ask_prices, -price)
+                    else:
+                        insort_left(self.__far_bid_prices, price)
+
+        # Levels in the far book at prices now covered by the ladder are moved into it
+        for prices, sign in ((self.__far_ask_prices, -1), (self.__far_bid_prices, 1)):
+            j = len(prices) - 1
+            while j > 0:
+                price = prices[j] * sign
+                if price % tick_size == 0 and 0 <= price // tick_size - base < size:
+                    window[price // tick_size - base] = far_levels.pop(price)
+                    prices.pop(j)
+                    count += 1
+                j -= 1
+
+        best_bid_index = -1
+        best_ask_index = size
+        for index in range(size):
+            if window[index] is not None:
+                if (base + index) * tick_size <= best_bid:
+                    best_bid_index = index
+                else:
+                    best_ask_index = index
+                    break
+
+        self.__best_ask_index = best_ask_index
+        self.__best_bid_index = best_bid_index
+        self.__level_count = count
+        return True
@@ -0,0 +1,136 @@
+import functools
+import logging
+import time
+
+from typing import Any, Callable, Dict, List
+
+# Each power of two is divided into this many buckets (as in an HDR histogram),
+# so recorded values are accurate to within 1 / LATENCY_SUB_BUCKET_HALF_COUNT.
+LATENCY_SUB_BUCKET_BITS = 6
+LATENCY_SUB_BUCKET_COUNT = 1 << LATENCY_SUB_BUCKET_BITS
+LATENCY_SUB_BUCKET_HALF_COUNT = LATENCY_SUB_BUCKET_COUNT >> 1
+
+# Values are in nanoseconds; anything of 2**40 ns (about 18 minutes) or more is counted as an overflow
+LATENCY_MAXIMUM_BITS = 40
+LATENCY_BUCKET_COUNT = (LATENCY_MAXIMUM_BITS - LATENCY_SUB_BUCKET_BITS + 1) * LATENCY_SUB_BUCKET_HALF_COUNT \
+                       + LATENCY_SUB_BUCKET_HALF_COUNT
+
+LATENCY_PERCENTILES = (50.0, 90.0, 99.0, 99.9, 99.99)
+
+if hasattr(time, "perf_counter_ns"):
+    clock_ns = time.perf_counter_ns
+else:
+    def clock_ns() -> int:
+        """Return the value of the performance counter in nanoseconds."""
+        return int(time.perf_counter() * 1e9)
+
+
+def bucket_limit(index: int) -> int:
+    """Return the largest value counted in the bucket with the specified index."""
+    if index < LATENCY_SUB_BUCKET_COUNT:
+        return index
+    shift = index // LATENCY_SUB_BUCKET_HALF_COUNT - 1
+    return (((index - shift * LATENCY_SUB_BUCKET_HALF_COUNT) + 1) << shift) - 1
+
+
+class LatencyHistogram(object):
+    """A histogram of latencies, in nanoseconds, using a fixed set of log-linear buckets."""
+    __slots__ = ("count", "counts", "maximum", "name", "overflow", "total")
+
+    def __init__(self, name: str):
+        """Initialise a new instance of the LatencyHistogram class."""
+        self.count: int = 0
+        self.counts: List[int] = [0] * LATENCY_BUCKET_COUNT
+        self.maximum: int = 0
+        self.name: str = name
+        self.overflow: int = 0
+        self.total: int = 0
+
+    def percentile(self, percentile: float) -> int:
+        """Return the value below which the specified percentage of the recorded values fall.
+
+        Percentiles that fall among the overflows are reported as the maximum
+        value recorded.
+        """
+        target = self.count * percentile / 100.0
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return min(bucket_limit(index), self.maximum)
+        return self.maximum
+
+    def record(self, value: int) -> None:
+        """Record a latency, in nanoseconds."""
+        shift = value.bit_length() - LATENCY_SUB_BUCKET_BITS
+        if shift <= 0:
+            self.counts[value if value > 0 else 0] += 1
+        elif shift <= LATENCY_MAXIMUM_BITS - LATENCY_SUB_BUCKET_BITS:
+            self.counts[shift * LATENCY_SUB_BUCKET_HALF_COUNT + (value >> shift)] += 1
+        else:
+            self.overflow += 1
+        self.count += 1
+        self.total += value
+        if value > self.maximum:
+            self.maximum = value
+
+    def summary(self) -> str:
+        """Return a one line summary of this histogram."""
+        mean = self.total / self.count if self.count else 0.0
+        return "%s: count=%d mean=%.0f %s max=%d overflow=%d" % (
+            self.name, self.count, mean, " ".join("p%g=%d" % (p, self.percentile(p)) for p in LATENCY_PERCENTILES),
+            self.maximum, self.overflow)
+
+
+class LatencyRecorder(object):
+    """A collection of latency histograms that can be written to a file."""
+
+    def __init__(self, filename: str):
+        """Initialise a new instance of the LatencyRecorder class."""
+        self.filename: str = filename
+        self.histograms: Dict[str, LatencyHistogram] = dict()
+        self.logger = logging.getLogger("LATENCY")
+
+    def dump(self) -> None:
+        """Write a summary of each histogram, followed by its non-empty buckets, to the latency file.
+
+        Each bucket is written as the largest value it counts and its count;
+        overflows are written last, as "overflow" and their count.
+        """
+        try:
+            with open(self.filename, "w") as latency_file:
+                latency_file.write("# latencies in nanoseconds\n")
+                for histogram in self.histograms.values():
+                    latency_file.write(histogram.summary() + "\n")
+                for histogram in self.histograms.values():
+                    latency_file.write("\n[%s]\n" % histogram.name)
+                    for index, count in enumerate(histogram.counts):
+                        if count:
+                            latency_file.write("%d %d\n" % (bucket_limit(index), count))
+                    if histogram.overflow:
+                        latency_file.write("overflow %d\n" % histogram.overflow)
+        except OSError as e:
+            self.logger.error("failed to write latency file: filename='%s'", self.filename, exc_info=e)
+        else:
+            self.logger.info("latency histograms written to '%s'", self.filename)
+
+    def histogram(self, name: str) -> LatencyHistogram:
+        """Return the named histogram, creating it if necessary."""
+        if name not in self.histograms:
+            self.histograms[name] = LatencyHistogram(name)
+        return self.histograms[name]
+
+    def instrument(self, obj: Any, method_name: str, histogram_name: str) -> None:
+        """Replace a method of an object with one that records the latency of each call."""
+        method: Callable = getattr(obj, method_name)
+        record = self.histogram(histogram_name).record
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            start = clock_ns()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                record(clock_ns() - start)
+
+        setattr(obj, method_name, timed)
@@ -1,18 +1,37 @@
-import collections
 import sys
 
-from typing import Deque
+from typing import List
+
+# Times within this relative distance of the start of the window are treated as being on it (i.e. outside it)
+EPSILON: float = sys.float_info.epsilon
+
+
+def _in_window(time: float, window_start: float) -> bool:
+    """Return True if the specified time falls after the start of a window."""
+    return (time - window_start) > ((time if time > window_start else window_start) * EPSILON)
 
 
 class FrequencyLimiter(object):
-    """Limit the frequency of events in a specified time interval."""
+    """Limit the frequency of events in a specified time interval.
+
+    The times of the last limit + 1 events are kept in a circular array. An
+    event breaches the limit if more than limit events (including itself)
+    have happened in the interval ending with it, which is the case exactly
+    when the oldest event in the array is still inside that interval.
+    """
 
     def __init__(self, interval: float, limit: int):
         """Initialise a new instance of the FrequencyLimiter class."""
-        self.events: Deque[float] = collections.deque()
+        self.events: List[float] = [float("-inf")] * (limit + 1)
+        self.index: int = 0
         self.interval: float = interval
         self.limit: int = limit
-        self.value: int = 0
+
+    @property
+    def value(self) -> int:
+        """The number of events in the interval ending with the last event, up to a maximum of limit + 1."""
+        window_start = self.events[self.index - 1] - self.interval
+        return sum(1 for time in self.events if _in_window(time, window_start))
 
     def check_event(self, now: float) -> bool:
         """Return True if the new event breaches the limit, False otherwise.
@@ -20,16 +39,34 @@ class FrequencyLimiter(object):
         This method should be called with a monotonically increasing sequence
         of times.
         """
-        self.value += 1
-        self.events.append(now)
+        events = self.events
+        index = self.index
+        events[index] = now
+        index += 1
+        if index == len(events):
+            index = 0
+        self.index = index
 
-        epsilon: float = sys.float_info.epsilon
-        first: float = self.events[0]
+        first: float = events[index]
         window_start: float = now - self.interval
+        return (first - window_start) > ((first if first > window_start else window_start) * EPSILON)
 
-        while (first - window_start) <= ((first if first > window_start else window_start) * epsilon):
-            self.events.popleft()
-            self.value -= 1
-            first = self.events[0]
+    def headroom(self, now: float) -> int:
+        """Return the number of events that could happen at the specified time without breaching the limit."""
+        window_start = now - self.interval
+        count = sum(1 for time in self.events if _in_window(time, window_start))
+        return self.limit - count if count < self.limit else 0
 
-        return self.value > self.limit
+    def next_available_time(self, now: float) -> float:
+        """Return the earliest time, no earlier than now, at which an event would not breach the limit."""
+        if self.limit == 0:
+            return float("inf")
+        # The next event will be compared with the event after the oldest one
+        deciding = self.events[self.index + 1 if self.index + 1 < len(self.events) else 0]
+        if not _in_window(deciding, now - self.interval):
+            return now
+        # Step past any rounding error in working out the start of the window
+        available = deciding + self.interval
+        while _in_window(deciding, available - self.interval):
+            available += abs(available) * EPSILON or EPSILON
+        return available
@@ -0,0 +1,144 @@
+import asyncio
+
+from typing import Any, List, Optional, Tuple, Union
+
+# The address reported as the source of datagrams sent over a loopback transport
+LOOPBACK_ADDRESS = ("loopback", 0)
+
+
+class LoopbackTransport(asyncio.Transport):
+    """One end of an in-process stream connection.
+
+    Data written to a transport is collected in a buffer which is handed, as
+    it is, to the peer's protocol on the next iteration of the event loop, so
+    several writes made in one callback arrive in one call to data_received
+    just as they would over TCP. The receiving protocol takes ownership of the
+    buffer and the sender starts a new one.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, protocol: asyncio.Protocol):
+        """Initialise a new instance of the LoopbackTransport class."""
+        super().__init__({"peername": LOOPBACK_ADDRESS})
+        self.__buffer: bytearray = bytearray()
+        self.__closing: bool = False
+        self.__loop: asyncio.AbstractEventLoop = loop
+        self.__peer: Optional[LoopbackTransport] = None
+        self.__protocol: asyncio.Protocol = protocol
+
+    def abort(self) -> None:
+        """Close the transport immediately, discarding any buffered data."""
+        self.__buffer = bytearray()
+        self.close()
+
+    def can_write_eof(self) -> bool:
+        """Return False because loopback transports do not support half-closed connections."""
+        return False
+
+    def close(self) -> None:
+        """Close the transport once any buffered data has been delivered."""
+        if not self.__closing:
+            self.__closing = True
+            self.__loop.call_soon(self.__on_closed)
+
+    def get_protocol(self) -> asyncio.BaseProtocol:
+        """Return the protocol associated with this transport."""
+        return self.__protocol
+
+    def get_write_buffer_size(self) -> int:
+        """Return the number of bytes waiting to be delivered to the peer."""
+        return len(self.__buffer)
+
+    def is_closing(self) -> bool:
+        """Return True if the transport is closing or closed."""
+        return self.__closing
+
+    def set_protocol(self, protocol: asyncio.BaseProtocol) -> None:
+        """Set the protocol associated with this transport."""
+        self.__protocol = protocol
+
+    def write(self, data: Union[bytes, bytearray, memoryview]) -> None:
+        """Write data to the peer."""
+        if self.__closing or not data:
+            return
+        if not self.__buffer:
+            self.__loop.call_soon(self.__flush)
+        self.__buffer += data
+
+    def __flush(self) -> None:
+        """Hand the buffered data to the peer's protocol."""
+        data, self.__buffer = self.__buffer, bytearray()
+        peer = self.__peer
+        if data and peer is not None and not peer.__closing:
+            peer.__protocol.data_received(data)
+
+    def __on_closed(self) -> None:
+        """Tell both protocols that the connection has been lost."""
+        self.__protocol.connection_lost(None)
+        peer = self.__peer
+        if peer is not None and not peer.__closing:
+            peer.__closing = True
+            peer.__protocol.connection_lost(None)
+
+    @staticmethod
+    def connect(loop: asyncio.AbstractEventLoop, server_protocol: asyncio.Protocol,
+                client_protocol: asyncio.Protocol) -> Tuple["LoopbackTransport", "LoopbackTransport"]:
+        """Connect two protocols and return the server and client transports."""
+        server = LoopbackTransport(loop, server_protocol)
+        client = LoopbackTransport(loop, client_protocol)
+        server.__peer = client
+        client.__peer = server
+        server_protocol.connection_made(server)
+        client_protocol.connection_made(client)
+        return server, client
+
+
+class LoopbackDatagramTransport(asyncio.DatagramTransport):
+    """An in-process datagram transport that delivers datagrams to a list of receivers.
+
+    Each datagram is copied once when it is sent (because senders reuse their
+    message buffers) and the same copy is delivered to every receiver on the
+    next iteration of the event loop.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, protocol: asyncio.DatagramProtocol):
+        """Initialise a new instance of the LoopbackDatagramTransport class."""
+        super().__init__({"sockname": LOOPBACK_ADDRESS})
+        self.__closing: bool = False
+        self.__loop: asyncio.AbstractEventLoop = loop
+        self.__protocol: asyncio.DatagramProtocol = protocol
+        self.__receivers: List[asyncio.DatagramProtocol] = list()
+        protocol.connection_made(self)
+
+    def abort(self) -> None:
+        """Close the transport immediately."""
+        self.close()
+
+    def add_receiver(self, protocol: asyncio.DatagramProtocol) -> None:
+        """Add a protocol to the list of protocols that receive datagrams sent on this transport."""
+        self.__receivers.append(protocol)
+
+    def close(self) -> None:
+        """Close the transport."""
+        if not self.__closing:
+            self.__closing = True
+            self.__loop.call_soon(self.__protocol.connection_lost, None)
+
+    def get_protocol(self) -> asyncio.BaseProtocol:
+        """Return the protocol associated with this transport."""
+        return self.__protocol
+
+    def is_closing(self) -> bool:
+        """Return True if the transport is closing or closed."""
+        return self.__closing
+
+    def remove_receiver(self, protocol: asyncio.DatagramProtocol) -> None:
+        """Stop delivering datagrams sent on this transport to the specified protocol."""
+        self.__receivers.remove(protocol)
+
+    def sendto(self, data: Union[bytes, bytearray, memoryview], addr: Any = None) -> None:
+        """Send a datagram to each of the receivers."""
+        if self.__closing or not self.__receivers:
+            return
+        data = bytes(data)
+        for receiver in self.__receivers:
+            self.__loop.call_soon(receiver.datagram_received, data, LOOPBACK_ADDRESS)
@@ -2,15 +2,26 @@ import asyncio
 import csv
 import enum
 import logging
+import mmap
 import queue
+import struct
 import threading
 
-from typing import Dict, Optional, TextIO
+from typing import BinaryIO, Dict, Iterator, List, Optional, TextIO, Tuple
 
 from .order_book import IOrderListener, Order, OrderBook
 from .types import IController, ITaskListener, Instrument, Lifespan, Side
 
-MARKET_EVENT_QUEUE_SIZE = 1024
+# Market events are passed from the reader thread to the event loop in batches
+MARKET_EVENT_BATCH_SIZE = 4096
+MARKET_EVENT_QUEUE_SIZE = 16
+
+# Compiled market data files start with this and are followed by fixed-width records
+COMPILED_MARKET_DATA_MAGIC = b"RT1MKT\x00\x01"
+
+# Time, order id, volume, price, instrument, operation, side and lifespan (side and lifespan may be NO_VALUE)
+COMPILED_MARKET_EVENT = struct.Struct("<dQiIBBBB")
+NO_VALUE = 255
 
 
 class MarketEventOperation(enum.IntEnum):
@@ -36,6 +47,42 @@ class MarketEvent(object):
         self.lifespan: Optional[Lifespan] = lifespan
 
 
+def read_market_data(market_data: TextIO) -> Iterator[Tuple[float, int, MarketEventOperation, int, Optional[Side], int,
+                                                             int, Optional[Lifespan]]]:
+    """Parse a market data CSV file and yield the fields of each event."""
+    operations = {"Amend": MarketEventOperation.AMEND, "Cancel": MarketEventOperation.CANCEL,
+                  "Insert": MarketEventOperation.INSERT}
+    lifespans = {"FAK": Lifespan.FILL_AND_KILL, "GFD": Lifespan.GOOD_FOR_DAY}
+    sides = {"A": Side.SELL, "B": Side.BUY}
+
+    csv_reader = csv.reader(market_data)
+    next(csv_reader)  # Skip header row
+    for row in csv_reader:
+        yield (float(row[0]), int(row[1]), operations[row[2]], int(row[3]), sides.get(row[4]),
+               int(float(row[5])) if row[5] else 0, int(float(row[6]) * 100) if row[6] else 0,
+               lifespans.get(row[7]))
+
+
+def compile_market_data(csv_filename: str, compiled_filename: str) -> int:
+    """Convert a market data CSV file into a compiled market data file and return the number of events."""
+    count = 0
+    with open(csv_filename, newline="") as market_data, open(compiled_filename, "wb") as compiled:
+        compiled.write(COMPILED_MARKET_DATA_MAGIC)
+        pack = COMPILED_MARKET_EVENT.pack
+        for time, instrument, operation, order_id, side, volume, price, lifespan in read_market_data(market_data):
+            compiled.write(pack(time, order_id, volume, price, instrument, operation,
+                                NO_VALUE if side is None else side, NO_VALUE if lifespan is None else lifespan))
+            count += 1
+    return count
+
+
+def is_compiled_market_data(market_data: BinaryIO) -> bool:
+    """Return True if the specified file (open in binary mode) contains compiled market data."""
+    magic = market_data.read(len(COMPILED_MARKET_DATA_MAGIC))
+    market_data.seek(0)
+    return magic == COMPILED_MARKET_DATA_MAGIC
+
+
 class MarketEvents(IOrderListener):
     """A processor of market events read from a file."""
 
@@ -56,9 +103,16 @@ class MarketEvents(IOrderListener):
         self.queue: queue.Queue = queue.Queue(MARKET_EVENT_QUEUE_SIZE)
         self.reader_task: Optional[threading.Thread] = None
 
-        # Prime the event pump with a no-op event
-        self.next_event: Optional[MarketEvent] = MarketEvent(0.0, Instrument.FUTURE, MarketEventOperation.CANCEL, 0,
-                                                             Side.BUY, 0, 0, Lifespan.FILL_AND_KILL)
+        # If set, wait for the reader thread when the queue is empty instead of resuming on the next call
+        self.wait_for_reader: bool = False
+
+        # The batch of events currently being processed and the position of the next event in it
+        self.batch: List[Optional[MarketEvent]] = list()
+        self.batch_index: int = 0
+
+        # The time of the next event to be processed: infinity before the first call to process_market_events and
+        # after the last event, and minus infinity if the reader thread has not yet produced the next event
+        self.next_event_time: float = float("inf")
 
     # IOrderListener callbacks
 
@@ -98,10 +152,39 @@ class MarketEvents(IOrderListener):
         self.logger.info("reader thread complete after processing %d market events", num_events)
 
     def process_market_events(self, elapsed_time: float) -> None:
-        """Process market events from the queue."""
-        evt: MarketEvent = self.next_event
+        """Process market events from the queue.
+
+        Events are taken from the current batch without locking. A new batch
+        is only taken from the queue when the current one is exhausted and, if
+        the reader thread has not yet produced one, processing resumes on the
+        next call rather than waiting for it (unless wait_for_reader is set).
+
+        Afterwards, next_event_time is the time of the next event, so callers
+        need only call this method when elapsed_time is later than that.
+        """
+        batch: List[Optional[MarketEvent]] = self.batch
+        index: int = self.batch_index
+
+        while True:
+            if index == len(batch):
+                try:
+                    batch = self.queue.get_nowait()
+                except queue.Empty:
+                    if not self.wait_for_reader:
+                        self.next_event_time = float("-inf")
+                        break
+                    batch = self.queue.get()
+                index = 0
+
+            evt: Optional[MarketEvent] = batch[index]
+            if evt is None:
+                self.next_event_time = float("inf")
+                self.controller.market_events_complete()
+                break
+            if evt.time >= elapsed_time:
+                self.next_event_time = evt.time
+                break
 
-        while evt and evt.time < elapsed_time:
             if evt.instrument == Instrument.FUTURE:
                 orders = self.future_orders
                 book = self.future_book
@@ -121,38 +204,71 @@ class MarketEvents(IOrderListener):
                     order = orders[evt.order_id]
                     book.amend(evt.time, order, order.volume + evt.volume)
 
-            evt = self.queue.get()
+            index += 1
 
-        self.next_event = evt
-        if evt is None:
-            self.controller.market_events_complete()
+        self.batch = batch
+        self.batch_index = index
 
-    def reader(self, market_data: TextIO) -> None:
-        """Read the market data file and place order events in the queue."""
+    def compiled_reader(self, market_data: BinaryIO) -> None:
+        """Memory-map a compiled market data file and place batches of order events in the queue."""
         fifo = self.queue
+        batch: List[Optional[MarketEvent]] = list()
+        count = 0
+
+        operations = tuple(MarketEventOperation)
+        lifespans = {Lifespan.FILL_AND_KILL: Lifespan.FILL_AND_KILL, Lifespan.GOOD_FOR_DAY: Lifespan.GOOD_FOR_DAY}
+        sides = {Side.SELL: Side.SELL, Side.BUY: Side.BUY}
 
-        operations = dict(zip(("Amend", "Cancel", "Insert"), tuple(MarketEventOperation)))
-        lifespans = {"FAK": Lifespan.FILL_AND_KILL, "GFD": Lifespan.GOOD_FOR_DAY}
-        sides = {"A": Side.SELL, "B": Side.BUY}
+        with market_data, mmap.mmap(market_data.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            start = len(COMPILED_MARKET_DATA_MAGIC)
+            end = start + (len(mapped) - start) // COMPILED_MARKET_EVENT.size * COMPILED_MARKET_EVENT.size
+            if end != len(mapped):
+                self.logger.warning("ignoring %d trailing bytes in compiled market data file", len(mapped) - end)
+            with memoryview(mapped) as view, view[start:end] as records:
+                for time, order_id, volume, price, instrument, operation, side, lifespan \
+                        in COMPILED_MARKET_EVENT.iter_unpack(records):
+                    batch.append(MarketEvent(time, instrument, operations[operation], order_id, sides.get(side),
+                                             volume, price, lifespans.get(lifespan)))
+                    if len(batch) == MARKET_EVENT_BATCH_SIZE:
+                        fifo.put(batch)
+                        batch = list()
+                    count += 1
+            batch.append(None)
+            fifo.put(batch)
+
+        self.event_loop.call_soon_threadsafe(self.on_reader_done, count)
+
+    def reader(self, market_data: TextIO) -> None:
+        """Read the market data file and place batches of order events in the queue."""
+        fifo = self.queue
+        batch: List[Optional[MarketEvent]] = list()
+        count = 0
 
         with market_data:
-            csv_reader = csv.reader(market_data)
-            next(csv_reader)  # Skip header row
-            for row in csv_reader:
-                fifo.put(MarketEvent(float(row[0]), int(row[1]), operations[row[2]], int(row[3]), sides.get(row[4]),
-                                     int(float(row[5])) if row[5] else 0, int(float(row[6]) * 100) if row[6] else 0,
-                                     lifespans.get(row[7])))
-            fifo.put(None)
+            for time, instrument, operation, order_id, side, volume, price, lifespan in read_market_data(market_data):
+                batch.append(MarketEvent(time, instrument, operation, order_id, side, volume, price, lifespan))
+                if len(batch) == MARKET_EVENT_BATCH_SIZE:
+                    fifo.put(batch)
+                    batch = list()
+                count += 1
+            batch.append(None)
+            fifo.put(batch)
 
-        self.event_loop.call_soon_threadsafe(self.on_reader_done, csv_reader.line_num - 1)
+        self.event_loop.call_soon_threadsafe(self.on_reader_done, count)
 
     def start(self):
         """Start the market events reader thread"""
         try:
-            market_data = open(self.filename)
+            market_data = open(self.filename, "rb")
+            if is_compiled_market_data(market_data):
+                reader = self.compiled_reader
+            else:
+                market_data.close()
+                market_data = open(self.filename)
+                reader = self.reader
         except OSError as e:
             self.logger.error("failed to open market data file: filename='%s'" % self.filename, exc_info=e)
             raise
         else:
-            self.reader_task = threading.Thread(target=self.reader, args=(market_data,), daemon=True, name="reader")
+            self.reader_task = threading.Thread(target=reader, args=(market_data,), daemon=True, name="reader")
             self.reader_task.start()
@@ -2,15 +2,46 @@ import asyncio
 import csv
 import logging
 import queue
+import struct
 import threading
 
-from typing import Optional, TextIO
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
 
 from .account import CompetitorAccount
 from .order_book import Order
 from .types import ITaskListener, Side
 
 
+# Match events files with this extension are written in binary rather than as CSV
+BINARY_MATCH_EVENTS_EXTENSION = ".bin"
+
+# Binary match events files start with this and are followed by fixed-width records
+BINARY_MATCH_EVENTS_MAGIC = b"RT1MEV\x00\x01"
+
+# Operation, competitor number, side, lifespan, null fields (see NULL_FIELDS), time, order id, volume, price, fee,
+# future price, ETF price, account balance, future position, ETF position, profit or loss, total fees, max drawdown,
+# buy volume and sell volume. Prices and amounts of money are in cents.
+BINARY_MATCH_EVENT = struct.Struct("<BBBBBdIiIiIIqiiqqqII")
+
+# The first time a competitor appears, a record giving its number and name precedes its first event
+BINARY_COMPETITOR = struct.Struct("<BB20s%dx" % (BINARY_MATCH_EVENT.size - 22,))
+COMPETITOR_OPERATION = 255
+
+# The positions in a match event of the fields that may be None, with the bit used for each in the null fields byte
+NULL_FIELDS = ((3, 1), (5, 2), (6, 4), (9, 8), (10, 16))
+NO_VALUE = 255
+
+MATCH_EVENTS_CSV_HEADER = ("Time", "Competitor", "Operation", "OrderId", "Side", "Volume", "Price", "Lifespan", "Fee",
+                           "FuturePrice", "EtfPrice", "AccountBalance", "FuturePosition", "EtfPosition", "ProfitLoss",
+                           "TotalFees", "MaxDrawdown", "BuyVolume", "SellVolume")
+
+# The size of the buffer used when writing match events files
+MATCH_EVENTS_BUFFER_SIZE = 1 << 20
+
+OPERATIONS = ("Amend", "Breach", "Cancel", "Disconnect", "Fill", "Hedge", "Insert", "Tick")
+OPERATION_CODES = {operation: code for code, operation in enumerate(OPERATIONS)}
+
+
 class MatchEvent(tuple):
     __slots__ = ()
 
@@ -43,19 +74,105 @@ class MatchEvent(tuple):
                      self[18]))  # sell count
 
 
+def pack_match_event(evt: MatchEvent, competitor: int) -> bytes:
+    """Return a match event packed into a binary record."""
+    nulls = 0
+    for i, bit in NULL_FIELDS:
+        if evt[i] is None:
+            nulls |= bit
+    return BINARY_MATCH_EVENT.pack(OPERATION_CODES[evt[2]], competitor, NO_VALUE if evt[4] is None else evt[4],
+                                   NO_VALUE if evt[7] is None else evt[7], nulls, evt[0], evt[3] or 0, evt[5] or 0,
+                                   evt[6] or 0, int(evt[8]), evt[9] or 0, evt[10] or 0, *evt[11:])
+
+
+def read_binary_match_events(match_events: BinaryIO) -> Iterator[MatchEvent]:
+    """Read the match events in a binary match events file."""
+    if match_events.read(len(BINARY_MATCH_EVENTS_MAGIC)) != BINARY_MATCH_EVENTS_MAGIC:
+        raise ValueError("not a binary match events file")
+
+    competitors: Dict[int, str] = dict()
+    size = BINARY_MATCH_EVENT.size
+    record = match_events.read(size)
+    while len(record) == size:
+        if record[0] == COMPETITOR_OPERATION:
+            _, competitor, name = BINARY_COMPETITOR.unpack(record)
+            competitors[competitor] = name.rstrip(b"\x00").decode()
+            record = match_events.read(size)
+            continue
+
+        (operation, competitor, side, lifespan, nulls, time, order_id, volume, price, fee, future_price, etf_price,
+         *account) = BINARY_MATCH_EVENT.unpack(record)
+        yield MatchEvent(time, competitors[competitor], OPERATIONS[operation],
+                         None if nulls & 1 else order_id, None if side == NO_VALUE else side,
+                         None if nulls & 2 else volume, None if nulls & 4 else price,
+                         None if lifespan == NO_VALUE else lifespan, fee, None if nulls & 8 else future_price,
+                         None if nulls & 16 else etf_price, *account)
+        record = match_events.read(size)
+
+
+def convert_match_events(binary_filename: str, csv_filename: str) -> int:
+    """Convert a binary match events file to CSV and return the number of events."""
+    count = 0
+    with open(binary_filename, "rb") as match_events, open(csv_filename, "w", newline="") as csv_file:
+        csv_writer = csv.writer(csv_file)
+        csv_writer.writerow(MATCH_EVENTS_CSV_HEADER)
+        for evt in read_binary_match_events(match_events):
+            csv_writer.writerow(evt)
+            count += 1
+    return count
+
+
+class RecordingPolicy(object):
+    """Which match events are recorded.
+
+    Only the listed operations are recorded. Of the tick events, only every
+    tick_sampling'th tick for each competitor is recorded and, if
+    ticks_on_change_only is set, a sampled tick is skipped when the
+    competitor's account balance, positions and profit or loss are the same
+    as in the last tick recorded for it.
+    """
+
+    def __init__(self, operations: Iterable[str] = OPERATIONS, tick_sampling: int = 1,
+                 ticks_on_change_only: bool = False):
+        """Initialise a new instance of the RecordingPolicy class."""
+        self.operations: Tuple[str, ...] = tuple(operations)
+        self.tick_sampling: int = tick_sampling
+        self.ticks_on_change_only: bool = ticks_on_change_only
+
+    @staticmethod
+    def from_config(engine: Dict) -> "RecordingPolicy":
+        """Return the recording policy given by the optional settings in the Engine section of the configuration."""
+        return RecordingPolicy(engine.get("RecordedOperations", OPERATIONS), engine.get("TickSampling", 1),
+                               engine.get("TicksOnChangeOnly", False))
+
+
 class MatchEvents(object):
     """A processor of match events that it writes to a file."""
 
-    def __init__(self, filename: str, loop: asyncio.AbstractEventLoop, listener: ITaskListener):
+    def __init__(self, filename: str, loop: asyncio.AbstractEventLoop, listener: ITaskListener,
+                 policy: Optional[RecordingPolicy] = None):
         """Initialise a new instance of the MatchEvents class."""
         self.event_loop: asyncio.AbstractEventLoop = loop
+        self.events: List[MatchEvent] = list()
         self.filename: str = filename
         self.finished: bool = False
+        self.last_ticks: Dict[str, Tuple[int, int, int, int]] = dict()
         self.listener: ITaskListener = listener
         self.logger = logging.getLogger("MATCH_EVENTS")
+        self.policy: RecordingPolicy = policy or RecordingPolicy()
         self.queue: queue.Queue = queue.Queue()
+        self.records_ticks: bool = "Tick" in self.policy.operations
+        self.tick_counts: Dict[str, int] = dict()
         self.writer_task: Optional[threading.Thread] = None
 
+        # Operations that are not recorded are replaced with a method that does nothing, so that no match event is
+        # created for them, and ticks are only filtered when the policy asks for it
+        for operation in OPERATIONS:
+            if operation not in self.policy.operations:
+                setattr(self, operation.lower(), self.ignore)
+        if "Tick" in self.policy.operations and (self.policy.tick_sampling > 1 or self.policy.ticks_on_change_only):
+            self.tick = self.filtered_tick
+
     def __del__(self):
         """Destroy an instance of the MatchEvents class."""
         if not self.finished:
@@ -65,62 +182,112 @@ class MatchEvents(object):
     def amend(self, now: float, name: str, account: CompetitorAccount, order: Order, diff: int, future_price: int,
               etf_price: int) -> None:
         """Create a new amend event."""
-        self.queue.put(MatchEvent(now, name, "Amend", order.client_order_id, order.side, diff, order.price,
-                                  order.lifespan, 0.0, future_price, etf_price, account.account_balance,
-                                  account.future_position, account.etf_position, account.profit_or_loss,
-                                  account.total_fees, account.max_drawdown, account.buy_volume, account.sell_volume))
+        self.events.append(MatchEvent(now, name, "Amend", order.client_order_id, order.side, diff, order.price,
+                                      order.lifespan, 0.0, future_price, etf_price, account.account_balance,
+                                      account.future_position, account.etf_position, account.profit_or_loss,
+                                      account.total_fees, account.max_drawdown, account.buy_volume,
+                                      account.sell_volume))
 
     def breach(self, now: float, name: str, account: CompetitorAccount, future_price: int, etf_price: int) -> None:
         """Create a new disconnect event."""
-        self.queue.put(MatchEvent(now, name, "Breach", None, None, None, None, None, 0.0, future_price, etf_price,
-                                  account.account_balance, account.future_position, account.etf_position,
-                                  account.profit_or_loss, account.total_fees, account.max_drawdown, account.buy_volume,
-                                  account.sell_volume))
+        self.events.append(MatchEvent(now, name, "Breach", None, None, None, None, None, 0.0, future_price, etf_price,
+                                      account.account_balance, account.future_position, account.etf_position,
+                                      account.profit_or_loss, account.total_fees, account.max_drawdown,
+                                      account.buy_volume, account.sell_volume))
 
     def cancel(self, now: float, name: str, account: CompetitorAccount, order: Order, diff: int, future_price: int,
                etf_price) -> None:
         """Create a new cancel event."""
-        self.queue.put(MatchEvent(now, name, "Cancel", order.client_order_id, order.side, diff, order.price,
-                                  order.lifespan, 0.0, future_price, etf_price, account.account_balance,
-                                  account.future_position, account.etf_position, account.profit_or_loss,
-                                  account.total_fees, account.max_drawdown, account.buy_volume, account.sell_volume))
+        self.events.append(MatchEvent(now, name, "Cancel", order.client_order_id, order.side, diff, order.price,
+                                      order.lifespan, 0.0, future_price, etf_price, account.account_balance,
+                                      account.future_position, account.etf_position, account.profit_or_loss,
+                                      account.total_fees, account.max_drawdown, account.buy_volume,
+                                      account.sell_volume))
 
     def disconnect(self, now: float, name: str, account: CompetitorAccount, future_price: int, etf_price: int) -> None:
         """Create a new disconnect event."""
         if not self.finished:
-            self.queue.put(MatchEvent(now, name, "Disconnect", None, None, None, None, None, 0.0, future_price,
-                                      etf_price, account.account_balance, account.future_position, account.etf_position,
-                                      account.profit_or_loss, account.total_fees, account.max_drawdown,
-                                      account.buy_volume, account.sell_volume))
+            self.events.append(MatchEvent(now, name, "Disconnect", None, None, None, None, None, 0.0, future_price,
+                                          etf_price, account.account_balance, account.future_position,
+                                          account.etf_position, account.profit_or_loss, account.total_fees,
+                                          account.max_drawdown, account.buy_volume, account.sell_volume))
 
     def fill(self, now: float, name: str, account: CompetitorAccount, order: Order, price: int, diff: int, fee: int,
              future_price: int) -> None:
         """Create a new fill event."""
-        self.queue.put(MatchEvent(now, name, "Fill", order.client_order_id, order.side, diff, price, order.lifespan,
-                                  fee, future_price, price, account.account_balance, account.future_position,
-                                  account.etf_position, account.profit_or_loss, account.total_fees,
-                                  account.max_drawdown, account.buy_volume, account.sell_volume))
+        self.events.append(MatchEvent(now, name, "Fill", order.client_order_id, order.side, diff, price, order.lifespan,
+                                      fee, future_price, price, account.account_balance, account.future_position,
+                                      account.etf_position, account.profit_or_loss, account.total_fees,
+                                      account.max_drawdown, account.buy_volume, account.sell_volume))
+
+    def filtered_tick(self, now: float, name: str, account: CompetitorAccount, future_price: int,
+                      etf_price: int) -> None:
+        """Create a new tick event if the recording policy selects it."""
+        count = self.tick_counts.get(name, 0)
+        self.tick_counts[name] = count + 1
+        if count % self.policy.tick_sampling != 0:
+            return
+
+        if self.policy.ticks_on_change_only:
+            state = (account.account_balance, account.future_position, account.etf_position, account.profit_or_loss)
+            if self.last_ticks.get(name) == state:
+                return
+            self.last_ticks[name] = state
+
+        MatchEvents.tick(self, now, name, account, future_price, etf_price)
 
     def finish(self) -> None:
         """Indicate the the series of events is complete."""
+        self.flush()
         self.queue.put(None)
         self.finished = True
 
+    def flush(self) -> None:
+        """Hand the events created since the last flush to the writer thread."""
+        if self.events:
+            self.queue.put(self.events)
+            self.events = list()
+
     def hedge(self, now: float, name: str, account: CompetitorAccount, side: Side, price: int, diff: int,
               future_price: int, etf_price: int) -> None:
         """Create a new fill event."""
-        self.queue.put(MatchEvent(now, name, "Hedge", None, side, diff, price, None, 0.0, future_price, etf_price,
-                                  account.account_balance, account.future_position, account.etf_position,
-                                  account.profit_or_loss, account.total_fees, account.max_drawdown, account.buy_volume,
-                                  account.sell_volume))
+        self.events.append(MatchEvent(now, name, "Hedge", None, side, diff, price, None, 0.0, future_price, etf_price,
+                                      account.account_balance, account.future_position, account.etf_position,
+                                      account.profit_or_loss, account.total_fees, account.max_drawdown,
+                                      account.buy_volume, account.sell_volume))
+
+    def ignore(self, *args) -> None:
+        """Discard an event that the recording policy does not record."""
+        pass
 
     def insert(self, now: float, name: str, account: CompetitorAccount, order: Order, future_price: int,
                etf_price: int) -> None:
         """Create a new insert event."""
-        self.queue.put(MatchEvent(now, name, "Insert", order.client_order_id, order.side, order.remaining_volume,
-                                  order.price, order.lifespan, 0.0, future_price, etf_price, account.account_balance,
-                                  account.future_position, account.etf_position, account.profit_or_loss,
-                                  account.total_fees, account.max_drawdown, account.buy_volume, account.sell_volume))
+        self.events.append(MatchEvent(now, name, "Insert", order.client_order_id, order.side, order.remaining_volume,
+                                      order.price, order.lifespan, 0.0, future_price, etf_price,
+                                      account.account_balance, account.future_position, account.etf_position,
+                                      account.profit_or_loss, account.total_fees, account.max_drawdown,
+                                      account.buy_volume, account.sell_volume))
+
+    def get_events(self) -> Iterator[List[MatchEvent]]:
+        """Yield all of the events waiting in the queue, in one list, each time some are available."""
+        fifo = self.queue
+        while True:
+            batches = [fifo.get()]
+            try:
+                while True:
+                    batches.append(fifo.get_nowait())
+            except queue.Empty:
+                pass
+
+            events: List[MatchEvent] = list()
+            for batch in batches:
+                if batch is None:
+                    if events:
+                        yield events
+                    return
+                events += batch
+            yield events
 
     def on_writer_done(self, num_events: int) -> None:
         """Called when the match event writer thread is done."""
@@ -130,39 +297,59 @@ class MatchEvents(object):
     def start(self):
         """Start the match events writer thread"""
         try:
-            match_events = open(self.filename, "w", newline="")
+            if self.filename.endswith(BINARY_MATCH_EVENTS_EXTENSION):
+                match_events = open(self.filename, "wb", buffering=MATCH_EVENTS_BUFFER_SIZE)
+                writer = self.binary_writer
+            else:
+                match_events = open(self.filename, "w", buffering=MATCH_EVENTS_BUFFER_SIZE, newline="")
+                writer = self.writer
         except IOError as e:
             self.logger.error("failed to open match events file: filename=%s", self.filename, exc_info=e)
             raise
         else:
-            self.writer_task = threading.Thread(target=self.writer, args=(match_events,), daemon=False, name="writer")
+            self.writer_task = threading.Thread(target=writer, args=(match_events,), daemon=False, name="writer")
             self.writer_task.start()
 
     def tick(self, now: float, name: str, account: CompetitorAccount, future_price: int, etf_price: int) -> None:
         """Create a new tick event"""
-        self.queue.put(MatchEvent(now, name, "Tick", None, None, None, None, None, 0.0, future_price, etf_price,
-                                  account.account_balance, account.future_position, account.etf_position,
-                                  account.profit_or_loss, account.total_fees, account.max_drawdown, account.buy_volume,
-                                  account.sell_volume))
+        self.events.append(MatchEvent(now, name, "Tick", None, None, None, None, None, 0.0, future_price, etf_price,
+                                      account.account_balance, account.future_position, account.etf_position,
+                                      account.profit_or_loss, account.total_fees, account.max_drawdown,
+                                      account.buy_volume, account.sell_volume))
+
+    def binary_writer(self, match_events: BinaryIO) -> None:
+        """Fetch match events from a queue and write them to a binary file"""
+        competitors: Dict[str, int] = dict()
+        count = 0
+
+        try:
+            with match_events:
+                match_events.write(BINARY_MATCH_EVENTS_MAGIC)
+                for events in self.get_events():
+                    count += len(events)
+                    records: List[bytes] = list()
+                    for evt in events:
+                        if evt[1] not in competitors:
+                            competitors[evt[1]] = len(competitors)
+                            records.append(BINARY_COMPETITOR.pack(COMPETITOR_OPERATION, competitors[evt[1]],
+                                                                  evt[1].encode()))
+                        records.append(pack_match_event(evt, competitors[evt[1]]))
+                    match_events.write(b"".join(records))
+        finally:
+            if not self.event_loop.is_closed():
+                self.event_loop.call_soon_threadsafe(self.on_writer_done, count)
 
     def writer(self, match_events: TextIO) -> None:
         """Fetch match events from a queue and write them to a file"""
         count = 0
-        fifo = self.queue
 
         try:
             with match_events:
                 csv_writer = csv.writer(match_events)
-                csv_writer.writerow(("Time", "Competitor", "Operation", "OrderId", "Side", "Volume", "Price",
-                                     "Lifespan", "Fee", "FuturePrice", "EtfPrice", "AccountBalance", "FuturePosition",
-                                     "EtfPosition", "ProfitLoss", "TotalFees", "MaxDrawdown", "BuyVolume",
-                                     "SellVolume"))
-
-                evt = fifo.get()
-                while evt is not None:
-                    count += 1
-                    csv_writer.writerow(evt)
-                    evt = fifo.get()
+                csv_writer.writerow(MATCH_EVENTS_CSV_HEADER)
+                for events in self.get_events():
+                    count += len(events)
+                    csv_writer.writerows(events)
         finally:
             if not self.event_loop.is_closed():
                 self.event_loop.call_soon_threadsafe(self.on_writer_done, count)
@@ -1,14 +1,16 @@
 import enum
 import struct
 
-from .order_book import TOP_LEVEL_COUNT
+from .order_book import TOP_LEVELS_MESSAGE
 
 __all__ = ("MessageType", "HEADER", "AMEND_MESSAGE", "CANCEL_MESSAGE", "INSERT_MESSAGE", "ERROR_MESSAGE",
            "LOGIN_MESSAGE", "POSITION_CHANGE_MESSAGE", "ORDER_BOOK_HEADER", "ORDER_BOOK_MESSAGE",
            "ORDER_STATUS_MESSAGE", "TRADE_TICKS_HEADER", "TRADE_TICK", "HEADER_SIZE", "AMEND_MESSAGE_SIZE",
            "CANCEL_MESSAGE_SIZE", "INSERT_MESSAGE_SIZE", "ERROR_MESSAGE_SIZE", "LOGIN_MESSAGE_SIZE",
            "POSITION_CHANGE_MESSAGE_SIZE", "ORDER_BOOK_HEADER_SIZE", "ORDER_BOOK_MESSAGE_SIZE",
-           "ORDER_STATUS_MESSAGE_SIZE", "TRADE_TICKS_HEADER_SIZE", "TRADE_TICK_SIZE")
+           "ORDER_STATUS_MESSAGE_SIZE", "TRADE_TICKS_HEADER_SIZE", "TRADE_TICK_SIZE", "TRADE_TICKS_PART_HEADER",
+           "TRADE_TICKS_PART_HEADER_SIZE", "ORDER_BOOK_DELTA_HEADER", "ORDER_BOOK_DELTA_ENTRY",
+           "ORDER_BOOK_DELTA_HEADER_SIZE", "ORDER_BOOK_DELTA_ENTRY_SIZE", "ORDER_BOOK_DELTA_SNAPSHOT", "TEAM_NAME_SIZE")
 
 
 class MessageType(enum.IntEnum):
@@ -21,6 +23,8 @@ class MessageType(enum.IntEnum):
     ORDER_STATUS = 7
     POSITION_CHANGE = 8
     TRADE_TICKS = 10
+    ORDER_BOOK_DELTA = 11
+    TRADE_TICKS_PART = 12
 
 
 # Standard message header: message length (2 bytes) and type (1 byte)
@@ -30,16 +34,23 @@ HEADER = struct.Struct("!HB")  # Length, message type
 AMEND_MESSAGE = struct.Struct("!II")  # Client order id and new volume
 CANCEL_MESSAGE = struct.Struct("!I")  # Client order id
 INSERT_MESSAGE = struct.Struct("!IBIIB")  # Client order id, side, price, volume and lifespan
-LOGIN_MESSAGE = struct.Struct("!20s50s")  # Name
+TEAM_NAME_SIZE = 20  # Longer team names are truncated when logging in
+LOGIN_MESSAGE = struct.Struct("!%ds50s" % TEAM_NAME_SIZE)  # Name
 
 # Matching engine to auto-trader messages
 ERROR_MESSAGE = struct.Struct("!I50s")  # message
 ORDER_BOOK_HEADER = struct.Struct("!BI")  # Instrument and sequence number
-ORDER_BOOK_MESSAGE = struct.Struct("!%dI" % (4 * TOP_LEVEL_COUNT,))  # Ask prices & volumes and bid prices & volumes
+ORDER_BOOK_MESSAGE = TOP_LEVELS_MESSAGE  # Ask prices & volumes and bid prices & volumes
 ORDER_STATUS_MESSAGE = struct.Struct("!IIIi")  # Client order id, fill volume, remaining volume and fees
 POSITION_CHANGE_MESSAGE = struct.Struct("!ii")  # Future position and ETF position
 TRADE_TICKS_HEADER = struct.Struct("!B")  # Instrument
+TRADE_TICKS_PART_HEADER = struct.Struct("!BIBB")  # Instrument, sequence number, part number and number of parts
 TRADE_TICK = struct.Struct("!II")  # Price and volume
+ORDER_BOOK_DELTA_HEADER = struct.Struct("!BIIBB")  # Instrument, sequence number, feed sequence number, flags and depth
+ORDER_BOOK_DELTA_ENTRY = struct.Struct("!BII")  # Side, price and volume (zero if the level has been removed)
+
+# Order book delta flags
+ORDER_BOOK_DELTA_SNAPSHOT = 1  # The entries replace the whole book rather than changing it
 
 # Cumulative message sizes
 HEADER_SIZE: int = HEADER.size
@@ -55,4 +66,7 @@ ORDER_BOOK_MESSAGE_SIZE: int = ORDER_BOOK_HEADER_SIZE + ORDER_BOOK_MESSAGE.size
 ORDER_STATUS_MESSAGE_SIZE: int = HEADER.size + ORDER_STATUS_MESSAGE.size
 POSITION_CHANGE_MESSAGE_SIZE: int = HEADER.size + POSITION_CHANGE_MESSAGE.size
 TRADE_TICKS_HEADER_SIZE: int = HEADER.size + TRADE_TICKS_HEADER.size
+TRADE_TICKS_PART_HEADER_SIZE: int = HEADER.size + TRADE_TICKS_PART_HEADER.size
 TRADE_TICK_SIZE: int = TRADE_TICK.size
+ORDER_BOOK_DELTA_HEADER_SIZE: int = HEADER.size + ORDER_BOOK_DELTA_HEADER.size
+ORDER_BOOK_DELTA_ENTRY_SIZE: int = ORDER_BOOK_DELTA_ENTRY.size
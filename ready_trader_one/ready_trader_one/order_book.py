@@ -1,7 +1,8 @@
+import struct
+
 from bisect import bisect, insort_left
-import collections
 
-from typing import Deque, Dict, List, Optional
+from typing import Dict, List, Optional
 
 from .types import Instrument, Lifespan, Side
 
@@ -10,6 +11,10 @@ MINIMUM_BID = 0
 MAXIMUM_ASK = 2 ** 32 - 1
 TOP_LEVEL_COUNT = 5
 
+# Ask prices & volumes and bid prices & volumes in the wire format of an order book update message
+TOP_LEVELS_MESSAGE = struct.Struct("!%dI" % (4 * TOP_LEVEL_COUNT,))
+TOP_LEVELS_MESSAGE_SIZE = TOP_LEVELS_MESSAGE.size
+
 
 class IOrderListener(object):
     def on_order_amended(self, now: float, order, volume_removed: int) -> None:
@@ -41,8 +46,8 @@ class ITradeListener(object):
 
 class Order(object):
     """A request to buy or sell at a given price."""
-    __slots__ = ("client_order_id", "instrument", "lifespan", "listener", "price", "remaining_volume", "side",
-                 "total_fees", "volume")
+    __slots__ = ("client_order_id", "instrument", "lifespan", "listener", "next_order", "previous_order", "price",
+                 "remaining_volume", "side", "total_fees", "volume")
 
     def __init__(self, client_order_id: int, instrument: Instrument, lifespan: Lifespan, side: Side, price: int,
                  volume: int, listener: Optional[IOrderListener] = None):
@@ -56,6 +61,8 @@ class Order(object):
         self.total_fees: int = 0
         self.volume: int = volume
         self.listener: IOrderListener = listener
+        self.next_order: Optional[Order] = None
+        self.previous_order: Optional[Order] = None
 
     def __str__(self):
         """Return a string containing a description of this order object."""
@@ -67,24 +74,60 @@ class Order(object):
 
 
 class Level(object):
-    """A collection of orders with the same price arranged in the order they were inserted."""
-    __slots__ = ("order_queue", "total_volume")
+    """A collection of orders with the same price arranged in the order they were inserted.
+
+    The orders form a doubly linked list (using the next_order and
+    previous_order fields of each order) so that an order can be removed from
+    anywhere in the level as soon as its remaining volume reaches zero.
+    """
+    __slots__ = ("first_order", "last_order", "order_count", "total_volume")
 
     def __init__(self):
         """Initialise a new instance of the Level class."""
-        self.order_queue: Deque[Order] = collections.deque()
+        self.first_order: Optional[Order] = None
+        self.last_order: Optional[Order] = None
+        self.order_count: int = 0
         self.total_volume: int = 0
 
     def __str__(self):
         """Return a string containing a description of this level object."""
-        return "{order_count=%d, total_volume=%d}" % (len(self.order_queue), self.total_volume)
+        return "{order_count=%d, total_volume=%d}" % (self.order_count, self.total_volume)
+
+    def append(self, order: Order) -> None:
+        """Add an order to the back of this level."""
+        last = self.last_order
+        order.previous_order = last
+        order.next_order = None
+        if last is None:
+            self.first_order = order
+        else:
+            last.next_order = order
+        self.last_order = order
+        self.order_count += 1
+        self.total_volume += order.remaining_volume
+
+    def remove(self, order: Order) -> None:
+        """Remove an order from this level (the total volume of the level is not changed)."""
+        previous_order = order.previous_order
+        next_order = order.next_order
+        if previous_order is None:
+            self.first_order = next_order
+        else:
+            previous_order.next_order = next_order
+        if next_order is None:
+            self.last_order = previous_order
+        else:
+            next_order.previous_order = previous_order
+        order.next_order = order.previous_order = None
+        self.order_count -= 1
+
 
 # The object returned to us containing order book info
 
 
 class TopLevels(object):
     """The top prices and their respective volumes from an order book."""
-    __slots__ = ("ask_prices", "ask_volumes", "bid_prices", "bid_volumes")
+    __slots__ = ("ask_prices", "ask_volumes", "bid_prices", "bid_volumes", "message")
 
     def __init__(self):
         """Initialise a new instance of the TopLevels class."""
@@ -92,6 +135,7 @@ class TopLevels(object):
         self.ask_volumes: List[int] = [0] * TOP_LEVEL_COUNT
         self.bid_prices: List[int] = [0] * TOP_LEVEL_COUNT
         self.bid_volumes: List[int] = [0] * TOP_LEVEL_COUNT
+        self.message: bytearray = bytearray(TOP_LEVELS_MESSAGE_SIZE)
 
     def __str__(self):
         """Return a string containing a description of this top-levels object."""
@@ -99,21 +143,29 @@ class TopLevels(object):
                 self.bid_prices, self.bid_volumes)
         return "{ask_prices=%s, ask_volumes=%s, bid_prices=%s, bid_volumes=%s}" % args
 
+    def pack(self) -> None:
+        """Pack the prices and volumes into the message field in the wire format of an order book update."""
+        TOP_LEVELS_MESSAGE.pack_into(self.message, 0, *self.ask_prices, *self.ask_volumes, *self.bid_prices,
+                                     *self.bid_volumes)
 
-class OrderBook(object):
-    """A collection of orders arranged by the price-time priority principle."""
+
+class BaseOrderBook(object):
+    """The parts of an order book that do not depend on how its price levels are stored.
+
+    Subclasses keep the price levels and provide fill_depth, insert, place
+    and remove_volume_from_level; trading at a level, amending and
+    cancelling orders and keeping the top levels up to date are shared.
+    """
 
     def __init__(self, instrument: Instrument, listener: Optional[ITradeListener], maker_fee: float, taker_fee: float):
-        """Initialise a new instance of the OrderBook class."""
-        self.__ask_prices: List[int] = [-MAXIMUM_ASK]
-        self.__bid_prices: List[int] = [MINIMUM_BID]
-        self.__instrument: Instrument = instrument
-        self.__last_traded_price: Optional[int] = None
-        self.__levels: Dict[int, Level] = {
-            MINIMUM_BID: Level(), MAXIMUM_ASK: Level()}
-        self.__listener: Optional[ITradeListener] = listener
-        self.__maker_fee: float = maker_fee
-        self.__taker_fee: float = taker_fee
+        """Initialise a new instance of the BaseOrderBook class."""
+        self._instrument: Instrument = instrument
+        self._last_traded_price: Optional[int] = None
+        self._listener: Optional[ITradeListener] = listener
+        self._maker_fee: float = maker_fee
+        self._taker_fee: float = taker_fee
+        self._top_levels: TopLevels = TopLevels()
+        self._top_levels_dirty: bool = True
 
     def amend(self, now: float, order: Order, new_volume: int) -> None:
         """Amend an order in this order book by decreasing its volume."""
@@ -121,12 +173,114 @@ class OrderBook(object):
             fill_volume = order.volume - order.remaining_volume
             diff = order.volume - \
                 (fill_volume if new_volume < fill_volume else new_volume)
-            self.remove_volume_from_level(order.price, diff, order.side)
+            self.remove_volume_from_level(order, diff)
             order.volume -= diff
             order.remaining_volume -= diff
             if order.listener:
                 order.listener.on_order_amended(now, order, diff)
 
+    def cancel(self, now: float, order: Order) -> None:
+        """Cancel an order in this order book."""
+        if order.remaining_volume > 0:
+            self.remove_volume_from_level(order, order.remaining_volume)
+            remaining = order.remaining_volume
+            order.remaining_volume = 0
+            if order.listener:
+                order.listener.on_order_cancelled(now, order, remaining)
+
+    def fill_depth(self, ask_prices: List[int], ask_volumes: List[int], bid_prices: List[int],
+                   bid_volumes: List[int]) -> None:
+        """Fill the lists with the best ask and bid prices and the volume at each, padded with zeros.
+
+        As many levels are filled in as there are items in each list.
+        """
+        raise NotImplementedError()
+
+    def last_traded_price(self) -> Optional[int]:
+        """Return the last traded price."""
+        return self._last_traded_price
+
+    def remove_volume_from_level(self, order: Order, volume: int) -> None:
+        """Remove volume belonging to the specified order from its price level."""
+        raise NotImplementedError()
+
+    def top_levels(self) -> TopLevels:
+        """Return the top levels of this order book.
+
+        The returned TopLevels instance belongs to the order book and is only
+        rebuilt (in place) when a change has touched the top levels since it
+        was last read, so callers should copy any values they wish to keep.
+        """
+        result = self._top_levels
+        if self._top_levels_dirty:
+            self.fill_depth(result.ask_prices, result.ask_volumes, result.bid_prices, result.bid_volumes)
+            result.pack()
+            self._top_levels_dirty = False
+        return result
+
+    def touch_level(self, side: Side, price: int) -> None:
+        """Note that the level at the specified price has changed, which may change the top levels."""
+        if not self._top_levels_dirty:
+            if side == Side.SELL:
+                worst = self._top_levels.ask_prices[-1]
+                self._top_levels_dirty = worst == 0 or price <= worst
+            else:
+                worst = self._top_levels.bid_prices[-1]
+                self._top_levels_dirty = worst == 0 or price >= worst
+
+    def trade_level(self, now: float, order: Order, level: Level, best_price: int) -> None:
+        """Match the specified order with existing orders at the given level."""
+        remaining: int = order.remaining_volume
+        total_volume: int = level.total_volume
+
+        while remaining > 0 and total_volume > 0:
+            passive: Order = level.first_order
+            volume: int = remaining if remaining < passive.remaining_volume else passive.remaining_volume
+            fee: int = round(best_price * volume * self._maker_fee)
+            total_volume -= volume
+            remaining -= volume
+            passive.remaining_volume -= volume
+            passive.total_fees += fee
+            if passive.remaining_volume == 0:
+                level.remove(passive)
+            if passive.listener:
+                passive.listener.on_order_filled(
+                    now, passive, best_price, volume, fee)
+
+        level.total_volume = total_volume
+        self._top_levels_dirty = True
+        traded_volume_at_this_level: int = order.remaining_volume - remaining
+
+        fee: int = round(
+            best_price * traded_volume_at_this_level * self._taker_fee)
+        order.remaining_volume = remaining
+        order.total_fees += fee
+        if order.listener:
+            order.listener.on_order_filled(
+                now, order, best_price, traded_volume_at_this_level, fee)
+
+        self._last_traded_price = best_price
+        if self._listener:
+            self._listener.on_trade(
+                self._instrument, best_price, traded_volume_at_this_level)
+
+    def write_top_levels(self, buffer, offset: int) -> None:
+        """Copy the top levels of this order book into a buffer in the wire format of an order book update."""
+        message = self.top_levels().message
+        buffer[offset:offset + TOP_LEVELS_MESSAGE_SIZE] = message
+
+
+class OrderBook(BaseOrderBook):
+    """A collection of orders arranged by the price-time priority principle."""
+
+    def __init__(self, instrument: Instrument, listener: Optional[ITradeListener], maker_fee: float, taker_fee: float):
+        """Initialise a new instance of the OrderBook class."""
+        super(OrderBook, self).__init__(instrument, listener, maker_fee, taker_fee)
+        self.__ask_prices: List[int] = [-MAXIMUM_ASK]
+        self.__bid_prices: List[int] = [MINIMUM_BID]
+        self.__levels: Dict[int, Level] = {
+            MINIMUM_BID: Level(), MAXIMUM_ASK: Level()}
+
     def best_ask(self) -> int:
         """Return the current best ask price."""
         return -self.__ask_prices[-1]
@@ -135,15 +289,38 @@ class OrderBook(object):
         """Return the current best bid price."""
         return self.__bid_prices[-1]
 
-    def cancel(self, now: float, order: Order) -> None:
-        """Cancel an order in this order book."""
-        if order.remaining_volume > 0:
-            self.remove_volume_from_level(
-                order.price, order.remaining_volume, order.side)
-            remaining = order.remaining_volume
-            order.remaining_volume = 0
-            if order.listener:
-                order.listener.on_order_cancelled(now, order, remaining)
+    def fill_depth(self, ask_prices: List[int], ask_volumes: List[int], bid_prices: List[int],
+                   bid_volumes: List[int]) -> None:
+        """Fill the lists with the best ask and bid prices and the volume at each, padded with zeros.
+
+        As many levels are filled in as there are items in each list.
+        """
+        levels = self.__levels
+        count = len(ask_prices)
+
+        i = 0
+        j = len(self.__ask_prices) - 1
+        while i < count and j > 0:
+            price = -self.__ask_prices[j]
+            ask_prices[i] = price
+            ask_volumes[i] = levels[price].total_volume
+            i += 1
+            j -= 1
+        while i < count:
+            ask_prices[i] = ask_volumes[i] = 0
+            i += 1
+
+        i = 0
+        j = len(self.__bid_prices) - 1
+        while i < count and j > 0:
+            price = self.__bid_prices[j]
+            bid_prices[i] = price
+            bid_volumes[i] = levels[price].total_volume
+            i += 1
+            j -= 1
+        while i < count:
+            bid_prices[i] = bid_volumes[i] = 0
+            i += 1
 
     def insert(self, now: float, order: Order) -> None:
         """Insert a new order into this order book."""
@@ -162,10 +339,6 @@ class OrderBook(object):
             else:
                 self.place(now, order)
 
-    def last_traded_price(self) -> Optional[int]:
-        """Return the last traded price."""
-        return self.__last_traded_price
-
     def midpoint_price(self) -> int:
         """Return the midpoint price."""
         return round((self.__bid_prices[-1] - self.__ask_prices[-1]) / 2.0)
@@ -174,6 +347,8 @@ class OrderBook(object):
         """Place an order that does not match any existing order in this order book."""
         price = order.price
 
+        self.touch_level(order.side, price)
+
         if price not in self.__levels:
             level = self.__levels[price] = Level()
             if order.side == Side.SELL:
@@ -183,45 +358,32 @@ class OrderBook(object):
         else:
             level = self.__levels[price]
 
-        level.order_queue.append(order)
-        level.total_volume += order.remaining_volume
+        level.append(order)
 
         if order.listener:
             order.listener.on_order_placed(now, order)
 
-    def remove_volume_from_level(self, price: int, volume: int, side: Side) -> None:
+    def remove_volume_from_level(self, order: Order, volume: int) -> None:
+        """Remove volume belonging to the specified order from its price level.
+
+        If the order has no volume left it is removed from the level, and if
+        the level has no volume left it is removed from the order book.
+        """
+        price = order.price
         level = self.__levels[price]
 
+        self.touch_level(order.side, price)
+
         if level.total_volume == volume:
             del self.__levels[price]
-            if side == Side.SELL and price < MAXIMUM_ASK:
+            if order.side == Side.SELL and price < MAXIMUM_ASK:
                 self.__ask_prices.pop(bisect(self.__ask_prices, -price) - 1)
-            elif side == Side.BUY and price > MINIMUM_BID:
+            elif order.side == Side.BUY and price > MINIMUM_BID:
                 self.__bid_prices.pop(bisect(self.__bid_prices, price) - 1)
         else:
             level.total_volume -= volume
-
-    def top_levels(self):
-        """Return an instance of TopLevels for this order book."""
-        result = TopLevels()
-
-        i = 0
-        j = len(self.__ask_prices) - 1
-        while i < TOP_LEVEL_COUNT and j > 0:
-            result.ask_prices[i] = -self.__ask_prices[j]
-            result.ask_volumes[i] = self.__levels[result.ask_prices[i]].total_volume
-            i += 1
-            j -= 1
-
-        i = 0
-        j = len(self.__bid_prices) - 1
-        while i < TOP_LEVEL_COUNT and j > 0:
-            result.bid_prices[i] = self.__bid_prices[j]
-            result.bid_volumes[i] = self.__levels[result.bid_prices[i]].total_volume
-            i += 1
-            j -= 1
-
-        return result
+            if order.remaining_volume == volume:
+                level.remove(order)
 
     def trade_ask(self, now: float, order: Order) -> None:
         """Check to see if any existing bid orders match the specified ask order."""
@@ -246,39 +408,3 @@ class OrderBook(object):
                 self.__ask_prices.pop()
                 best_ask = -self.__ask_prices[-1]
                 level = self.__levels[best_ask]
-
-    def trade_level(self, now: float, order: Order, level: Level, best_price: int) -> None:
-        """Match the specified order with existing orders at the given level."""
-        remaining: int = order.remaining_volume
-        order_queue: Deque[Order] = level.order_queue
-        total_volume: int = level.total_volume
-
-        while remaining > 0 and total_volume > 0:
-            while order_queue[0].remaining_volume == 0:
-                order_queue.popleft()
-            passive: Order = order_queue[0]
-            volume: int = remaining if remaining < passive.remaining_volume else passive.remaining_volume
-            fee: int = round(best_price * volume * self.__maker_fee)
-            total_volume -= volume
-            remaining -= volume
-            passive.remaining_volume -= volume
-            passive.total_fees += fee
-            if passive.listener:
-                passive.listener.on_order_filled(
-                    now, passive, best_price, volume, fee)
-
-        level.total_volume = total_volume
-        traded_volume_at_this_level: int = order.remaining_volume - remaining
-
-        fee: int = round(
-            best_price * traded_volume_at_this_level * self.__taker_fee)
-        order.remaining_volume = remaining
-        order.total_fees += fee
-        if order.listener:
-            order.listener.on_order_filled(
-                now, order, best_price, traded_volume_at_this_level, fee)
-
-        self.__last_traded_price = best_price
-        if self.__listener:
-            self.__listener.on_trade(
-                self.__instrument, best_price, traded_volume_at_this_level)
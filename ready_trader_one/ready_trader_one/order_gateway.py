@@ -0,0 +1,245 @@
+import asyncio
+import collections
+
+from typing import Deque, Dict, Optional, Tuple
+
+from .limiter import FrequencyLimiter
+from .types import Lifespan, Side
+
+# The matching engine disconnects an auto-trader that sends more than this many messages in this many seconds
+MESSAGE_FREQUENCY_LIMIT = 20
+MESSAGE_FREQUENCY_INTERVAL = 1.0
+
+# The window used by an order gateway is widened by this many seconds to allow for network jitter
+MESSAGE_FREQUENCY_MARGIN = 0.05
+
+# Kinds of request waiting in an order gateway's queue
+AMEND_REQUEST = 0
+CANCEL_REQUEST = 1
+INSERT_REQUEST = 2
+
+
+def message_frequency_interval(interval: float, speed: float) -> float:
+    """Return the length, by the event loop clock, of an interval used by the matching engine's message limiter.
+
+    The matching engine counts messages against the elapsed market time,
+    which runs speed times faster than the event loop clock, in a window of
+    MessageFrequencyInterval / Speed, so at speeds other than one the window
+    is interval / speed ** 2 by the event loop clock.
+    """
+    return interval / (speed * speed)
+
+
+class GatewayOrder(object):
+    """An order known to an order gateway.
+
+    Orders are identified on the exchange by exchange_id. When a cancel and a
+    re-insert are combined into an amend, the amended order keeps its
+    exchange_id but belongs to the new client_order_id, and fill_offset and
+    fee_offset are the fill volume and fees that belonged to the old order.
+    """
+    __slots__ = ("cancel_sent", "client_order_id", "confirmed", "exchange_id", "fee_offset", "fees", "fill_offset",
+                 "fill_volume", "lifespan", "pending_amend", "pending_cancel", "pending_insert", "price", "side",
+                 "volume")
+
+    def __init__(self, client_order_id: int, side: Side, price: int, volume: int, lifespan: Lifespan):
+        """Initialise a new instance of the GatewayOrder class."""
+        self.cancel_sent: bool = False
+        self.client_order_id: int = client_order_id
+        self.confirmed: bool = False
+        self.exchange_id: int = client_order_id
+        self.fee_offset: int = 0
+        self.fees: int = 0
+        self.fill_offset: int = 0
+        self.fill_volume: int = 0
+        self.lifespan: Lifespan = lifespan
+        self.pending_amend: Optional[int] = None
+        self.pending_cancel: bool = False
+        self.pending_insert: bool = True
+        self.price: int = price
+        self.side: Side = side
+        self.volume: int = volume
+
+
+class OrderGateway(object):
+    """Keep an auto-trader's order requests within the matching engine's message frequency limit.
+
+    Requests are sent straight away while there is room in the rolling window
+    and are otherwise queued and released as soon as they can be sent safely.
+    While requests are queued they are combined where possible:
+
+    * amending or cancelling an order whose insert is still queued changes or
+      drops the insert (a dropped insert is reported as cancelled);
+    * a later amend replaces an earlier queued amend, and a cancel replaces a
+      queued amend;
+    * a repeated cancel is ignored, as is an amend or cancel of an order that
+      has already filled or been cancelled; and
+    * a queued cancel followed by an insert on the same side, at the same
+      price and for no more volume becomes an amend of the existing order,
+      which keeps its place in the queue at that price level. The old order
+      is reported as cancelled and the existing order's later order status
+      messages are reported for the new order.
+
+    The gateway must be used for every order, from the first, as it only
+    knows about the orders it has inserted.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, trader, limit: int = MESSAGE_FREQUENCY_LIMIT,
+                 interval: float = MESSAGE_FREQUENCY_INTERVAL, margin: float = MESSAGE_FREQUENCY_MARGIN):
+        """Initialise a new instance of the OrderGateway class."""
+        self.event_loop: asyncio.AbstractEventLoop = loop
+        self.exchange_orders: Dict[int, GatewayOrder] = dict()
+        self.limiter: FrequencyLimiter = FrequencyLimiter(interval + margin, limit)
+        self.orders: Dict[int, GatewayOrder] = dict()
+        self.queue: Deque[Tuple[int, int]] = collections.deque()
+        self.release_handle: Optional[asyncio.TimerHandle] = None
+        self.trader = trader
+
+    def amend(self, client_order_id: int, volume: int) -> None:
+        """Amend an order, or queue the amend if the message frequency limit would be breached."""
+        order = self.orders.get(client_order_id)
+        if order is None:
+            return
+        if order.pending_insert:
+            if volume <= 0:
+                self.__drop_insert(order)
+            elif volume < order.volume:
+                order.volume = volume
+        elif not order.pending_cancel and not order.cancel_sent:
+            if order.pending_amend is None:
+                self.queue.append((AMEND_REQUEST, order.exchange_id))
+            order.pending_amend = order.fill_offset + volume
+            self.release()
+
+    def cancel(self, client_order_id: int) -> None:
+        """Cancel an order, or queue the cancel if the message frequency limit would be breached."""
+        order = self.orders.get(client_order_id)
+        if order is None:
+            return
+        if order.pending_insert:
+            self.__drop_insert(order)
+        elif not order.pending_cancel and not order.cancel_sent:
+            order.pending_amend = None
+            order.pending_cancel = True
+            self.queue.append((CANCEL_REQUEST, order.exchange_id))
+            self.release()
+
+    def insert(self, client_order_id: int, side: Side, price: int, volume: int, lifespan: Lifespan) -> None:
+        """Insert an order, or queue the insert if the message frequency limit would be breached."""
+        if lifespan == Lifespan.GOOD_FOR_DAY:
+            for old in self.orders.values():
+                if (old.pending_cancel and old.confirmed and old.side == side and old.price == price
+                        and old.lifespan == lifespan and old.fill_volume + volume <= old.volume):
+                    self.__replace(old, client_order_id, volume)
+                    return
+
+        order = GatewayOrder(client_order_id, side, price, volume, lifespan)
+        self.orders[client_order_id] = order
+        self.exchange_orders[client_order_id] = order
+        self.queue.append((INSERT_REQUEST, client_order_id))
+        self.release()
+
+    def on_error(self, client_order_id: int) -> int:
+        """Called when an error message is received and returns the client order id to report it for."""
+        order = self.exchange_orders.get(client_order_id)
+        if order is None:
+            return client_order_id
+        if not order.confirmed and not order.pending_insert:
+            # Every accepted insert is followed by an order status, so this insert was rejected
+            self.__forget(order)
+        return order.client_order_id
+
+    def on_order_status(self, client_order_id: int, fill_volume: int, remaining_volume: int,
+                        fees: int) -> Tuple[int, int, int, int]:
+        """Called when an order status message is received and returns the order status to report."""
+        order = self.exchange_orders.get(client_order_id)
+        if order is None:
+            return client_order_id, fill_volume, remaining_volume, fees
+
+        order.confirmed = True
+        order.fill_volume = fill_volume
+        order.fees = fees
+        if remaining_volume == 0:
+            self.__forget(order)
+        return order.client_order_id, fill_volume - order.fill_offset, remaining_volume, fees - order.fee_offset
+
+    def set_limit(self, limit: int, interval: float, margin: float) -> None:
+        """Change the message frequency limit; this should be done before any messages are sent."""
+        self.limiter = FrequencyLimiter(interval + margin, limit)
+
+    def record_message(self) -> None:
+        """Record a message sent to the matching engine other than through this gateway (e.g. a login)."""
+        self.limiter.check_event(self.event_loop.time())
+
+    def release(self) -> None:
+        """Send as many queued requests as the message frequency limit allows."""
+        if self.release_handle is not None:
+            self.release_handle.cancel()
+            self.release_handle = None
+
+        now = self.event_loop.time()
+        queue = self.queue
+        headroom = self.limiter.headroom(now) if queue else 0
+        while queue and headroom > 0:
+            kind, exchange_id = queue.popleft()
+            order = self.exchange_orders.get(exchange_id)
+            if order is None:
+                continue
+            if kind == INSERT_REQUEST and order.pending_insert:
+                order.pending_insert = False
+                self.__send(now, INSERT_REQUEST, exchange_id, order.side, order.price, order.volume, order.lifespan)
+            elif kind == AMEND_REQUEST and order.pending_amend is not None:
+                volume, order.pending_amend = order.pending_amend, None
+                if volume < order.volume:
+                    order.volume = volume if volume > order.fill_volume else order.fill_volume
+                self.__send(now, AMEND_REQUEST, exchange_id, volume)
+            elif kind == CANCEL_REQUEST and order.pending_cancel:
+                order.pending_cancel = False
+                order.cancel_sent = True
+                self.__send(now, CANCEL_REQUEST, exchange_id)
+            else:
+                continue
+            headroom -= 1
+
+        if queue:
+            self.release_handle = self.event_loop.call_at(self.limiter.next_available_time(now), self.release)
+
+    def __drop_insert(self, order: GatewayOrder) -> None:
+        """Drop an insert that has not been sent and report the order as cancelled."""
+        self.__forget(order)
+        self.event_loop.call_soon(self.trader._on_order_status, order.client_order_id, 0, 0, 0)
+
+    def __forget(self, order: GatewayOrder) -> None:
+        """Stop tracking an order."""
+        self.exchange_orders.pop(order.exchange_id, None)
+        if self.orders.get(order.client_order_id) is order:
+            del self.orders[order.client_order_id]
+
+    def __replace(self, old: GatewayOrder, client_order_id: int, volume: int) -> None:
+        """Turn a queued cancel of an order and an insert into an amend of the order."""
+        self.event_loop.call_soon(self.trader._on_order_status, old.client_order_id,
+                                  old.fill_volume - old.fill_offset, 0, old.fees - old.fee_offset)
+        del self.orders[old.client_order_id]
+
+        old.client_order_id = client_order_id
+        old.fill_offset = old.fill_volume
+        old.fee_offset = old.fees
+        old.pending_cancel = False
+        old.pending_amend = old.fill_volume + volume
+        self.orders[client_order_id] = old
+
+        # The queued cancel becomes the amend
+        for i, (kind, exchange_id) in enumerate(self.queue):
+            if kind == CANCEL_REQUEST and exchange_id == old.exchange_id:
+                self.queue[i] = (AMEND_REQUEST, exchange_id)
+                break
+
+    def __send(self, now: float, kind: int, *args) -> None:
+        """Write a request to the matching engine and record it."""
+        self.limiter.check_event(now)
+        if kind == INSERT_REQUEST:
+            self.trader._write_insert_order(*args)
+        elif kind == AMEND_REQUEST:
+            self.trader._write_amend_order(*args)
+        else:
+            self.trader._write_cancel_order(*args)
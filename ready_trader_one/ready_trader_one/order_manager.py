@@ -0,0 +1,200 @@
+from typing import Dict, List, Optional
+
+from .types import Lifespan, Side
+
+# The limits in the default exchange configuration
+ACTIVE_ORDER_COUNT_LIMIT = 10
+ACTIVE_VOLUME_LIMIT = 200
+POSITION_LIMIT = 100
+
+# Order states
+SLOT_FREE = 0
+SLOT_LIVE = 1
+SLOT_CANCELLING = 2
+
+
+class OrderManager(object):
+    """Track an auto-trader's orders, stored as one list per field.
+
+    Each order occupies a slot from the moment its insert is sent until the
+    matching engine reports that it has no remaining volume (or rejects
+    it), and freed slots are reused. The matching engine processes requests
+    in the order they are sent, so the manager updates its totals as soon as
+    a request is sent: an amend reduces the active volume straight away and
+    a cancelled order no longer counts towards the active order count or
+    volume. A cancelled order still counts towards the worst case position
+    until the matching engine confirms the cancel, because it may be filled
+    in the meantime.
+    """
+
+    def __init__(self, order_count_limit: int = ACTIVE_ORDER_COUNT_LIMIT,
+                 active_volume_limit: int = ACTIVE_VOLUME_LIMIT, position_limit: int = POSITION_LIMIT):
+        """Initialise a new instance of the OrderManager class."""
+        self.active_volume_limit: int = active_volume_limit
+        self.order_count_limit: int = order_count_limit
+        self.position_limit: int = position_limit
+
+        self.client_order_ids: List[int] = list()
+        self.confirmed: List[bool] = list()
+        self.fees: List[int] = list()
+        self.fill_volumes: List[int] = list()
+        self.free_slots: List[int] = list()
+        self.lifespans: List[Lifespan] = list()
+        self.prices: List[int] = list()
+        self.remaining_volumes: List[int] = list()
+        self.sides: List[Side] = list()
+        self.slots: Dict[int, int] = dict()
+        self.states: List[int] = list()
+
+        # Totals over the orders that have not been cancelled
+        self.active_count: int = 0
+        self.active_volume: int = 0
+
+        # Totals over every order, including those waiting for a cancel to be confirmed
+        self.buy_volume: int = 0
+        self.sell_volume: int = 0
+
+        self.position: int = 0
+
+    def __contains__(self, client_order_id: int) -> bool:
+        """Return True if the specified order may still trade."""
+        return client_order_id in self.slots
+
+    def __len__(self) -> int:
+        """Return the number of orders that may still trade."""
+        return len(self.slots)
+
+    def can_insert(self, side: Side, volume: int) -> bool:
+        """Return True if a new order would be within every limit, even if all of the orders were filled."""
+        if side == Side.BUY:
+            exposed = self.position + self.buy_volume + volume > self.position_limit
+        else:
+            exposed = self.position - self.sell_volume - volume < -self.position_limit
+        return not exposed and self.insert_error(volume) is None
+
+    def insert_error(self, volume: int) -> Optional[bytes]:
+        """Return the error with which the matching engine would reject a new order, or None."""
+        if self.active_count >= self.order_count_limit:
+            return b"order rejected: active order count limit breached"
+        if volume < 1:
+            return b"order rejected: invalid volume"
+        if self.active_volume + volume > self.active_volume_limit:
+            return b"order rejected: active order volume limit breached"
+        return None
+
+    def is_cancelling(self, client_order_id: int) -> bool:
+        """Return True if a cancel has been sent for the specified order but not yet confirmed."""
+        slot = self.slots.get(client_order_id)
+        return slot is not None and self.states[slot] == SLOT_CANCELLING
+
+    def is_live(self, client_order_id: int) -> bool:
+        """Return True if the specified order may still trade and has not been cancelled."""
+        slot = self.slots.get(client_order_id)
+        return slot is not None and self.states[slot] == SLOT_LIVE
+
+    def remaining_volume(self, client_order_id: int) -> int:
+        """Return the remaining volume of the specified order, or zero if it is unknown."""
+        slot = self.slots.get(client_order_id)
+        return self.remaining_volumes[slot] if slot is not None else 0
+
+    def on_amend(self, client_order_id: int, volume: int) -> bool:
+        """Called when an amend is about to be sent and returns False if it would have no effect."""
+        slot = self.slots.get(client_order_id)
+        if slot is None or self.states[slot] != SLOT_LIVE:
+            return False
+
+        remaining = volume - self.fill_volumes[slot]
+        if remaining < 0:
+            remaining = 0
+        removed = self.remaining_volumes[slot] - remaining
+        if removed > 0:
+            self.__reduce(slot, removed)
+        return True
+
+    def on_cancel(self, client_order_id: int) -> bool:
+        """Called when a cancel is about to be sent and returns False if it would have no effect."""
+        slot = self.slots.get(client_order_id)
+        if slot is None or self.states[slot] != SLOT_LIVE:
+            return False
+
+        self.states[slot] = SLOT_CANCELLING
+        self.active_count -= 1
+        self.active_volume -= self.remaining_volumes[slot]
+        return True
+
+    def on_error(self, client_order_id: int) -> None:
+        """Called when an error message is received."""
+        slot = self.slots.get(client_order_id)
+        if slot is not None and not self.confirmed[slot]:
+            # Every accepted insert is followed by an order status, so this insert was rejected
+            self.__free(slot)
+
+    def on_insert(self, client_order_id: int, side: Side, price: int, volume: int, lifespan: Lifespan) -> None:
+        """Called when an insert is about to be sent."""
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            self.client_order_ids[slot] = client_order_id
+            self.confirmed[slot] = False
+            self.fees[slot] = 0
+            self.fill_volumes[slot] = 0
+            self.lifespans[slot] = lifespan
+            self.prices[slot] = price
+            self.remaining_volumes[slot] = volume
+            self.sides[slot] = side
+            self.states[slot] = SLOT_LIVE
+        else:
+            slot = len(self.states)
+            self.client_order_ids.append(client_order_id)
+            self.confirmed.append(False)
+            self.fees.append(0)
+            self.fill_volumes.append(0)
+            self.lifespans.append(lifespan)
+            self.prices.append(price)
+            self.remaining_volumes.append(volume)
+            self.sides.append(side)
+            self.states.append(SLOT_LIVE)
+
+        self.slots[client_order_id] = slot
+        self.active_count += 1
+        self.active_volume += volume
+        if side == Side.BUY:
+            self.buy_volume += volume
+        else:
+            self.sell_volume += volume
+
+    def on_order_status(self, client_order_id: int, fill_volume: int, remaining_volume: int, fees: int) -> None:
+        """Called when an order status message is received."""
+        slot = self.slots.get(client_order_id)
+        if slot is None:
+            return
+
+        self.confirmed[slot] = True
+        self.fill_volumes[slot] = fill_volume
+        self.fees[slot] = fees
+        if remaining_volume == 0:
+            self.__free(slot)
+        elif remaining_volume < self.remaining_volumes[slot]:
+            self.__reduce(slot, self.remaining_volumes[slot] - remaining_volume)
+
+    def on_position_change(self, future_position: int, etf_position: int) -> None:
+        """Called when a position change message is received."""
+        self.position = etf_position
+
+    def __free(self, slot: int) -> None:
+        """Remove the order in the specified slot from the totals and free the slot."""
+        self.__reduce(slot, self.remaining_volumes[slot])
+        if self.states[slot] == SLOT_LIVE:
+            self.active_count -= 1
+        self.states[slot] = SLOT_FREE
+        del self.slots[self.client_order_ids[slot]]
+        self.free_slots.append(slot)
+
+    def __reduce(self, slot: int, volume: int) -> None:
+        """Reduce the remaining volume of the order in the specified slot."""
+        self.remaining_volumes[slot] -= volume
+        if self.states[slot] == SLOT_LIVE:
+            self.active_volume -= volume
+        if self.sides[slot] == Side.BUY:
+            self.buy_volume -= volume
+        else:
+            self.sell_volume -= volume
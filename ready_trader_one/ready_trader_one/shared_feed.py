@@ -0,0 +1,217 @@
+import asyncio
+import platform
+import struct
+
+from typing import Optional, Set, Union
+
+from .messages import HEADER
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # Before Python 3.8
+    shared_memory = None
+
+# Magic number, slot count, slot size and the number of messages published
+SHARED_FEED_HEADER = struct.Struct("<8sIIQ")
+SHARED_FEED_HEADER_SIZE = 64
+SHARED_FEED_MAGIC = b"RT1SHM\x00\x01"
+
+# Each slot holds a sequence word (see SharedMemoryPublisher) followed by one information message
+SLOT_SEQUENCE = struct.Struct("<Q")
+SLOT_DATA_SIZE = 512
+SLOT_SIZE = SLOT_SEQUENCE.size + SLOT_DATA_SIZE
+SHARED_FEED_SLOT_COUNT = 1024
+
+# The interval, in seconds, between polls of a shared memory feed
+SHARED_FEED_POLL_INTERVAL = 0.001
+
+# The address reported as the source of messages received from a shared memory feed
+SHARED_FEED_ADDRESS = ("shared_memory", 0)
+
+# The sequence lock protecting each slot is only safe on processors that make stores visible in program order
+SHARED_FEED_MACHINES = ("amd64", "i386", "i686", "x86", "x86_64")
+
+# The names of the shared memory created by publishers in this process
+_created_names: Set[str] = set()
+
+
+def is_shared_feed_available() -> bool:
+    """Return True if shared memory feeds are supported by this version of Python on this processor."""
+    return shared_memory is not None and platform.machine().lower() in SHARED_FEED_MACHINES
+
+
+def attach_shared_memory(name: str):
+    """Attach to existing shared memory without leaving it registered with this process's resource tracker.
+
+    A resource tracker removes the shared memory it knows about when its
+    process exits, which would pull the feed out from under the publisher
+    and any other subscribers (see https://bugs.python.org/issue38119).
+    From Python 3.13 this can be turned off with the track argument; before
+    that, the shared memory is unregistered again straight after it has been
+    attached (only POSIX shared memory is registered), unless it was created
+    by a publisher in this process, whose registration must be left alone
+    so that the publisher can unlink it.
+    """
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:
+        pass
+
+    memory = shared_memory.SharedMemory(name)
+    if getattr(shared_memory, "_USE_POSIX", False) and memory.name not in _created_names:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(memory._name, "shared_memory")
+    return memory
+
+
+class SharedMemoryPublisher(object):
+    """Publish information messages into a ring buffer in shared memory.
+
+    Each slot of the ring is protected by a sequence lock: before message n
+    is written into its slot the slot's sequence word is set to 2n + 1 (an
+    odd number means the slot is being written) and afterwards it is set to
+    2n + 2. A subscriber expecting message n therefore knows that it has read
+    a complete copy if the sequence word is 2n + 2 both before and after it
+    copies the message. This relies on stores to the shared memory becoming
+    visible to other processors in the order they were made. Python cannot
+    insert the memory barriers that would guarantee that, so the feed is only
+    available on x86 processors, which keep stores in order (see
+    is_shared_feed_available).
+    """
+
+    def __init__(self, name: str, slot_count: int = SHARED_FEED_SLOT_COUNT, replace_existing: bool = False):
+        """Initialise a new instance of the SharedMemoryPublisher class.
+
+        If shared memory with the given name already exists it may belong to
+        another exchange, so a FileExistsError is raised unless
+        replace_existing is set, in which case the existing shared memory
+        (e.g. left behind by a match that did not shut down cleanly) is
+        removed first.
+        """
+        if not is_shared_feed_available():
+            raise RuntimeError("shared memory feeds require Python 3.8 or later on an x86 processor")
+
+        size = SHARED_FEED_HEADER_SIZE + slot_count * SLOT_SIZE
+        try:
+            self.shared_memory = shared_memory.SharedMemory(name, create=True, size=size)
+        except FileExistsError:
+            if not replace_existing:
+                raise FileExistsError("shared memory '%s' already exists: it may be in use by another exchange, or "
+                                      "left behind by a match that did not shut down cleanly, in which case it can be "
+                                      "replaced by setting SharedMemoryReplace in the Information configuration"
+                                      % name) from None
+            existing = shared_memory.SharedMemory(name)
+            existing.close()
+            existing.unlink()
+            self.shared_memory = shared_memory.SharedMemory(name, create=True, size=size)
+        _created_names.add(self.shared_memory.name)
+
+        self.buffer: memoryview = self.shared_memory.buf
+        self.count: int = 0
+        self.slot_count: int = slot_count
+        SHARED_FEED_HEADER.pack_into(self.buffer, 0, SHARED_FEED_MAGIC, slot_count, SLOT_SIZE, 0)
+
+    def close(self) -> None:
+        """Close and remove the shared memory."""
+        self.buffer.release()
+        self.shared_memory.close()
+        try:
+            self.shared_memory.unlink()
+        except FileNotFoundError:
+            # Already removed by hand or by another process
+            pass
+        _created_names.discard(self.shared_memory.name)
+
+    def publish(self, message: Union[bytes, bytearray, memoryview]) -> None:
+        """Write a message into the next slot of the ring buffer."""
+        count = self.count
+        buffer = self.buffer
+        offset = SHARED_FEED_HEADER_SIZE + (count % self.slot_count) * SLOT_SIZE
+        SLOT_SEQUENCE.pack_into(buffer, offset, 2 * count + 1)
+        buffer[offset + SLOT_SEQUENCE.size:offset + SLOT_SEQUENCE.size + len(message)] = message
+        SLOT_SEQUENCE.pack_into(buffer, offset, 2 * count + 2)
+        self.count = count + 1
+        SHARED_FEED_HEADER.pack_into(buffer, 0, SHARED_FEED_MAGIC, self.slot_count, SLOT_SIZE, self.count)
+
+
+class SharedMemorySubscriber(object):
+    """Read information messages from a shared memory ring buffer and pass them to a datagram protocol.
+
+    The subscriber starts with the next message to be published. If it falls
+    so far behind that the publisher overwrites a message before it is read,
+    the subscriber skips to the oldest message still available and reports
+    the number of messages it missed to on_messages_missed.
+    """
+
+    def __init__(self, name: str, protocol: asyncio.DatagramProtocol):
+        """Initialise a new instance of the SharedMemorySubscriber class."""
+        if not is_shared_feed_available():
+            raise RuntimeError("shared memory feeds require Python 3.8 or later on an x86 processor")
+
+        self.shared_memory = attach_shared_memory(name)
+
+        self.buffer: memoryview = self.shared_memory.buf
+        magic, self.slot_count, slot_size, self.next = SHARED_FEED_HEADER.unpack_from(self.buffer)
+        if magic != SHARED_FEED_MAGIC or slot_size != SLOT_SIZE:
+            self.close()
+            raise ValueError("'%s' is not a shared memory information feed" % name)
+
+        self.event_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.interval: float = SHARED_FEED_POLL_INTERVAL
+        self.missed: int = 0
+        self.protocol: asyncio.DatagramProtocol = protocol
+
+    def close(self) -> None:
+        """Stop polling and detach from the shared memory."""
+        self.event_loop = None
+        self.buffer.release()
+        self.shared_memory.close()
+
+    def on_messages_missed(self, count: int) -> None:
+        """Called when the publisher has overwritten messages before they were read."""
+        pass
+
+    def poll(self) -> int:
+        """Pass every message published since the last poll to the protocol and return the number of messages."""
+        buffer = self.buffer
+        datagram_received = self.protocol.datagram_received
+        delivered = 0
+        while True:
+            offset = SHARED_FEED_HEADER_SIZE + (self.next % self.slot_count) * SLOT_SIZE
+            expected = 2 * self.next + 2
+            sequence, = SLOT_SEQUENCE.unpack_from(buffer, offset)
+            if sequence == expected:
+                start = offset + SLOT_SEQUENCE.size
+                length, _ = HEADER.unpack_from(buffer, start)
+                message = bytes(buffer[start:start + min(length, SLOT_DATA_SIZE)])
+                sequence, = SLOT_SEQUENCE.unpack_from(buffer, offset)
+                if sequence == expected:
+                    self.next += 1
+                    delivered += 1
+                    datagram_received(message, SHARED_FEED_ADDRESS)
+                    continue
+            if sequence <= expected:
+                return delivered
+
+            # The slot has been reused for a later message
+            count = SHARED_FEED_HEADER.unpack_from(buffer)[3]
+            oldest = count - self.slot_count + 1
+            self.missed += oldest - self.next
+            self.on_messages_missed(oldest - self.next)
+            self.next = oldest
+
+    def start(self, loop: asyncio.AbstractEventLoop, interval: float = SHARED_FEED_POLL_INTERVAL) -> None:
+        """Poll the feed from the event loop every interval seconds, or on every iteration if interval is zero."""
+        self.event_loop = loop
+        self.interval = interval
+        loop.call_soon(self.__on_poll)
+
+    def __on_poll(self) -> None:
+        """Poll the feed and schedule the next poll."""
+        if self.event_loop is None:
+            return
+        self.poll()
+        if self.interval > 0.0:
+            self.event_loop.call_later(self.interval, self.__on_poll)
+        else:
+            self.event_loop.call_soon(self.__on_poll)
@@ -0,0 +1,110 @@
+import concurrent.futures
+import contextlib
+import itertools
+import logging
+import os
+import tempfile
+
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from .application import LOG_FORMAT, load_config
+from .exchange import backtest
+from .market_events import compile_market_data, is_compiled_market_data
+
+# The account fields reported for each set of parameters
+SWEEP_RESULT_FIELDS = ("profit_or_loss", "max_drawdown", "max_profit", "etf_position", "buy_volume", "sell_volume",
+                       "total_fees")
+
+# Compiled market data is written here, if it exists, so that it never has to be read back from disk
+SHARED_MEMORY_DIRECTORY = "/dev/shm"
+
+# Whether this worker process has configured its logging
+_worker_logging_configured = False
+
+
+def configure_worker_logging(log_directory: Optional[str]) -> None:
+    """Send the log records of this worker process to a file of its own in the log directory, or discard them.
+
+    Worker processes share the file logging of the process that started
+    them, so their records would otherwise be interleaved in one file. Only
+    the first call in each worker has any effect.
+    """
+    global _worker_logging_configured
+    if _worker_logging_configured:
+        return
+    _worker_logging_configured = True
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    if log_directory is None:
+        root.addHandler(logging.NullHandler())
+    else:
+        handler = logging.FileHandler(os.path.join(log_directory, "worker%d.log" % os.getpid()))
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        root.addHandler(handler)
+        root.setLevel(logging.INFO)
+
+
+@contextlib.contextmanager
+def shared_market_data(market_data_file: str) -> Iterator[str]:
+    """Yield the name of a compiled copy of the market data that worker processes can share.
+
+    A CSV file is compiled into a temporary file in shared memory (if it is
+    available), which is removed afterwards, while a compiled file is used
+    as it is. The compiled data is memory-mapped by each backtest, so the
+    workers share one copy of it instead of each parsing the CSV file.
+    """
+    with open(market_data_file, "rb") as market_data:
+        compiled = is_compiled_market_data(market_data)
+    if compiled:
+        yield market_data_file
+        return
+
+    directory = SHARED_MEMORY_DIRECTORY if os.path.isdir(SHARED_MEMORY_DIRECTORY) else None
+    handle, compiled_file = tempfile.mkstemp(suffix=".bin", prefix="rt1_market_data_", dir=directory)
+    os.close(handle)
+    try:
+        compile_market_data(market_data_file, compiled_file)
+        yield compiled_file
+    finally:
+        os.remove(compiled_file)
+
+
+def parameter_grid(grid: Mapping[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """Return every combination of the values of the specified parameters."""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def _run_backtest(trader_names: List[str], market_data_file: str, log_directory: Optional[str], name: str,
+                  parameters: Dict[str, Any]) -> Dict[str, int]:
+    """Run a backtest in a worker process and return the named auto-trader's results."""
+    configure_worker_logging(log_directory)
+    account = backtest(trader_names, market_data_file, parameters={name: parameters})[name]
+    return {field: getattr(account, field) for field in SWEEP_RESULT_FIELDS}
+
+
+def sweep(name: str, grid: Iterable[Dict[str, Any]], opponents: Iterable[str] = (),
+          market_data_file: Optional[str] = None, max_workers: Optional[int] = None,
+          log_directory: Optional[str] = None) -> List[Tuple[Dict[str, Any], Dict[str, int]]]:
+    """Backtest the named auto-trader once for each set of parameters in the grid, in parallel.
+
+    Each backtest runs in a worker process, against the same opponents, on
+    the same market data (by default, the exchange configuration's market
+    data file; see shared_market_data). Returns each set of parameters with
+    the auto-trader's results, in the order of the grid.
+
+    If a log directory is given, each worker process writes its log to
+    worker<pid>.log in it; otherwise the workers do not log.
+    """
+    grid = list(grid)
+    trader_names = [name] + [opponent for opponent in opponents if opponent != name]
+    if market_data_file is None:
+        market_data_file = load_config("exchange")["Engine"]["MarketDataFile"]
+
+    with shared_market_data(market_data_file) as compiled_file, \
+            concurrent.futures.ProcessPoolExecutor(max_workers) as executor:
+        results = executor.map(_run_backtest, itertools.repeat(trader_names), itertools.repeat(compiled_file),
+                               itertools.repeat(log_directory), itertools.repeat(name), grid)
+        return list(zip(grid, results))
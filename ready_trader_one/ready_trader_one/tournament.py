@@ -0,0 +1,142 @@
+import concurrent.futures
+import contextlib
+import os
+import random
+
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+from .exchange import backtest
+from .messages import TEAM_NAME_SIZE
+from .sweep import configure_worker_logging, shared_market_data
+
+# The draw of Online Tournament 1: the number of matches in each round and how many teams from each match go through
+# to the next round (zero for the final)
+TOURNAMENT_DRAW = ((16, 3), (8, 4), (4, 4), (2, 4), (1, 0))
+
+
+class MatchResult(object):
+    """The result of one match in a tournament."""
+    __slots__ = ("failures", "match_number", "qualified", "round_number", "standings")
+
+    def __init__(self, round_number: int, match_number: int, standings: List[Tuple[str, int]], qualified: int,
+                 failures: Optional[Dict[str, str]] = None):
+        """Initialise a new instance of the MatchResult class.
+
+        Standings gives the final profit or loss of each team that played,
+        best first, and failures gives the reason each other team in the
+        match did not play. Teams that did not play are placed below those
+        that did and never go through to the next round.
+        """
+        self.failures: Dict[str, str] = failures if failures is not None else dict()
+        self.match_number: int = match_number
+        self.qualified: int = qualified
+        self.round_number: int = round_number
+        self.standings: List[Tuple[str, int]] = standings
+
+    @property
+    def qualifiers(self) -> List[str]:
+        """The teams that go through to the next round."""
+        return [team for team, _ in self.standings[:self.qualified]]
+
+
+def draw_matches(teams: Sequence[str], match_count: int, rng: random.Random) -> List[List[str]]:
+    """Draw the teams at random into the specified number of matches of as nearly equal size as possible.
+
+    There are never fewer than two teams in a match, so if there are too few
+    teams for the number of matches, fewer matches are drawn.
+    """
+    teams = list(teams)
+    rng.shuffle(teams)
+    match_count = max(1, min(match_count, len(teams) // 2))
+    return [teams[i::match_count] for i in range(match_count)]
+
+
+def _run_match(teams: Dict[str, str], market_data_file: str, match_events_file: Optional[str],
+               log_directory: Optional[str]) -> Tuple[List[Tuple[str, int]], Dict[str, str]]:
+    """Play a match in a worker process and return the standings and the reason any team did not play.
+
+    The standings give each team's final profit or loss, best first. A team
+    whose auto-trader cannot be imported or created does not play and a
+    team that never logs in to the exchange is recorded as a failure too.
+    """
+    configure_worker_logging(log_directory)
+
+    failures: Dict[str, str] = dict()
+    try:
+        accounts = backtest(list(teams), market_data_file, match_events_file, modules=teams, failures=failures)
+    except Exception as e:
+        accounts = dict()
+        failures.update((team, "match failed: %s" % e) for team in teams if team not in failures)
+
+    for team in teams:
+        if team not in accounts and team not in failures:
+            failures[team] = "did not log in"
+
+    standings = [(team, accounts[team].profit_or_loss) for team in teams if team in accounts]
+    standings.sort(key=lambda standing: -standing[1])
+    return standings, failures
+
+
+def run_tournament(teams: Mapping[str, str], market_data_files: Sequence[str],
+                   draw: Sequence[Tuple[int, int]] = TOURNAMENT_DRAW, max_workers: Optional[int] = None,
+                   match_events_directory: Optional[str] = None, seed: int = 0,
+                   log_directory: Optional[str] = None) -> List[List[MatchResult]]:
+    """Play a knockout tournament between the specified teams and return the results of each round.
+
+    Teams maps each team name to the python module of its auto-trader. In
+    each round the remaining teams are drawn at random into the number of
+    matches given by the draw and the matches are played at the same time
+    in worker processes. Each match is a backtest, with the auto-traders
+    connected by in-process transports, so no network ports are needed. The
+    best teams from each match, by final profit or loss (the last ProfitLoss
+    in its match events), go through to the next round. The tournament ends
+    after the last round of the draw or when one team is left. A team whose
+    auto-trader cannot be loaded or does not log in is recorded in its
+    match's failures and knocked out.
+
+    The rounds are played on each of the market data files in turn. If a
+    match events directory is given, the match events of match m are
+    written to match<m>.csv in it. If a log directory is given, each worker
+    process writes its log to a file of its own in it (see
+    configure_worker_logging).
+
+    A ValueError is raised, before any match is played, if a team name is
+    too long to log in with.
+    """
+    too_long = [team for team in teams if len(team.encode()) > TEAM_NAME_SIZE]
+    if too_long:
+        raise ValueError("team names may be at most %d bytes long: %s" % (TEAM_NAME_SIZE, ", ".join(too_long)))
+
+    rng = random.Random(seed)
+    remaining: List[str] = list(teams)
+    rounds: List[List[MatchResult]] = list()
+    match_number = 0
+
+    with contextlib.ExitStack() as stack:
+        compiled_files = [stack.enter_context(shared_market_data(f)) for f in market_data_files]
+        executor = stack.enter_context(concurrent.futures.ProcessPoolExecutor(max_workers))
+
+        for round_number, (match_count, qualified) in enumerate(draw, 1):
+            if len(remaining) < 2:
+                break
+
+            market_data_file = compiled_files[(round_number - 1) % len(compiled_files)]
+            futures = list()
+            for match in draw_matches(remaining, match_count, rng):
+                match_number += 1
+                match_events_file = None
+                if match_events_directory is not None:
+                    match_events_file = os.path.join(match_events_directory, "match%d.csv" % match_number)
+                future = executor.submit(_run_match, {team: teams[team] for team in match}, market_data_file,
+                                         match_events_file, log_directory)
+                futures.append((match_number, future))
+
+            # The winner of the final is the only team to go through
+            results = list()
+            for number, future in futures:
+                standings, failures = future.result()
+                results.append(MatchResult(round_number, number, standings, qualified or 1, failures))
+            rounds.append(results)
+            remaining = [team for result in results for team in result.qualifiers]
+
+    return rounds
@@ -3,10 +3,11 @@ import importlib
 import socket
 import sys
 
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
-from .application import Application
+from .application import Application, load_config
 from .base_auto_trader import BaseAutoTrader
+from .shared_feed import SHARED_FEED_POLL_INTERVAL, SharedMemorySubscriber, is_shared_feed_available
 from .util import create_datagram_endpoint
 
 
@@ -43,6 +44,16 @@ def __config_validator(config):
     __validate_json_object(config, "Information", ("AllowBroadcast", "Interface", "ListenAddress", "Port"),
                            (bool, str, str, int))
 
+    if "SharedMemoryName" in config["Information"]:
+        if type(config["Information"]["SharedMemoryName"]) is not str:
+            raise Exception("SharedMemoryName in Information configuration should be a string")
+        if not is_shared_feed_available():
+            raise Exception("SharedMemoryName in Information configuration requires Python 3.8 or later on an "
+                            "x86 processor")
+    poll_interval = config["Information"].get("SharedMemoryPollInterval", SHARED_FEED_POLL_INTERVAL)
+    if type(poll_interval) is not float or poll_interval < 0.0:
+        raise Exception("SharedMemoryPollInterval in Information configuration should be a non-negative number")
+
     __validate_hostname(config, "Execution", "Host")
     __validate_hostname(config, "Information", "Interface")
     __validate_hostname(config, "Information", "ListenAddress")
@@ -64,9 +75,15 @@ async def __start_autotrader(auto_trader: BaseAutoTrader, config: Dict[str, Any]
                              loop: asyncio.AbstractEventLoop) -> None:
     """Initialise an auto-trader."""
     info = config["Information"]
-    info_channel, _ = await create_datagram_endpoint(loop, lambda: auto_trader, (info["ListenAddress"], info["Port"]),
-                                                     family=socket.AF_INET, allow_broadcast=info["AllowBroadcast"],
-                                                     interface=info["Interface"])
+    if "SharedMemoryName" in info:
+        info_channel = None
+        subscriber = SharedMemorySubscriber(info["SharedMemoryName"], auto_trader)
+        subscriber.start(loop, info.get("SharedMemoryPollInterval", SHARED_FEED_POLL_INTERVAL))
+    else:
+        info_channel, _ = await create_datagram_endpoint(loop, lambda: auto_trader,
+                                                         (info["ListenAddress"], info["Port"]), family=socket.AF_INET,
+                                                         allow_broadcast=info["AllowBroadcast"],
+                                                         interface=info["Interface"])
 
     exec_ = config["Execution"]
     exec_channel, _ = await loop.create_connection(lambda: auto_trader, exec_["Host"], exec_["Port"])
@@ -74,13 +91,24 @@ async def __start_autotrader(auto_trader: BaseAutoTrader, config: Dict[str, Any]
     auto_trader.set_transports(exec_channel, info_channel)
 
 
-def main(name: str = "autotrader") -> None:
-    """Import the 'AutoTrader' class from the named module a run it."""
-    app = Application(name, __config_validator)
+def create(name: str, loop: asyncio.AbstractEventLoop, config: Optional[Dict[str, Any]] = None) -> BaseAutoTrader:
+    """Import the 'AutoTrader' class from the named module and create an instance of it.
+
+    If no configuration is supplied, it is read from the auto-trader's JSON
+    configuration file.
+    """
+    if config is None:
+        config = load_config(name, __config_validator)
 
     mod = importlib.import_module(name)
-    auto_trader = mod.AutoTrader(app.event_loop)
-    auto_trader.set_team_name(app.config["TeamName"], app.config["Secret"])
+    auto_trader = mod.AutoTrader(loop)
+    auto_trader.set_team_name(config["TeamName"], config["Secret"])
+    return auto_trader
 
+
+def main(name: str = "autotrader") -> None:
+    """Import the 'AutoTrader' class from the named module a run it."""
+    app = Application(name, __config_validator)
+    auto_trader = create(name, app.event_loop, app.config)
     app.event_loop.create_task(__start_autotrader(auto_trader, app.config, app.event_loop))
     app.run()
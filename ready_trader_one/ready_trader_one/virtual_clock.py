@@ -0,0 +1,84 @@
+import asyncio
+import selectors
+
+from typing import Callable, List, Mapping, Optional, Tuple
+
+# The virtual clock starts here rather than at zero because a start time of
+# zero means 'not started' elsewhere. Keeping the clock well above the length
+# of a match also means that 'when - time' is computed exactly, so advancing
+# the clock by a timeout lands exactly on the deadline of the next timer.
+VIRTUAL_CLOCK_EPOCH = 1000000.0
+
+
+class VirtualClockSelector(selectors.BaseSelector):
+    """A selector that advances a virtual clock instead of waiting.
+
+    When asked to wait for a finite time and no file objects are ready, the
+    selector returns immediately after advancing the virtual clock by the
+    timeout. It only blocks when asked to wait indefinitely, which happens
+    when the event loop has nothing scheduled and is waiting for another
+    thread or process.
+    """
+
+    def __init__(self, selector: selectors.BaseSelector, advance: Callable[[float], None]):
+        """Initialise a new instance of the VirtualClockSelector class."""
+        self.__advance: Callable[[float], None] = advance
+        self.__selector: selectors.BaseSelector = selector
+
+    def close(self) -> None:
+        """Close the underlying selector."""
+        self.__selector.close()
+
+    def get_key(self, fileobj) -> selectors.SelectorKey:
+        """Return the key associated with a registered file object."""
+        return self.__selector.get_key(fileobj)
+
+    def get_map(self) -> Mapping:
+        """Return a mapping of file objects to selector keys."""
+        return self.__selector.get_map()
+
+    def modify(self, fileobj, events, data=None) -> selectors.SelectorKey:
+        """Change a registered file object's monitored events or attached data."""
+        return self.__selector.modify(fileobj, events, data)
+
+    def register(self, fileobj, events, data=None) -> selectors.SelectorKey:
+        """Register a file object for selection."""
+        return self.__selector.register(fileobj, events, data)
+
+    def select(self, timeout: Optional[float] = None) -> List[Tuple[selectors.SelectorKey, int]]:
+        """Return the file objects that are ready, advancing the virtual clock if there are none."""
+        if timeout is None:
+            return self.__selector.select(None)
+
+        ready = self.__selector.select(0)
+        if not ready and timeout > 0:
+            self.__advance(timeout)
+        return ready
+
+    def unregister(self, fileobj) -> selectors.SelectorKey:
+        """Unregister a file object."""
+        return self.__selector.unregister(fileobj)
+
+
+class VirtualClockEventLoop(asyncio.SelectorEventLoop):
+    """An event loop that runs on a virtual clock.
+
+    Whenever there is nothing ready to run, the clock jumps straight to the
+    next scheduled callback, so timers fire in the same order as they would in
+    real time but without any waiting. Results are only deterministic if
+    everything that talks to the event loop (e.g. the auto-traders) runs in
+    the same event loop.
+    """
+
+    def __init__(self, epoch: float = VIRTUAL_CLOCK_EPOCH):
+        """Initialise a new instance of the VirtualClockEventLoop class."""
+        self.__time: float = epoch
+        super().__init__(VirtualClockSelector(selectors.DefaultSelector(), self.advance))
+
+    def advance(self, seconds: float) -> None:
+        """Advance the virtual clock by the specified number of seconds."""
+        self.__time += seconds
+
+    def time(self) -> float:
+        """Return the current time according to the virtual clock."""
+        return self.__time
@@ -1,6 +1,6 @@
 import concurrent.futures
 import functools
-import time
+import multiprocessing
 import traceback
 import sys
 
@@ -24,14 +24,16 @@ def main():
     # add it to the 'Traders' section of the exchange.json file.
     trader_names = ["autotrader", "example1", "example2"]
 
-    with concurrent.futures.ProcessPoolExecutor(max_workers=len(trader_names) + 1) as executor:
-        exchange = executor.submit(ready_trader_one.exchange.main)
+    with multiprocessing.Manager() as manager, \
+            concurrent.futures.ProcessPoolExecutor(max_workers=len(trader_names) + 1) as executor:
+        ready = manager.Event()
+        exchange = executor.submit(ready_trader_one.exchange.main, ready)
         exchange.add_done_callback(functools.partial(__on_task_completed, name="exchange", executor=executor))
 
-        # Give the exchange time to start up.
-        time.sleep(0.5)
-        if exchange.done():
-            return
+        # Wait until the exchange is ready for the auto-traders to connect.
+        while not ready.wait(0.1):
+            if exchange.done():
+                return
 
         traders = [executor.submit(ready_trader_one.trader.main, name) for name in trader_names]
         for name, task in zip(trader_names, traders):
@@ -0,0 +1,14 @@
+import ready_trader_one.exchange
+
+
+def main():
+    """Run a match in this process using a virtual clock."""
+    # To add another auto-trader add its python module name to this list and
+    # add it to the 'Traders' section of the exchange.json file.
+    trader_names = ["autotrader", "example1", "example2"]
+
+    ready_trader_one.exchange.simulate(trader_names)
+
+
+if __name__ == "__main__":
+    main()
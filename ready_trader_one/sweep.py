@@ -0,0 +1,64 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+from ready_trader_one.sweep import SWEEP_RESULT_FIELDS, parameter_grid, sweep
+
+
+def parse_parameter(text: str):
+    """Parse a 'name=value,value,...' argument into a name and a list of values."""
+    name, _, values = text.partition("=")
+    if not name or not values:
+        raise argparse.ArgumentTypeError("parameters should be given as name=value,value,...")
+    try:
+        return name, [json.loads(value) for value in values.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError("parameter values should be numbers, strings in quotes, true or false")
+
+
+def main():
+    """Backtest an auto-trader with every combination of a set of parameter values and print the results."""
+    parser = argparse.ArgumentParser(description="Backtest an auto-trader over a grid of parameter values.")
+    parser.add_argument("trader", help="python module name of the auto-trader (e.g. autotrader)")
+    parser.add_argument("--param", action="append", type=parse_parameter, default=[], metavar="NAME=VALUES",
+                        help="an attribute of the auto-trader and a comma-separated list of values to try "
+                             "(e.g. order_volume=1,2,5); may be repeated")
+    parser.add_argument("--opponent", action="append", default=[], metavar="TRADER",
+                        help="python module name of an opponent auto-trader; may be repeated")
+    parser.add_argument("--market-data", help="market data file (default: the MarketDataFile in exchange.json)")
+    parser.add_argument("--workers", type=int, help="number of worker processes (default: one per CPU)")
+    parser.add_argument("--output", help="also write the results to this CSV file")
+    parser.add_argument("--logs", metavar="DIRECTORY",
+                        help="directory in which each worker process writes its own log (default: no logs)")
+    args = parser.parse_args()
+
+    if args.logs:
+        os.makedirs(args.logs, exist_ok=True)
+
+    names = [name for name, _ in args.param]
+    start = time.perf_counter()
+    results = sweep(args.trader, parameter_grid(dict(args.param)), args.opponent, args.market_data, args.workers,
+                    args.logs)
+    elapsed = time.perf_counter() - start
+
+    rows = [[parameters[name] for name in names] + [result[field] for field in SWEEP_RESULT_FIELDS]
+            for parameters, result in sorted(results, key=lambda item: -item[1]["profit_or_loss"])]
+    header = names + list(SWEEP_RESULT_FIELDS)
+
+    writer = csv.writer(sys.stdout, delimiter="\t")
+    writer.writerow(header)
+    writer.writerows(rows)
+    print("%d backtests completed in %.1f seconds" % (len(results), elapsed))
+
+    if args.output:
+        with open(args.output, "w", newline="") as output:
+            writer = csv.writer(output)
+            writer.writerow(header)
+            writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    main()
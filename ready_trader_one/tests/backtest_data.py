@@ -0,0 +1,65 @@
+import csv
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+
+# The example auto-traders and the exchange configuration are in the project directory
+PROJECT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_DIRECTORY not in sys.path:
+    sys.path.insert(0, PROJECT_DIRECTORY)
+
+
+def write_market_data(filename: str, seed: int = 1, duration: float = 30.0) -> None:
+    """Write a market data CSV file of random good-for-day orders, some of which trade, around a drifting price."""
+    rng = random.Random(seed)
+    live_orders = ([], [])
+    order_id = 0
+    price = 10000
+    time = 0.0
+
+    with open(filename, "w", newline="") as market_data:
+        writer = csv.writer(market_data)
+        writer.writerow(("Time", "Instrument", "Operation", "OrderId", "Side", "Volume", "Price", "Lifespan"))
+        while time < duration:
+            time += rng.uniform(0.005, 0.05)
+            price += rng.choice((-1, 0, 0, 1))
+            instrument = rng.randrange(2)
+            orders = live_orders[instrument]
+            if orders and rng.random() < 0.3:
+                writer.writerow(("%.6f" % time, instrument, "Cancel", orders.pop(rng.randrange(len(orders))), "",
+                                 "", "", ""))
+                continue
+
+            order_id += 1
+            side = rng.choice("AB")
+            if rng.random() < 0.2:
+                order_price = price + (3 if side == "B" else -3)
+            else:
+                order_price = price + (rng.randrange(1, 6) if side == "A" else -rng.randrange(1, 6))
+            orders.append(order_id)
+            writer.writerow(("%.6f" % time, instrument, "Insert", order_id, side, "%.1f" % rng.randrange(1, 50),
+                             "%.2f" % order_price, "GFD"))
+
+
+class BacktestTestCase(unittest.TestCase):
+    """Run each test in a temporary directory holding random market data and the exchange configuration."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.working_directory = os.getcwd()
+        os.chdir(self.directory)
+
+        with open(os.path.join(PROJECT_DIRECTORY, "exchange.json")) as config_file:
+            config = json.load(config_file)
+        config["Engine"]["MarketDataFile"] = self.market_data_file = os.path.join(self.directory, "market_data.csv")
+        with open("exchange.json", "w") as config_file:
+            json.dump(config, config_file)
+        write_market_data(self.market_data_file)
+
+    def tearDown(self):
+        os.chdir(self.working_directory)
+        shutil.rmtree(self.directory)
@@ -0,0 +1,72 @@
+import random
+import unittest
+
+from ready_trader_one.account import ACCOUNT_FIELDS, LEDGER_INITIAL_CAPACITY, AccountLedger, CompetitorAccount
+from ready_trader_one.types import Instrument, Side
+
+
+class AccountLedgerTest(unittest.TestCase):
+    """Check that marking the whole ledger to market matches marking each account separately."""
+
+    def test_mark_to_market(self):
+        rng = random.Random(42)
+        ledger = AccountLedger(1.0, 0.002)
+        shared = [CompetitorAccount(1.0, 0.002, ledger) for _ in range(8)]
+        separate = [CompetitorAccount(1.0, 0.002) for _ in range(8)]
+        self.assertEqual(len(ledger), 8)
+
+        for _ in range(500):
+            i = rng.randrange(8)
+            instrument = rng.choice((Instrument.FUTURE, Instrument.ETF))
+            side = rng.choice((Side.BUY, Side.SELL))
+            price = rng.randrange(9900, 10100) * 100
+            volume = rng.randrange(1, 20)
+            fee = rng.randrange(-50, 100)
+            shared[i].transact(instrument, side, price, volume, fee)
+            separate[i].transact(instrument, side, price, volume, fee)
+
+            # Prices either side of the clamp are included
+            future_price = rng.randrange(9950, 10050) * 100
+            etf_price = future_price + rng.randrange(-40, 40) * 100
+            ledger.mark_to_market(future_price, etf_price)
+            for account in separate:
+                account.mark_to_market(future_price, etf_price)
+
+            for a, b in zip(shared, separate):
+                self.assertEqual([getattr(a, field) for field in ACCOUNT_FIELDS],
+                                 [getattr(b, field) for field in ACCOUNT_FIELDS])
+
+    def test_growth(self):
+        ledger = AccountLedger(1.0, 0.002)
+        accounts = [CompetitorAccount(1.0, 0.002, ledger) for _ in range(2 * LEDGER_INITIAL_CAPACITY + 1)]
+        self.assertEqual(len(ledger), len(accounts))
+        self.assertEqual([account.index for account in accounts], list(range(len(accounts))))
+
+        # Accounts added after the columns grew are independent of the others and hold plain integers
+        accounts[-1].transact(Instrument.ETF, Side.BUY, 1000000, 2, 4)
+        ledger.mark_to_market(1000000, 1000100)
+        self.assertEqual(accounts[-1].etf_position, 2)
+        self.assertEqual(accounts[-1].profit_or_loss, 196)
+        self.assertEqual(sum(account.etf_position for account in accounts), 2)
+        for field in ACCOUNT_FIELDS:
+            self.assertIs(type(getattr(accounts[-1], field)), int)
+
+    def test_clamp_etf_price(self):
+        ledger = AccountLedger(1.0, 0.002)
+        self.assertEqual(ledger.clamp_etf_price(1000000, 1000100), 1000100)
+        self.assertEqual(ledger.clamp_etf_price(1000000, 1003000), 1002000)
+        self.assertEqual(ledger.clamp_etf_price(1000000, 990000), 998000)
+
+    def test_transact(self):
+        account = CompetitorAccount(1.0, 0.002)
+        account.transact(Instrument.ETF, Side.BUY, 10000, 3, 6)
+        account.transact(Instrument.FUTURE, Side.SELL, 10100, 3, 0)
+        account.mark_to_market(10100, 10300)
+        self.assertEqual((account.account_balance, account.etf_position, account.future_position,
+                          account.buy_volume, account.sell_volume, account.total_fees),
+                         (-30006 + 30300, 3, -3, 3, 0, 6))
+        self.assertEqual(account.profit_or_loss, 294 - 30300 + 3 * 10100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import asyncio
+import unittest
+
+import backtest_data  # Puts the example auto-traders on the path
+from ready_trader_one.messages import *
+from ready_trader_one.types import Instrument, Lifespan, Side
+
+import autotrader
+
+
+class RecordingTransport(object):
+    """Record the order requests written by an auto-trader."""
+
+    def __init__(self):
+        self.requests = list()
+
+    def write(self, data: bytes) -> None:
+        length, typ = HEADER.unpack_from(data)
+        if typ == MessageType.CANCEL_ORDER:
+            self.requests.append(("cancel",) + CANCEL_MESSAGE.unpack_from(data, HEADER_SIZE))
+        elif typ == MessageType.INSERT_ORDER:
+            self.requests.append(("insert",) + INSERT_MESSAGE.unpack_from(data, HEADER_SIZE))
+        else:
+            self.requests.append((MessageType(typ).name.lower(),))
+
+
+class AutoTraderTest(unittest.TestCase):
+    """Check the quoting of the auto-trader, which keeps track of its orders with the order manager."""
+
+    def setUp(self):
+        self.event_loop = asyncio.new_event_loop()
+        self.trader = autotrader.AutoTrader(self.event_loop)
+        self.transport = RecordingTransport()
+        self.trader.execution = self.transport
+
+    def tearDown(self):
+        self.event_loop.close()
+
+    def book_update(self, bid_price: int, ask_price: int) -> None:
+        self.trader.on_order_book_update_message(Instrument.ETF, 1, [ask_price, 0, 0, 0, 0], [10, 0, 0, 0, 0],
+                                                 [bid_price, 0, 0, 0, 0], [10, 0, 0, 0, 0])
+
+    def test_requote_after_cancel(self):
+        self.book_update(10000, 10200)
+        self.assertEqual(self.transport.requests,
+                         [("insert", 1, Side.BUY, 10100, 1, Lifespan.GOOD_FOR_DAY),
+                          ("insert", 2, Side.SELL, 10100, 1, Lifespan.GOOD_FOR_DAY)])
+
+        # When the price moves, both quotes are cancelled and replaced in the same book update
+        del self.transport.requests[:]
+        self.book_update(10200, 10400)
+        self.assertEqual(self.transport.requests,
+                         [("cancel", 1), ("cancel", 2),
+                          ("insert", 3, Side.BUY, 10300, 1, Lifespan.GOOD_FOR_DAY),
+                          ("insert", 4, Side.SELL, 10300, 1, Lifespan.GOOD_FOR_DAY)])
+
+    def test_unchanged_price(self):
+        self.book_update(10000, 10200)
+        del self.transport.requests[:]
+        self.book_update(10000, 10200)
+        self.assertEqual(self.transport.requests, [])
+
+    def test_requote_after_fill(self):
+        self.book_update(10000, 10200)
+        del self.transport.requests[:]
+
+        # A quote that has been completely filled is replaced at the next book update, even at the same price
+        self.trader.data_received(HEADER.pack(ORDER_STATUS_MESSAGE_SIZE, MessageType.ORDER_STATUS)
+                                  + ORDER_STATUS_MESSAGE.pack(1, 1, 0, 0))
+        self.book_update(10000, 10200)
+        self.assertEqual(self.transport.requests, [("insert", 3, Side.BUY, 10100, 1, Lifespan.GOOD_FOR_DAY)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import asyncio
+import csv
+import os
+import unittest
+
+from backtest_data import BacktestTestCase
+from ready_trader_one.account import ACCOUNT_FIELDS
+from ready_trader_one.exchange import backtest
+
+TRADERS = ["autotrader", "example1", "example2"]
+
+
+class BacktestTest(BacktestTestCase):
+    """Check that a backtest plays the auto-traders against the market data and returns their accounts."""
+
+    def test_backtest(self):
+        accounts = backtest(TRADERS, match_events_file="match_events.csv")
+        self.assertEqual(sorted(accounts), sorted(TRADERS))
+        self.assertTrue(any(account.buy_volume + account.sell_volume for account in accounts.values()))
+
+        # The accounts agree with the last match event of each auto-trader
+        with open("match_events.csv", newline="") as match_events:
+            last = {row["Competitor"]: row for row in csv.DictReader(match_events)}
+        for name, account in accounts.items():
+            self.assertEqual(round(float(last[name]["ProfitLoss"]) * 100), account.profit_or_loss)
+            self.assertEqual(int(last[name]["EtfPosition"]), account.etf_position)
+
+        # A backtest is repeatable
+        again = backtest(TRADERS)
+        for name, account in accounts.items():
+            self.assertEqual([getattr(account, field) for field in ACCOUNT_FIELDS],
+                             [getattr(again[name], field) for field in ACCOUNT_FIELDS])
+
+    def test_leaves_process_alone(self):
+        event_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(event_loop)
+        try:
+            backtest(TRADERS)
+            self.assertIs(asyncio.get_event_loop(), event_loop)
+            self.assertFalse(event_loop.is_closed())
+        finally:
+            asyncio.set_event_loop(None)
+            event_loop.close()
+        self.assertFalse(os.path.exists("exchange.log"))
+
+    def test_market_data_file(self):
+        with open("empty.csv", "w") as market_data:
+            market_data.write("Time,Instrument,Operation,OrderId,Side,Volume,Price,Lifespan\n")
+        accounts = backtest(TRADERS, "empty.csv")
+        self.assertTrue(all(account.buy_volume == account.sell_volume == 0 for account in accounts.values()))
+
+    def test_modules_and_parameters(self):
+        accounts = backtest(["first", "second"], modules={"first": "autotrader", "second": "autotrader"},
+                            parameters={"second": {"order_volume": 2}})
+        self.assertEqual(sorted(accounts), ["first", "second"])
+
+        with self.assertRaises(Exception):
+            backtest(["autotrader"], parameters={"autotrader": {"no_such_parameter": 1}})
+
+    def test_failures(self):
+        failures = dict()
+        accounts = backtest(["autotrader", "no_such_trader"], failures=failures)
+        self.assertEqual(list(accounts), ["autotrader"])
+        self.assertEqual(list(failures), ["no_such_trader"])
+
+        with self.assertRaises(ImportError):
+            backtest(["autotrader", "no_such_trader"])
+        with self.assertRaises(Exception):
+            backtest(["a_team_name_that_is_too_long"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import random
+import unittest
+
+from ready_trader_one.book_feed import BookDeltaEncoder, ReconstructedBook
+from ready_trader_one.information import MAX_BOOK_DELTA_BUFFER_SIZE, MAX_DATAGRAM_SIZE
+from ready_trader_one.ladder_book import LadderOrderBook
+from ready_trader_one.messages import ORDER_BOOK_DELTA_ENTRY
+from ready_trader_one.order_book import ITradeListener, Order, OrderBook
+from ready_trader_one.types import Instrument, Lifespan, Side
+
+DEPTH = 5
+
+
+def make_books():
+    return (OrderBook(Instrument.ETF, ITradeListener(), -0.0001, 0.0002),
+            LadderOrderBook(Instrument.ETF, ITradeListener(), -0.0001, 0.0002, 1.0))
+
+
+class BookDeltaEncoderTest(unittest.TestCase):
+    """Check that an order book rebuilt from the delta feed matches the order book."""
+
+    def play(self, book, rng: random.Random, steps: int, drop=()):
+        encoder = BookDeltaEncoder(DEPTH, snapshot_interval=10)
+        rebuilt = ReconstructedBook()
+        message = bytearray(MAX_BOOK_DELTA_BUFFER_SIZE)
+        orders = list()
+        expected = ([0] * DEPTH, [0] * DEPTH, [0] * DEPTH, [0] * DEPTH)
+        messages = list()
+
+        for step in range(steps):
+            for _ in range(rng.randrange(4)):
+                side = rng.choice((Side.BUY, Side.SELL))
+                price = (100 + rng.randrange(-12, 8) if side == Side.BUY else 100 + rng.randrange(-7, 13)) * 100
+                order = Order(len(orders) + 1, Instrument.ETF, Lifespan.GOOD_FOR_DAY, side, price,
+                              rng.randrange(1, 10))
+                book.insert(0.0, order)
+                orders.append(order)
+            for order in rng.sample(orders, min(len(orders), rng.randrange(3))):
+                book.cancel(0.0, order)
+
+            feed_sequence_number, snapshot, end = encoder.encode(book, message, 0)
+            self.assertEqual(feed_sequence_number, step + 1)
+            self.assertLessEqual(end, MAX_DATAGRAM_SIZE)
+            messages.append(bytes(message[:end]))
+            if step in drop:
+                continue
+
+            entries = list(ORDER_BOOK_DELTA_ENTRY.iter_unpack(message[:end]))
+            in_sync = rebuilt.apply(feed_sequence_number, snapshot, DEPTH, entries)
+            if in_sync:
+                book.fill_depth(*expected)
+                self.assertEqual(rebuilt.levels(), expected)
+            else:
+                self.assertFalse(snapshot)
+        return messages, rebuilt
+
+    def test_round_trip(self):
+        for book in make_books():
+            self.play(book, random.Random(7), 300)
+
+    def test_recovery(self):
+        for book in make_books():
+            _, rebuilt = self.play(book, random.Random(11), 25, drop=(3,))
+            self.assertTrue(rebuilt.in_sync)
+
+    def test_books_agree(self):
+        list_messages, _ = self.play(make_books()[0], random.Random(3), 200)
+        ladder_messages, _ = self.play(make_books()[1], random.Random(3), 200)
+        self.assertEqual(list_messages, ladder_messages)
+
+    def test_fill_depth(self):
+        for book in make_books():
+            book.insert(0.0, Order(1, Instrument.ETF, Lifespan.GOOD_FOR_DAY, Side.BUY, 9900, 5))
+            book.insert(0.0, Order(2, Instrument.ETF, Lifespan.GOOD_FOR_DAY, Side.BUY, 9800, 3))
+            book.insert(0.0, Order(3, Instrument.ETF, Lifespan.GOOD_FOR_DAY, Side.SELL, 10100, 4))
+            levels = ([1] * 3, [1] * 3, [1] * 3, [1] * 3)
+            book.fill_depth(*levels)
+            self.assertEqual(levels, ([10100, 0, 0], [4, 0, 0], [9900, 9800, 0], [5, 3, 0]))
+
+            top_levels = book.top_levels()
+            self.assertEqual((top_levels.ask_prices, top_levels.ask_volumes), ([10100, 0, 0, 0, 0], [4, 0, 0, 0, 0]))
+            self.assertEqual((top_levels.bid_prices, top_levels.bid_volumes),
+                             ([9900, 9800, 0, 0, 0], [5, 3, 0, 0, 0]))
+            book.cancel(0.0, Order(4, Instrument.ETF, Lifespan.GOOD_FOR_DAY, Side.BUY, 9900, 0))
+            book.amend(0.0, Order(5, Instrument.ETF, Lifespan.GOOD_FOR_DAY, Side.BUY, 9900, 0), 0)
+            self.assertIs(book.top_levels(), top_levels)
+            book.insert(0.0, Order(6, Instrument.ETF, Lifespan.GOOD_FOR_DAY, Side.SELL, 9800, 6))
+            self.assertIs(book.top_levels(), top_levels)
+            self.assertEqual((top_levels.bid_prices, top_levels.bid_volumes), ([9800, 0, 0, 0, 0], [2, 0, 0, 0, 0]))
+            self.assertEqual(book.last_traded_price(), 9800)
+
+
+class LadderOrderBookTest(unittest.TestCase):
+    """Check the ladder order book's handling of tick sizes."""
+
+    def test_tick_size(self):
+        # 0.29 * 100.0 is 28.999999999999996, which must not be truncated to 28 cents
+        book = LadderOrderBook(Instrument.ETF, ITradeListener(), -0.0001, 0.0002, 0.29, window_ticks=16)
+        self.assertEqual(book._LadderOrderBook__tick_size, 29)
+        book.insert(0.0, Order(1, Instrument.ETF, Lifespan.GOOD_FOR_DAY, Side.BUY, 29 * 100, 2))
+        book.insert(0.0, Order(2, Instrument.ETF, Lifespan.GOOD_FOR_DAY, Side.SELL, 29 * 102, 3))
+        self.assertEqual((book.best_bid(), book.best_ask()), (2900, 2958))
+        self.assertEqual(book._LadderOrderBook__level_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+import json
+import unittest
+
+from backtest_data import BacktestTestCase
+from ready_trader_one.controller import Controller, MARKET_OPEN_DELAY_SECONDS
+from ready_trader_one.virtual_clock import VirtualClockEventLoop
+
+
+class ControllerTest(BacktestTestCase):
+    """Check when the controller opens the market."""
+
+    def test_no_traders(self):
+        with open("exchange.json") as config_file:
+            config = json.load(config_file)
+        config["Traders"] = {}
+
+        event_loop = VirtualClockEventLoop()
+        try:
+            ctrl = Controller(config, event_loop)
+            begin = event_loop.time()
+            event_loop.run_until_complete(ctrl.start(in_process=True))
+            self.assertTrue(ctrl.traders_ready.is_set())
+            self.assertLess(ctrl.start_time - begin, MARKET_OPEN_DELAY_SECONDS)
+
+            # With no competitors, the match is shut down on the first tick
+            while not ctrl.complete:
+                event_loop.run_forever()
+            ctrl.market_events.reader_task.join()
+        finally:
+            event_loop.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import asyncio
+import unittest
+
+from ready_trader_one.base_auto_trader import BaseAutoTrader
+from ready_trader_one.information import (InformationChannel, MAX_DATAGRAM_SIZE, MAX_TRADE_TICKS,
+                                          MAX_TRADE_TICKS_PARTS, MAX_TRADE_TICKS_PER_PART)
+from ready_trader_one.messages import *
+from ready_trader_one.types import Instrument
+
+
+class RecordingTransport(object):
+    """Record a copy of every datagram sent by an information channel."""
+
+    def __init__(self):
+        self.datagrams = list()
+
+    def sendto(self, data: bytes, addr=None) -> None:
+        self.datagrams.append(bytes(data))
+
+
+class RecordingAutoTrader(BaseAutoTrader):
+    """An auto-trader that records the trade ticks reported to it."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        super(RecordingAutoTrader, self).__init__(loop)
+        self.trade_ticks_messages = list()
+
+    def on_trade_ticks_message(self, instrument: int, trade_ticks) -> None:
+        self.trade_ticks_messages.append((instrument, trade_ticks))
+
+
+class TradeTicksTest(unittest.TestCase):
+    """Check that trade ticks are split across datagrams and put back together by the auto-trader."""
+
+    def setUp(self):
+        self.event_loop = asyncio.new_event_loop()
+        self.channel = InformationChannel()
+        self.transport = RecordingTransport()
+        self.channel.connection_made(self.transport)
+        self.trader = RecordingAutoTrader(self.event_loop)
+
+    def tearDown(self):
+        self.event_loop.close()
+
+    def send(self, ticks, sequence_number: int = 1):
+        self.transport.datagrams.clear()
+        self.channel.send_trade_ticks(Instrument.ETF, sequence_number, dict(ticks).items())
+        return self.transport.datagrams
+
+    def test_split_and_reassemble(self):
+        ticks = [(10000 + i * 100, i + 1) for i in range(2 * MAX_TRADE_TICKS_PER_PART + 5)]
+        datagrams = self.send(ticks)
+        self.assertEqual(len(datagrams), 3)
+
+        counts = list()
+        for number, datagram in enumerate(datagrams):
+            self.assertLessEqual(len(datagram), MAX_DATAGRAM_SIZE)
+            length, typ = HEADER.unpack_from(datagram)
+            self.assertEqual((length, typ), (len(datagram), MessageType.TRADE_TICKS_PART))
+            instrument, sequence_number, part, parts = TRADE_TICKS_PART_HEADER.unpack_from(datagram, HEADER_SIZE)
+            self.assertEqual((instrument, sequence_number, part, parts), (Instrument.ETF, 1, number, 3))
+            counts.append((length - TRADE_TICKS_PART_HEADER_SIZE) // TRADE_TICK_SIZE)
+        self.assertEqual(counts, [MAX_TRADE_TICKS_PER_PART, MAX_TRADE_TICKS_PER_PART, 5])
+
+        for datagram in datagrams:
+            self.trader.datagram_received(datagram, ("127.0.0.1", 0))
+        self.assertEqual(self.trader.trade_ticks_messages, [(Instrument.ETF, ticks)])
+
+    def test_single_datagram(self):
+        # Trade ticks that fit in one datagram keep the original message format
+        for ticks in ([(10000, 1), (10100, 2)], [(10000 + i, 1) for i in range(MAX_TRADE_TICKS)]):
+            datagrams = self.send(ticks, 7)
+            self.assertEqual(len(datagrams), 1)
+            self.assertLessEqual(len(datagrams[0]), MAX_DATAGRAM_SIZE)
+            self.assertEqual(HEADER.unpack_from(datagrams[0]),
+                             (TRADE_TICKS_HEADER_SIZE + TRADE_TICK_SIZE * len(ticks), MessageType.TRADE_TICKS))
+            self.assertEqual(TRADE_TICKS_HEADER.unpack_from(datagrams[0], HEADER_SIZE), (Instrument.ETF,))
+            self.assertEqual(list(TRADE_TICK.iter_unpack(datagrams[0][TRADE_TICKS_HEADER_SIZE:])), ticks)
+            self.trader.trade_ticks_messages.clear()
+            self.trader.datagram_received(datagrams[0], ("127.0.0.1", 0))
+            self.assertEqual(self.trader.trade_ticks_messages, [(Instrument.ETF, ticks)])
+
+    def test_too_many_ticks(self):
+        ticks = [(10000 + i, 1) for i in range(MAX_TRADE_TICKS_PARTS * MAX_TRADE_TICKS_PER_PART + 1)]
+        with self.assertLogs("INFORMATION", "WARNING"):
+            datagrams = self.send(ticks)
+        self.assertEqual(len(datagrams), MAX_TRADE_TICKS_PARTS)
+        for datagram in datagrams:
+            self.trader.datagram_received(datagram, ("127.0.0.1", 0))
+        self.assertEqual(self.trader.trade_ticks_messages, [(Instrument.ETF, ticks[:-1])])
+
+
+if __name__ == "__main__":
+    unittest.main()
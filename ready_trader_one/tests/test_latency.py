@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from ready_trader_one.latency import (LatencyHistogram, LatencyRecorder, LATENCY_BUCKET_COUNT,
+                                      LATENCY_SUB_BUCKET_HALF_COUNT, bucket_limit)
+
+# The largest value counted in a bucket
+LARGEST = bucket_limit(LATENCY_BUCKET_COUNT - 1)
+
+
+class LatencyHistogramTest(unittest.TestCase):
+    """Check that latencies are counted in the right buckets and that overflows are counted separately."""
+
+    def test_buckets(self):
+        histogram = LatencyHistogram("test")
+        for value in (0, 1, 63, 64, 1000, 10 ** 9, LARGEST):
+            histogram.record(value)
+            index = max(i for i, count in enumerate(histogram.counts) if count)
+            self.assertLessEqual(value, bucket_limit(index))
+            self.assertTrue(index == 0 or bucket_limit(index - 1) < value)
+            histogram.counts[index] = 0
+        self.assertEqual(histogram.overflow, 0)
+
+    def test_accuracy(self):
+        for value in (100, 12345, 987654321):
+            histogram = LatencyHistogram("test")
+            histogram.record(value)
+            histogram.maximum = LARGEST
+            self.assertLessEqual(histogram.percentile(50.0) - value, value / LATENCY_SUB_BUCKET_HALF_COUNT)
+
+    def test_overflow(self):
+        histogram = LatencyHistogram("test")
+        histogram.record(LARGEST)
+        histogram.record(LARGEST + 1)
+        histogram.record(10 * LARGEST)
+        self.assertEqual(histogram.counts[-1], 1)
+        self.assertEqual(histogram.overflow, 2)
+        self.assertEqual((histogram.count, histogram.maximum), (3, 10 * LARGEST))
+        self.assertEqual(histogram.percentile(10.0), LARGEST)
+        self.assertEqual(histogram.percentile(90.0), 10 * LARGEST)
+        self.assertTrue(histogram.summary().endswith("max=%d overflow=2" % (10 * LARGEST)))
+
+
+class LatencyRecorderTest(unittest.TestCase):
+    """Check that the latency file lists the buckets and overflows of each histogram."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_dump(self):
+        filename = os.path.join(self.directory, "latency.txt")
+        recorder = LatencyRecorder(filename)
+        histogram = recorder.histogram("test")
+        histogram.record(5)
+        histogram.record(LARGEST + 1)
+        recorder.dump()
+        with open(filename) as latency_file:
+            lines = latency_file.read().splitlines()
+        self.assertEqual(lines[2:], ["", "[test]", "5 1", "overflow 1"])
+        self.assertIn("overflow=1", lines[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
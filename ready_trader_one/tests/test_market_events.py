@@ -0,0 +1,68 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+
+from backtest_data import write_market_data
+from ready_trader_one.market_events import (COMPILED_MARKET_DATA_MAGIC, MARKET_EVENT_BATCH_SIZE, MarketEvents,
+                                            compile_market_data, is_compiled_market_data)
+
+
+class CompiledMarketDataTest(unittest.TestCase):
+    """Check that the compiled market data reader yields the same events as the CSV reader."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.event_loop = asyncio.new_event_loop()
+        self.csv_file = os.path.join(self.directory, "market_data.csv")
+        self.compiled_file = os.path.join(self.directory, "market_data.bin")
+        write_market_data(self.csv_file, duration=300.0)
+
+    def tearDown(self):
+        self.event_loop.close()
+        shutil.rmtree(self.directory)
+
+    def read_events(self, filename: str, compiled: bool):
+        market_events = MarketEvents(filename, self.event_loop, None, None, None, None)
+        reader = market_events.compiled_reader if compiled else market_events.reader
+        reader(open(filename, "rb") if compiled else open(filename))
+
+        batches = list()
+        while not market_events.queue.empty():
+            batches.append([None if evt is None else (evt.time, evt.instrument, evt.operation, evt.order_id,
+                                                      evt.side, evt.volume, evt.price, evt.lifespan)
+                            for evt in market_events.queue.get_nowait()])
+        return batches
+
+    def test_round_trip(self):
+        count = compile_market_data(self.csv_file, self.compiled_file)
+        with open(self.compiled_file, "rb") as compiled, open(self.csv_file, "rb") as csv_file:
+            self.assertTrue(is_compiled_market_data(compiled))
+            self.assertEqual(compiled.tell(), 0)
+            self.assertFalse(is_compiled_market_data(csv_file))
+
+        expected = self.read_events(self.csv_file, False)
+        self.assertGreater(count, MARKET_EVENT_BATCH_SIZE)
+        self.assertEqual(sum(len(batch) for batch in expected), count + 1)
+        self.assertEqual(self.read_events(self.compiled_file, True), expected)
+
+    def test_trailing_bytes(self):
+        compile_market_data(self.csv_file, self.compiled_file)
+        expected = self.read_events(self.compiled_file, True)
+        with open(self.compiled_file, "ab") as compiled:
+            compiled.write(b"\x01\x02\x03")
+        with self.assertLogs("MARKET_EVENTS", "WARNING"):
+            self.assertEqual(self.read_events(self.compiled_file, True), expected)
+
+    def test_empty(self):
+        with open(self.csv_file, "w") as market_data:
+            market_data.write("Time,Instrument,Operation,OrderId,Side,Volume,Price,Lifespan\n")
+        self.assertEqual(compile_market_data(self.csv_file, self.compiled_file), 0)
+        with open(self.compiled_file, "rb") as compiled:
+            self.assertEqual(compiled.read(), COMPILED_MARKET_DATA_MAGIC)
+        self.assertEqual(self.read_events(self.compiled_file, True), [[None]])
+
+
+if __name__ == "__main__":
+    unittest.main()
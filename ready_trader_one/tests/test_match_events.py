@@ -0,0 +1,31 @@
+import unittest
+
+from backtest_data import BacktestTestCase
+from ready_trader_one.exchange import backtest
+from ready_trader_one.match_events import convert_match_events, read_binary_match_events
+
+
+class BinaryMatchEventsTest(BacktestTestCase):
+    """Check that converting binary match events to CSV gives the same file as writing CSV directly."""
+
+    def test_round_trip(self):
+        traders = ["autotrader", "example1", "example2"]
+        backtest(traders, match_events_file="match_events.csv")
+        backtest(traders, match_events_file="match_events.bin")
+
+        count = convert_match_events("match_events.bin", "converted.csv")
+        with open("match_events.csv") as expected, open("converted.csv") as converted:
+            expected_lines = expected.readlines()
+            self.assertEqual(converted.readlines(), expected_lines)
+        self.assertEqual(count, len(expected_lines) - 1)
+        self.assertGreater(count, len(traders))
+
+    def test_not_binary(self):
+        backtest(["autotrader"], match_events_file="match_events.csv")
+        with open("match_events.csv", "rb") as match_events:
+            with self.assertRaises(ValueError):
+                list(read_binary_match_events(match_events))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,176 @@
+import asyncio
+import unittest
+
+from ready_trader_one.base_auto_trader import BaseAutoTrader
+from ready_trader_one.messages import *
+from ready_trader_one.order_gateway import message_frequency_interval
+from ready_trader_one.types import Lifespan, Side
+from ready_trader_one.virtual_clock import VirtualClockEventLoop
+
+
+class RecordingTransport(object):
+    """Record the order requests written by an auto-trader, with the time each was written."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.event_loop = loop
+        self.requests = list()
+
+    def write(self, data: bytes) -> None:
+        length, typ = HEADER.unpack_from(data)
+        if typ == MessageType.AMEND_ORDER:
+            request = ("amend",) + AMEND_MESSAGE.unpack_from(data, HEADER_SIZE)
+        elif typ == MessageType.CANCEL_ORDER:
+            request = ("cancel",) + CANCEL_MESSAGE.unpack_from(data, HEADER_SIZE)
+        else:
+            request = ("insert",) + INSERT_MESSAGE.unpack_from(data, HEADER_SIZE)
+        self.requests.append((self.event_loop.time(), request))
+
+
+class RecordingAutoTrader(BaseAutoTrader):
+    """An auto-trader that records the errors and order statuses reported to it."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        super(RecordingAutoTrader, self).__init__(loop)
+        self.gateway = self.enable_order_gateway(limit=3, interval=1.0, margin=0.0)
+        self.errors = list()
+        self.statuses = list()
+
+    def on_error_message(self, client_order_id: int, error_message: bytes) -> None:
+        self.errors.append(client_order_id)
+
+    def on_order_status_message(self, client_order_id: int, fill_volume: int, remaining_volume: int,
+                                fees: int) -> None:
+        self.statuses.append((client_order_id, fill_volume, remaining_volume, fees))
+
+
+class OrderGatewayTest(unittest.TestCase):
+    """Check that the order gateway keeps to the limit and combines queued requests."""
+
+    def setUp(self):
+        self.event_loop = VirtualClockEventLoop()
+        self.trader = RecordingAutoTrader(self.event_loop)
+        self.transport = RecordingTransport(self.event_loop)
+        self.trader.execution = self.transport
+
+    def tearDown(self):
+        self.event_loop.close()
+
+    def advance(self, seconds: float) -> None:
+        self.event_loop.run_until_complete(asyncio.sleep(seconds))
+
+    def receive_error(self, client_order_id: int) -> None:
+        self.trader.data_received(HEADER.pack(ERROR_MESSAGE_SIZE, MessageType.ERROR)
+                                  + ERROR_MESSAGE.pack(client_order_id, b"error"))
+
+    def receive_status(self, client_order_id: int, fill_volume: int, remaining_volume: int, fees: int) -> None:
+        self.trader.data_received(HEADER.pack(ORDER_STATUS_MESSAGE_SIZE, MessageType.ORDER_STATUS)
+                                  + ORDER_STATUS_MESSAGE.pack(client_order_id, fill_volume, remaining_volume, fees))
+
+    def requests(self):
+        return [request for _, request in self.transport.requests]
+
+    def test_limit(self):
+        for i in range(1, 11):
+            self.trader.send_insert_order(i, Side.BUY, 100, 1, Lifespan.GOOD_FOR_DAY)
+        self.assertEqual(len(self.transport.requests), 3)
+
+        self.advance(5.0)
+        self.assertEqual([request[1] for request in self.requests()], list(range(1, 11)))
+        times = [time for time, _ in self.transport.requests]
+        for time in times:
+            self.assertLessEqual(sum(1 for t in times if time - 1.0 + 1e-6 < t <= time), 3)
+
+    def test_queued_insert(self):
+        for i in range(1, 4):
+            self.trader.send_insert_order(i, Side.BUY, 100, 1, Lifespan.GOOD_FOR_DAY)
+        self.trader.send_insert_order(4, Side.SELL, 200, 10, Lifespan.GOOD_FOR_DAY)
+        self.trader.send_insert_order(5, Side.SELL, 200, 10, Lifespan.GOOD_FOR_DAY)
+        self.trader.send_insert_order(6, Side.SELL, 200, 10, Lifespan.GOOD_FOR_DAY)
+
+        # An amend or cancel of a queued insert changes or drops the insert and sends nothing
+        self.trader.send_amend_order(4, 4)
+        self.trader.send_amend_order(4, 7)
+        self.trader.send_cancel_order(5)
+        self.trader.send_amend_order(6, 0)
+        self.advance(0.0)
+        self.assertEqual(self.trader.statuses, [(5, 0, 0, 0), (6, 0, 0, 0)])
+        self.assertEqual(len(self.transport.requests), 3)
+
+        self.advance(1.5)
+        self.assertEqual(self.requests()[3:], [("insert", 4, Side.SELL, 200, 4, Lifespan.GOOD_FOR_DAY)])
+
+    def test_queued_amend_and_cancel(self):
+        for i in range(1, 4):
+            self.trader.send_insert_order(i, Side.BUY, 100, 10, Lifespan.GOOD_FOR_DAY)
+        self.receive_status(1, 0, 10, 0)
+        self.receive_status(2, 0, 10, 0)
+
+        # A later amend replaces an earlier one, a cancel replaces an amend and repeats are ignored
+        self.trader.send_amend_order(1, 8)
+        self.trader.send_amend_order(1, 6)
+        self.trader.send_amend_order(2, 5)
+        self.trader.send_cancel_order(2)
+        self.trader.send_cancel_order(2)
+        self.trader.send_amend_order(2, 4)
+
+        self.advance(1.5)
+        self.assertEqual(self.requests()[3:], [("amend", 1, 6), ("cancel", 2)])
+
+    def test_cancel_and_insert_become_amend(self):
+        for i in range(1, 4):
+            self.trader.send_insert_order(i, Side.BUY, 100, 10, Lifespan.GOOD_FOR_DAY)
+        self.receive_status(1, 4, 6, -2)
+
+        self.trader.send_cancel_order(1)
+        self.trader.send_insert_order(7, Side.BUY, 100, 5, Lifespan.GOOD_FOR_DAY)
+        self.advance(0.0)
+        self.assertEqual(self.trader.statuses, [(1, 4, 6, -2), (1, 4, 0, -2)])
+
+        # The existing order is amended to its filled volume plus the volume of the new order
+        self.advance(1.5)
+        self.assertEqual(self.requests()[3:], [("amend", 1, 9)])
+
+        # Later messages for the existing order are reported for the new order, less the old order's fills and fees
+        self.receive_status(1, 6, 3, -3)
+        self.assertEqual(self.trader.statuses[-1], (7, 2, 3, -1))
+        self.receive_error(1)
+        self.assertEqual(self.trader.errors, [7])
+        self.receive_status(1, 9, 0, -5)
+        self.assertEqual(self.trader.statuses[-1], (7, 5, 0, -3))
+
+        # Once the order is finished, its messages are passed on unchanged
+        self.receive_status(1, 9, 0, -5)
+        self.assertEqual(self.trader.statuses[-1], (1, 9, 0, -5))
+
+    def test_cancel_and_larger_insert(self):
+        for i in range(1, 4):
+            self.trader.send_insert_order(i, Side.BUY, 100, 10, Lifespan.GOOD_FOR_DAY)
+        self.receive_status(1, 4, 6, 0)
+
+        self.trader.send_cancel_order(1)
+        self.trader.send_insert_order(7, Side.BUY, 100, 7, Lifespan.GOOD_FOR_DAY)
+        self.advance(1.5)
+        self.assertEqual(self.requests()[3:], [("cancel", 1), ("insert", 7, Side.BUY, 100, 7,
+                                                               Lifespan.GOOD_FOR_DAY)])
+
+    def test_rejected_insert(self):
+        self.trader.send_insert_order(1, Side.BUY, 100, 10, Lifespan.GOOD_FOR_DAY)
+        self.receive_error(1)
+        self.trader.send_cancel_order(1)
+        self.assertEqual(self.trader.errors, [1])
+        self.assertEqual(len(self.transport.requests), 1)
+
+    def test_message_frequency_limit(self):
+        self.assertEqual(message_frequency_interval(1.0, 1.0), 1.0)
+        self.assertEqual(message_frequency_interval(1.0, 2.0), 0.25)
+
+        self.trader.set_message_frequency_limit(5, 0.5, 0.0)
+        for i in range(1, 11):
+            self.trader.send_insert_order(i, Side.BUY, 100, 1, Lifespan.GOOD_FOR_DAY)
+        self.assertEqual(len(self.transport.requests), 5)
+        self.advance(0.6)
+        self.assertEqual(len(self.transport.requests), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
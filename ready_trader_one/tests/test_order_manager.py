@@ -0,0 +1,120 @@
+import unittest
+
+from ready_trader_one.order_manager import OrderManager
+from ready_trader_one.types import Lifespan, Side
+
+
+class OrderManagerTest(unittest.TestCase):
+    """Check the slots and running totals of the order manager."""
+
+    def setUp(self):
+        self.orders = OrderManager(order_count_limit=3, active_volume_limit=20, position_limit=10)
+
+    def assertTotals(self, active_count, active_volume, buy_volume, sell_volume):
+        self.assertEqual((self.orders.active_count, self.orders.active_volume, self.orders.buy_volume,
+                          self.orders.sell_volume), (active_count, active_volume, buy_volume, sell_volume))
+
+    def test_insert_and_fill(self):
+        self.orders.on_insert(1, Side.BUY, 100, 5, Lifespan.GOOD_FOR_DAY)
+        self.orders.on_insert(2, Side.SELL, 200, 3, Lifespan.GOOD_FOR_DAY)
+        self.assertTotals(2, 8, 5, 3)
+        self.assertEqual(len(self.orders), 2)
+
+        self.orders.on_order_status(1, 2, 3, -1)
+        self.assertTotals(2, 6, 3, 3)
+        self.assertEqual(self.orders.remaining_volume(1), 3)
+
+        self.orders.on_order_status(1, 5, 0, -2)
+        self.assertTotals(1, 3, 0, 3)
+        self.assertNotIn(1, self.orders)
+        self.assertFalse(self.orders.is_live(1))
+
+    def test_slot_reuse(self):
+        self.orders.on_insert(1, Side.BUY, 100, 5, Lifespan.GOOD_FOR_DAY)
+        self.orders.on_insert(2, Side.BUY, 100, 5, Lifespan.GOOD_FOR_DAY)
+        self.orders.on_order_status(1, 5, 0, 0)
+        self.orders.on_insert(3, Side.SELL, 300, 4, Lifespan.FILL_AND_KILL)
+
+        self.assertEqual(len(self.orders.states), 2)
+        self.assertEqual(self.orders.slots[3], 0)
+        self.assertEqual((self.orders.client_order_ids[0], self.orders.confirmed[0], self.orders.fill_volumes[0],
+                          self.orders.prices[0], self.orders.sides[0]), (3, False, 0, 300, Side.SELL))
+        self.assertTotals(2, 9, 5, 4)
+
+    def test_cancel(self):
+        self.orders.on_insert(1, Side.BUY, 100, 5, Lifespan.GOOD_FOR_DAY)
+        self.orders.on_order_status(1, 0, 5, 0)
+        self.assertTrue(self.orders.on_cancel(1))
+
+        # A cancelled order still counts towards the worst case position until the cancel is confirmed
+        self.assertTrue(self.orders.is_cancelling(1))
+        self.assertTotals(0, 0, 5, 0)
+        self.assertFalse(self.orders.on_cancel(1))
+        self.assertFalse(self.orders.on_amend(1, 1))
+
+        self.orders.on_order_status(1, 2, 0, 0)
+        self.assertTotals(0, 0, 0, 0)
+        self.assertEqual(self.orders.free_slots, [0])
+
+    def test_cancel_finished_order(self):
+        self.orders.on_insert(1, Side.SELL, 100, 5, Lifespan.GOOD_FOR_DAY)
+        self.orders.on_order_status(1, 5, 0, 0)
+        self.assertFalse(self.orders.on_cancel(1))
+        self.assertFalse(self.orders.on_amend(1, 2))
+        self.assertFalse(self.orders.on_cancel(99))
+        self.assertTotals(0, 0, 0, 0)
+
+        # Late messages for a finished order are ignored
+        self.orders.on_order_status(1, 5, 0, 0)
+        self.orders.on_error(1)
+        self.assertTotals(0, 0, 0, 0)
+        self.assertEqual(self.orders.free_slots, [0])
+
+    def test_amend(self):
+        self.orders.on_insert(1, Side.BUY, 100, 10, Lifespan.GOOD_FOR_DAY)
+        self.orders.on_order_status(1, 4, 6, 0)
+        self.assertTrue(self.orders.on_amend(1, 7))
+        self.assertTotals(1, 3, 3, 0)
+
+        # Amending below the filled volume leaves nothing to trade, but the order is only freed by its status
+        self.assertTrue(self.orders.on_amend(1, 2))
+        self.assertTotals(1, 0, 0, 0)
+        self.orders.on_order_status(1, 4, 0, 0)
+        self.assertTotals(0, 0, 0, 0)
+        self.assertNotIn(1, self.orders)
+
+    def test_error(self):
+        self.orders.on_insert(1, Side.BUY, 100, 5, Lifespan.GOOD_FOR_DAY)
+        self.orders.on_insert(2, Side.BUY, 100, 5, Lifespan.GOOD_FOR_DAY)
+        self.orders.on_order_status(2, 0, 5, 0)
+
+        # An error for a confirmed order (e.g. a bad amend) leaves it alone
+        self.orders.on_error(2)
+        self.assertIn(2, self.orders)
+
+        # An error for an unconfirmed order means its insert was rejected
+        self.orders.on_error(1)
+        self.assertNotIn(1, self.orders)
+        self.assertTotals(1, 5, 5, 0)
+
+    def test_limits(self):
+        self.orders.on_position_change(-4, 4)
+        self.assertTrue(self.orders.can_insert(Side.BUY, 6))
+        self.assertFalse(self.orders.can_insert(Side.BUY, 7))
+        self.assertTrue(self.orders.can_insert(Side.SELL, 14))
+        self.assertFalse(self.orders.can_insert(Side.SELL, 15))
+
+        self.orders.on_insert(1, Side.BUY, 100, 6, Lifespan.GOOD_FOR_DAY)
+        self.assertFalse(self.orders.can_insert(Side.BUY, 1))
+        self.assertEqual(self.orders.insert_error(0), b"order rejected: invalid volume")
+        self.assertEqual(self.orders.insert_error(15), b"order rejected: active order volume limit breached")
+
+        self.orders.on_insert(2, Side.SELL, 100, 1, Lifespan.GOOD_FOR_DAY)
+        self.orders.on_insert(3, Side.SELL, 100, 1, Lifespan.GOOD_FOR_DAY)
+        self.assertEqual(self.orders.insert_error(1), b"order rejected: active order count limit breached")
+        self.orders.on_cancel(3)
+        self.assertIsNone(self.orders.insert_error(1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import os
+import unittest
+
+from ready_trader_one.messages import HEADER, MessageType
+from ready_trader_one.shared_feed import (SHARED_FEED_ADDRESS, SHARED_FEED_HEADER_SIZE, SLOT_SEQUENCE, SLOT_SIZE,
+                                          SharedMemoryPublisher, SharedMemorySubscriber, attach_shared_memory,
+                                          is_shared_feed_available)
+
+
+def make_message(number: int) -> bytes:
+    """Return an information message whose payload identifies it."""
+    payload = b"message %d" % number
+    return HEADER.pack(HEADER.size + len(payload), MessageType.TRADE_TICKS) + payload
+
+
+class RecordingProtocol(object):
+    """Record the messages passed on by a subscriber."""
+
+    def __init__(self):
+        self.messages = list()
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        self.messages.append((data, addr))
+
+
+class RecordingSubscriber(SharedMemorySubscriber):
+    """A subscriber that records the number of messages it reports missing."""
+
+    def __init__(self, name: str, protocol: RecordingProtocol):
+        super(RecordingSubscriber, self).__init__(name, protocol)
+        self.missed_counts = list()
+
+    def on_messages_missed(self, count: int) -> None:
+        self.missed_counts.append(count)
+
+
+@unittest.skipUnless(is_shared_feed_available(), "shared memory requires Python 3.8 or later on an x86 processor")
+class SharedMemoryPublisherTest(unittest.TestCase):
+    """Check that a publisher does not take over shared memory that already exists unless asked to."""
+
+    def setUp(self):
+        self.name = "rt1_test_%d" % os.getpid()
+        self.publisher = SharedMemoryPublisher(self.name, slot_count=4)
+
+    def tearDown(self):
+        self.publisher.close()
+
+    def test_existing_shared_memory(self):
+        with self.assertRaises(FileExistsError):
+            SharedMemoryPublisher(self.name, slot_count=4)
+
+        # The first publisher's feed is untouched
+        self.publisher.publish(b"message")
+        memory = attach_shared_memory(self.name)
+        try:
+            self.assertEqual(bytes(memory.buf[:6]), b"RT1SHM")
+        finally:
+            memory.close()
+
+    def test_replace_existing(self):
+        replacement = SharedMemoryPublisher(self.name, slot_count=8, replace_existing=True)
+        try:
+            self.assertEqual(replacement.slot_count, 8)
+        finally:
+            replacement.close()
+
+
+@unittest.skipUnless(is_shared_feed_available(), "shared memory requires Python 3.8 or later on an x86 processor")
+class SharedMemorySubscriberTest(unittest.TestCase):
+    """Check that a subscriber receives what is published, skips torn slots and catches up when it falls behind."""
+
+    def setUp(self):
+        self.name = "rt1_test_%d" % os.getpid()
+        self.publisher = SharedMemoryPublisher(self.name, slot_count=4)
+        self.protocol = RecordingProtocol()
+        self.subscriber = RecordingSubscriber(self.name, self.protocol)
+
+    def tearDown(self):
+        self.subscriber.close()
+        self.publisher.close()
+
+    def received(self):
+        return [data for data, _ in self.protocol.messages]
+
+    def test_round_trip(self):
+        self.assertEqual(self.subscriber.poll(), 0)
+        for i in range(3):
+            self.publisher.publish(make_message(i))
+        self.assertEqual(self.subscriber.poll(), 3)
+        self.assertEqual(self.protocol.messages, [(make_message(i), SHARED_FEED_ADDRESS) for i in range(3)])
+
+        # The ring wraps around
+        for i in range(3, 9):
+            self.publisher.publish(make_message(i))
+            self.assertEqual(self.subscriber.poll(), 1)
+        self.assertEqual(self.received(), [make_message(i) for i in range(9)])
+        self.assertEqual(self.subscriber.missed_counts, [])
+
+    def test_torn_read(self):
+        self.publisher.publish(make_message(0))
+
+        # Message 1 is half written: its slot's sequence word is odd
+        offset = SHARED_FEED_HEADER_SIZE + SLOT_SIZE
+        SLOT_SEQUENCE.pack_into(self.publisher.buffer, offset, 3)
+        message = make_message(1)
+        self.publisher.buffer[offset + SLOT_SEQUENCE.size:offset + SLOT_SEQUENCE.size + len(message)] = message
+        self.assertEqual(self.subscriber.poll(), 1)
+        self.assertEqual(self.received(), [make_message(0)])
+
+        SLOT_SEQUENCE.pack_into(self.publisher.buffer, offset, 4)
+        self.assertEqual(self.subscriber.poll(), 1)
+        self.assertEqual(self.received(), [make_message(0), make_message(1)])
+
+    def test_falls_behind(self):
+        for i in range(10):
+            self.publisher.publish(make_message(i))
+
+        # Messages 0 to 6 have been, or may be about to be, overwritten
+        self.assertEqual(self.subscriber.poll(), 3)
+        self.assertEqual(self.received(), [make_message(i) for i in range(7, 10)])
+        self.assertEqual(self.subscriber.missed_counts, [7])
+        self.assertEqual(self.subscriber.missed, 7)
+
+        self.publisher.publish(make_message(10))
+        self.assertEqual(self.subscriber.poll(), 1)
+        self.assertEqual(self.received()[-1], make_message(10))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import unittest
+
+from backtest_data import BacktestTestCase
+from ready_trader_one.exchange import backtest
+from ready_trader_one.market_events import is_compiled_market_data
+from ready_trader_one.sweep import SWEEP_RESULT_FIELDS, parameter_grid, shared_market_data, sweep
+
+
+class ParameterGridTest(unittest.TestCase):
+    """Check that the parameter grid holds every combination, with the last parameter varying fastest."""
+
+    def test_parameter_grid(self):
+        self.assertEqual(parameter_grid({"a": [1, 2], "b": ["x", "y", "z"]}),
+                         [{"a": 1, "b": "x"}, {"a": 1, "b": "y"}, {"a": 1, "b": "z"},
+                          {"a": 2, "b": "x"}, {"a": 2, "b": "y"}, {"a": 2, "b": "z"}])
+        self.assertEqual(parameter_grid({}), [{}])
+        self.assertEqual(parameter_grid({"a": []}), [])
+
+
+class SweepTest(BacktestTestCase):
+    """Check that a sweep returns the result of a backtest for each set of parameters, in the order of the grid."""
+
+    def test_sweep(self):
+        grid = parameter_grid({"order_volume": [3, 1, 2]})
+        results = sweep("autotrader", grid, ["example1", "example2"], max_workers=2)
+        self.assertEqual([parameters for parameters, _ in results], grid)
+
+        for parameters, result in results:
+            account = backtest(["autotrader", "example1", "example2"],
+                               parameters={"autotrader": parameters})["autotrader"]
+            self.assertEqual(result, {field: getattr(account, field) for field in SWEEP_RESULT_FIELDS})
+
+    def test_parameters_reach_trader(self):
+        results = sweep("autotrader", parameter_grid({"order_volume": [1, 3]}), ["example1"], max_workers=2)
+        self.assertNotEqual(results[0][1], results[1][1])
+        self.assertLess(results[0][1]["buy_volume"] + results[0][1]["sell_volume"],
+                        results[1][1]["buy_volume"] + results[1][1]["sell_volume"])
+
+    def test_worker_logs(self):
+        os.mkdir("logs")
+        sweep("autotrader", parameter_grid({"order_volume": [1, 2, 3]}), ["example1"], max_workers=2,
+              log_directory="logs")
+        log_files = os.listdir("logs")
+        self.assertTrue(1 <= len(log_files) <= 2)
+        for log_file in log_files:
+            self.assertRegex(log_file, r"^worker\d+\.log$")
+            self.assertGreater(os.path.getsize(os.path.join("logs", log_file)), 0)
+        self.assertFalse(os.path.exists("exchange.log"))
+
+    def test_shared_market_data(self):
+        with shared_market_data(self.market_data_file) as compiled_file:
+            with open(compiled_file, "rb") as market_data:
+                self.assertTrue(is_compiled_market_data(market_data))
+
+            # A compiled file is used as it is
+            with shared_market_data(compiled_file) as same_file:
+                self.assertEqual(same_file, compiled_file)
+        self.assertFalse(os.path.exists(compiled_file))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import importlib
+import os
+import random
+import sys
+import unittest
+
+from backtest_data import BacktestTestCase
+from ready_trader_one.tournament import draw_matches, run_tournament
+
+BROKEN_TRADER = """
+from ready_trader_one.base_auto_trader import BaseAutoTrader
+
+
+class AutoTrader(BaseAutoTrader):
+    def __init__(self, loop):
+        raise RuntimeError("broken")
+"""
+
+
+COUNTING_TRADER = """
+from autotrader import AutoTrader as BaseAutoTrader
+
+
+class AutoTrader(BaseAutoTrader):
+    def __init__(self, loop):
+        super(AutoTrader, self).__init__(loop)
+        with open("constructed.txt", "a") as constructed:
+            constructed.write("constructed\\n")
+"""
+
+
+class DrawMatchesTest(unittest.TestCase):
+    """Check that the teams are drawn into matches of nearly equal size with at least two teams in each."""
+
+    def test_draw_matches(self):
+        teams = ["team%d" % i for i in range(10)]
+        matches = draw_matches(teams, 3, random.Random(1))
+        self.assertEqual(sorted(len(match) for match in matches), [3, 3, 4])
+        self.assertEqual(sorted(team for match in matches for team in match), sorted(teams))
+
+    def test_too_few_teams(self):
+        self.assertEqual(len(draw_matches(["a", "b", "c", "d", "e"], 16, random.Random(1))), 2)
+        self.assertEqual(len(draw_matches(["a", "b", "c"], 2, random.Random(1))), 1)
+        self.assertEqual(len(draw_matches(["a"], 2, random.Random(1))), 1)
+
+
+class TournamentTest(BacktestTestCase):
+    """Check that the best teams of each match go through to the next round and that failed teams are knocked out."""
+
+    def setUp(self):
+        super(TournamentTest, self).setUp()
+        with open("broken_trader.py", "w") as module:
+            module.write(BROKEN_TRADER)
+        with open("counting_trader.py", "w") as module:
+            module.write(COUNTING_TRADER)
+        sys.path.insert(0, self.directory)
+        importlib.invalidate_caches()
+
+    def tearDown(self):
+        sys.path.remove(self.directory)
+        sys.modules.pop("broken_trader", None)
+        sys.modules.pop("counting_trader", None)
+        super(TournamentTest, self).tearDown()
+
+    def test_tournament(self):
+        teams = {"a1": "autotrader", "c1": "counting_trader", "e1": "example1", "e2": "example1", "f1": "example2",
+                 "f2": "example2", "broken": "broken_trader", "missing": "no_such_trader"}
+        os.mkdir("events")
+        rounds = run_tournament(teams, [self.market_data_file], ((2, 2), (1, 0)), max_workers=2,
+                                match_events_directory="events", seed=3)
+        self.assertEqual([len(results) for results in rounds], [2, 1])
+        self.assertEqual(sorted(os.listdir("events")), ["match1.csv", "match2.csv", "match3.csv"])
+
+        first_round = rounds[0]
+        self.assertEqual(sorted(team for result in first_round
+                                for team in [team for team, _ in result.standings] + list(result.failures)),
+                         sorted(teams))
+        failures = {team: reason for result in first_round for team, reason in result.failures.items()}
+        self.assertEqual(sorted(failures), ["broken", "missing"])
+        self.assertIn("broken", failures["broken"])
+
+        for result in first_round:
+            profits = [profit for _, profit in result.standings]
+            self.assertEqual(profits, sorted(profits, reverse=True))
+            self.assertEqual(result.qualifiers, [team for team, _ in result.standings[:2]])
+
+        final = rounds[1][0]
+        self.assertEqual(sorted(team for team, _ in final.standings),
+                         sorted(team for result in first_round for team in result.qualifiers))
+        self.assertEqual(final.failures, {})
+        self.assertEqual(len(final.qualifiers), 1)
+
+        # Each auto-trader is created once for each match it plays
+        matches_played = sum(1 for results in rounds for result in results
+                             if "c1" in [team for team, _ in result.standings])
+        with open("constructed.txt") as constructed:
+            self.assertEqual(len(constructed.readlines()), matches_played)
+
+    def test_team_name_too_long(self):
+        with self.assertRaises(ValueError):
+            run_tournament({"a" * 21: "autotrader", "b": "autotrader"}, [self.market_data_file], ((1, 0),))
+
+
+if __name__ == "__main__":
+    unittest.main()
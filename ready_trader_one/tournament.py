@@ -0,0 +1,81 @@
+import argparse
+import os
+import time
+
+from typing import Dict
+
+from ready_trader_one.application import load_config
+from ready_trader_one.tournament import TOURNAMENT_DRAW, run_tournament
+
+
+def parse_draw(text: str):
+    """Parse a draw given as 'matches:qualifiers,...' (e.g. '4:3,2:4,1')."""
+    try:
+        return tuple((int(m), int(q or 0)) for m, _, q in (r.partition(":") for r in text.split(",")))
+    except ValueError:
+        raise argparse.ArgumentTypeError("the draw should be given as matches:qualifiers,... (e.g. 4:3,2:4,1)")
+
+
+def parse_entrants(entrants) -> Dict[str, str]:
+    """Return a team name for each copy of each auto-trader, given as 'module' or 'module:copies'."""
+    teams = dict()
+    for entrant in entrants:
+        module, _, copies = entrant.partition(":")
+        count = int(copies) if copies else 1
+        for i in range(1, count + 1):
+            teams[module if count == 1 else "%s_%d" % (module, i)] = module
+    return teams
+
+
+def main():
+    """Play a knockout tournament between auto-traders and print the results of every match."""
+    parser = argparse.ArgumentParser(description="Play a knockout tournament between auto-traders.")
+    parser.add_argument("entrants", nargs="+", metavar="trader",
+                        help="python module name of an auto-trader, optionally followed by ':' and the number of "
+                             "teams that should use it (e.g. example1:20)")
+    parser.add_argument("--draw", type=parse_draw, default=TOURNAMENT_DRAW,
+                        help="number of matches in each round and how many teams from each match go through, as "
+                             "matches:qualifiers,... (default: the Online Tournament 1 draw, 16:3,8:4,4:4,2:4,1)")
+    parser.add_argument("--market-data", action="append", metavar="FILE",
+                        help="market data file, used for every round or, if repeated, for each round in turn "
+                             "(default: the MarketDataFile in exchange.json)")
+    parser.add_argument("--match-events", metavar="DIRECTORY",
+                        help="directory in which to write the match events of each match (default: none)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the random draw (default: 0)")
+    parser.add_argument("--workers", type=int, help="number of worker processes (default: one per CPU)")
+    parser.add_argument("--logs", metavar="DIRECTORY",
+                        help="directory in which each worker process writes its own log (default: no logs)")
+    args = parser.parse_args()
+
+    market_data_files = args.market_data or [load_config("exchange")["Engine"]["MarketDataFile"]]
+    if args.logs:
+        os.makedirs(args.logs, exist_ok=True)
+
+    start = time.perf_counter()
+    try:
+        rounds = run_tournament(parse_entrants(args.entrants), market_data_files, args.draw, args.workers,
+                                args.match_events, args.seed, args.logs)
+    except ValueError as e:
+        parser.error(str(e))
+    elapsed = time.perf_counter() - start
+
+    for results in rounds:
+        print("Round %d" % results[0].round_number)
+        for result in results:
+            print("  Match %d" % result.match_number)
+            for place, (team, profit) in enumerate(result.standings, 1):
+                print("    %d. %-20s %12.2f%s" % (place, team, profit / 100.0,
+                                                  " *" if place <= result.qualified else ""))
+            for team, reason in sorted(result.failures.items()):
+                print("    -. %-20s %s" % (team, reason))
+    if rounds:
+        qualifiers = [team for result in rounds[-1] for team in result.qualifiers]
+        if len(rounds[-1]) == 1:
+            print("Winner: %s" % (qualifiers[0] if qualifiers else "none"))
+        else:
+            print("Teams remaining: %s" % ", ".join(qualifiers))
+    print("%d matches completed in %.1f seconds" % (sum(len(results) for results in rounds), elapsed))
+
+
+if __name__ == "__main__":
+    main()